@@ -1,5 +1,9 @@
+import time
+from collections import deque, namedtuple
+
 from llama_index.core.agent.workflow import (
     AgentWorkflow,
+    AgentInput,
     AgentStream,
     AgentOutput,
     ToolCall,
@@ -8,73 +12,165 @@ from llama_index.core.agent.workflow import (
 
 from assistant.agents.module_retrieval_agent import module_retrieval_agent
 from assistant.agents.study_planner_agent import study_planner_agent
-from utils.supabase_methods import get_student
+from assistant.llm_cache import get_llm_response_cache
+from utils.supabase_methods import get_student, read_cache
+from utils.tracing import span
 
+# One piece of streamed output: a text delta from an agent, or, once the run
+# is over, the final response with the run's timings.
+WorkflowChunk = namedtuple("WorkflowChunk", ["agent", "delta", "final", "metrics"], defaults=[None, None])
 
-async def execute_agent_workflow(user_msg: str, retrieval_strategy: str):
-    student = get_student()
-    taken_modules = student.taken_courses if student.taken_courses else []
-    desired_occupations = student.desired_jobs
-    expected_semesters = student.expected_semesters
-    desired_lecturers = student.desired_lecturers
-    available_days = student.available_days
-    assessment_type = student.assessment_type
-    oral_assessment = student.oral_assessment
-    project_work = student.project_work
-    agent_workflow = AgentWorkflow(
-        agents=[
-            study_planner_agent,
-            module_retrieval_agent,
-        ],
-        root_agent=module_retrieval_agent.name,
-        initial_state={
-            "taken_modules": taken_modules,
-            "desired_occupations": desired_occupations,
-            "expected_semesters": expected_semesters,
+# Time to first token and total time of the most recent runs.
+run_timings = deque(maxlen=100)
+
+
+def _usage(event):
+    """Token usage reported with an LLM response, when the provider includes it."""
+    raw = getattr(event, "raw", None)
+    usage = raw.get("usage") if isinstance(raw, dict) else getattr(raw, "usage", None)
+    if usage is None:
+        return {}
+    get = usage.get if isinstance(usage, dict) else lambda key: getattr(usage, key, None)
+    return {key: get(key) for key in ("input_tokens", "output_tokens") if get(key) is not None}
+
+
+class _WorkflowSpans:
+    """Spans for what only shows up as workflow events: each agent's turn and each LLM call."""
+
+    def __init__(self):
+        self.agent = None
+        self.llm = None
+
+    def agent_changed(self, name):
+        self.finish()
+        self.agent = span(f"agent.{name}", handoffs=0).start(activate=False)
+
+    def llm_started(self):
+        if self.llm is not None:
+            self.llm.finish()
+        self.llm = span(f"llm.{self.agent.name.split('.', 1)[1] if self.agent else 'unknown'}",
+                        output_chars=0).start(activate=False)
+
+    def delta(self, text):
+        if self.llm is not None:
+            self.llm.attributes["output_chars"] += len(text)
+
+    def llm_finished(self, event):
+        if self.llm is not None:
+            self.llm.set(tool_calls=len(event.tool_calls or []), **_usage(event))
+            self.llm.finish()
+            self.llm = None
+
+    def tool_called(self, tool_name):
+        if self.agent is not None and tool_name == "handoff":
+            self.agent.attributes["handoffs"] += 1
+
+    def finish(self):
+        for s in (self.llm, self.agent):
+            if s is not None:
+                s.finish()
+        self.llm = self.agent = None
+
+
+def build_initial_state(student, retrieval_strategy):
+    return {
+        "taken_modules": student.taken_courses if student.taken_courses else [],
+        "desired_occupations": student.desired_jobs,
+        "expected_semesters": student.expected_semesters,
+        "retrieval_strategy": retrieval_strategy,
+        "desired_lecturers": student.desired_lecturers,
+        "available_days": student.available_days,
+        "assessment_type": student.assessment_type,
+        "oral_assessment": student.oral_assessment,
+        "project_work": student.project_work
+    }
+
+
+async def stream_agent_workflow(user_msg: str, retrieval_strategy: str):
+    """Run the workflow, yielding each agent's text deltas as they arrive."""
+    with span("workflow.run", retrieval_strategy=retrieval_strategy) as run_span:
+        student = get_student()
+        agent_workflow = AgentWorkflow(
+            agents=[
+                study_planner_agent,
+                module_retrieval_agent,
+            ],
+            root_agent=module_retrieval_agent.name,
+            initial_state=build_initial_state(student, retrieval_strategy),
+        )
+        start = time.perf_counter()
+        first_token = None
+        spans = _WorkflowSpans()
+        handler = agent_workflow.run(
+            user_msg=user_msg,
+        )
+
+        current_agent = None
+        try:
+            async for event in handler.stream_events():
+                if (
+                        hasattr(event, "current_agent_name")
+                        and event.current_agent_name != current_agent
+                ):
+                    current_agent = event.current_agent_name
+                    spans.agent_changed(current_agent)
+                    print(f"\n{'=' * 50}")
+                    print(f"🤖 Agent: {current_agent}")
+                    print(f"{'=' * 50}\n")
+
+                if isinstance(event, AgentInput):
+                    spans.llm_started()
+                elif isinstance(event, AgentStream):
+                    if event.delta:
+                        if first_token is None:
+                            first_token = time.perf_counter() - start
+                        spans.delta(event.delta)
+                        print(event.delta, end="", flush=True)
+                        yield WorkflowChunk(current_agent, event.delta)
+                elif isinstance(event, AgentOutput):
+                    spans.llm_finished(event)
+                    if event.response.content:
+                        print("📤 Output:", event.response.content)
+                    if event.tool_calls:
+                        print(
+                            "🛠️  Planning to use tools:",
+                            [call.tool_name for call in event.tool_calls],
+                        )
+                elif isinstance(event, ToolCallResult):
+                    print(f"🔧 Tool Result ({event.tool_name}):")
+                    print(f"  Arguments: {event.tool_kwargs}")
+                    print(f"  Output: {event.tool_output}")
+                elif isinstance(event, ToolCall):
+                    spans.tool_called(event.tool_name)
+                    print(f"🔨 Calling Tool: {event.tool_name}")
+                    # print(f"  With arguments: {event.tool_kwargs}")
+            response = await handler
+        finally:
+            spans.finish()
+
+        metrics = {
             "retrieval_strategy": retrieval_strategy,
-            "desired_lecturers": desired_lecturers,
-            "available_days": available_days,
-            "assessment_type": assessment_type,
-            "oral_assessment": oral_assessment,
-            "project_work": project_work
-        },
-    )
-    handler = agent_workflow.run(
-        user_msg=user_msg,
-    )
-
-    current_agent = None
-    current_tool_calls = ""
-    async for event in handler.stream_events():
-        if (
-                hasattr(event, "current_agent_name")
-                and event.current_agent_name != current_agent
-        ):
-            current_agent = event.current_agent_name
-            print(f"\n{'=' * 50}")
-            print(f"🤖 Agent: {current_agent}")
-            print(f"{'=' * 50}\n")
-
-        if isinstance(event, AgentStream):
-            if event.delta:
-                print(event.delta, end="", flush=True)
-        # elif isinstance(event, AgentInput):
-        # print("📥 Input:", event.input)
-        elif isinstance(event, AgentOutput):
-            if event.response.content:
-                print("📤 Output:", event.response.content)
-            if event.tool_calls:
-                print(
-                    "🛠️  Planning to use tools:",
-                    [call.tool_name for call in event.tool_calls],
-                )
-        elif isinstance(event, ToolCallResult):
-            print(f"🔧 Tool Result ({event.tool_name}):")
-            print(f"  Arguments: {event.tool_kwargs}")
-            print(f"  Output: {event.tool_output}")
-        elif isinstance(event, ToolCall):
-            print(f"🔨 Calling Tool: {event.tool_name}")
-            # print(f"  With arguments: {event.tool_kwargs}")
-    response = await handler
-
-    return response.response.content
+            "time_to_first_token": first_token,
+            "total_time": time.perf_counter() - start,
+        }
+        run_span.set(time_to_first_token=first_token)
+        run_timings.append(metrics)
+        first_token_text = f"{first_token:.2f}s" if first_token is not None else "never"
+        print(f"\n⏱️ First token after {first_token_text}, finished after {metrics['total_time']:.2f}s")
+        reads = read_cache.stats()
+        print(f"🗄️ Supabase reads: {reads['reads']}, round trips: {reads['round_trips']} "
+              f"({reads['saved_round_trips']} saved, {reads['coalesced']} coalesced)")
+        response_cache = get_llm_response_cache()
+        if response_cache is not None:
+            for agent, counts in response_cache.stats()["agents"].items():
+                print(f"🗄️ LLM cache {agent}: {counts['hits']} hits, {counts['misses']} misses ({counts['hit_rate']:.0%})")
+    # Callers stop at the final chunk, so the run span has to be closed before it.
+    yield WorkflowChunk(current_agent, None, response.response.content, metrics)
+
+
+async def execute_agent_workflow(user_msg: str, retrieval_strategy: str):
+    content = None
+    async for chunk in stream_agent_workflow(user_msg, retrieval_strategy):
+        if chunk.metrics is not None:
+            content = chunk.final
+    return content
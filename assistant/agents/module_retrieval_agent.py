@@ -1,193 +1,26 @@
 from llama_index.core.agent.workflow import FunctionAgent
 from llama_index.core.workflow import Context
-from assistant.llm import llm
-from utils.job_ranker import JobRanker
-from utils.neo4j_methods import Neo4jMethods
-from utils.supabase_methods import has_work_experience
-
-
-async def suggest_modules_by_past_occupation(ctx: Context) -> str:
-    """Extract the occupations from a database and suggest modules which develop skills required by those occupations."""
-    try:
-        current_state = await ctx.get("state")
-        modules_data_with_scores = get_modules_scored_by_past_occupation(current_state)
-        current_state["modules_retrieved"] = modules_data_with_scores
-        await ctx.set("state", current_state)
-
-        modules_summary = "\n".join(
-            [
-                f"- Module: {m['module']}\n Occupation: {m['occupation']}\n Occupation Score: {m['occupation_score']:.2f}\n  Supporting Learning Outcomes: {m['supporting_learning_outcomes']}\n  Supported Skills: {m['supported_skills']}"
-                for m in modules_data_with_scores
-            ]
-        )
-        return modules_summary
-
-    except Exception as e:
-        return f"An error occurred: {e}"
-
-
-def get_modules_scored_by_past_occupation(state):
-    weights = {"work_period": 0.5, "recency": 0.3, "job_type": 0.2}
-    max_experience_years = 10
-
-    taken_modules = state["taken_modules"]
-
-    ranker = JobRanker(weights, max_experience_years)
-    ranked_jobs = ranker.get_ranked_jobs()
-
-    occupation_list = [job[0] for job in ranked_jobs]
-    score_lookup = {job[0]: job[1] for job in ranked_jobs}
-
-    neo4j_methods = Neo4jMethods()
-    modules_data = neo4j_methods.get_modules_by_occupation(occupation_list, taken_modules)
-    modules_data_with_scores = [rec.data() for rec in modules_data]
-
-    for item in modules_data_with_scores:
-        occupation = item["occupation"]["occupation"]
-        item["occupation_score"] = score_lookup.get(occupation, 0)
-
-    return sorted(modules_data_with_scores, key=lambda x: x["occupation_score"], reverse=True)
-
-
-async def suggest_modules_by_future_occupation(ctx: Context) -> str:
-    """Suggest modules based only on the user's desired future occupation."""
-    try:
-        current_state = await ctx.get("state")
-        modules_data = get_modules_scored_by_future_occupation(current_state)
-        current_state["modules_retrieved"] = modules_data
-        await ctx.set("state", current_state)
-
-        modules_summary = "\n".join(
-            [
-                f"- Module: {m['module']}\n  Occupation: {m['occupation']}\n  Supporting Learning Outcomes: {m['supporting_learning_outcomes']}\n  Supported Skills: {m['supported_skills']}"
-                for m in modules_data
-            ]
-        )
-        return modules_summary
-    except Exception as e:
-        return f"An error occurred: {e}"
-
-
-def get_modules_scored_by_future_occupation(state):
-    taken_modules = state["taken_modules"]
-    desired_occupations = state["desired_occupations"]
-
-    neo4j_methods = Neo4jMethods()
-    modules_data = neo4j_methods.get_modules_by_occupation(
-        desired_occupations, taken_modules
-    )
-    return [rec.data() for rec in modules_data]
-
-
-async def suggest_modules_by_preferences(ctx: Context) -> str:
-    """Suggest modules based on user preferences using a single optimized query."""
-    try:
-        current_state = await ctx.get("state")
-        modules = get_modules_scored_by_preferences(current_state)
-        current_state["modules_retrieved"] = modules
-        await ctx.set("state", current_state)
-
-        modules_summary = "\n".join(
-            f"- {m['module']['module_title']} (Score: {m['preference_score']})"
-            for m in modules
-        )
-        return modules_summary
-
-    except Exception as e:
-        return f"An error occurred: {e}"
-
-
-def get_modules_scored_by_preferences(state):
-    taken_modules = state["taken_modules"]
-    available_days = state["available_days"]
-    desired_lecturers = state["desired_lecturers"]
-    assessment_type = state["assessment_type"]
-    project_work = state["project_work"]
-    oral_assessment = state["oral_assessment"]
-
-    neo4j_methods = Neo4jMethods()
-    return neo4j_methods.get_modules_by_preferences(
-        taken_modules,
-        available_days,
-        desired_lecturers,
-        assessment_type,
-        project_work,
-        oral_assessment
-    )
-
-
-async def suggest_modules_balanced(ctx: Context) -> str:
-    """Suggest modules based on a balanced mix of past experience, future goals, and user preferences."""
-    current_state = await ctx.get("state")
-
-    try:
-        neo4j_methods = Neo4jMethods()
-        modules = neo4j_methods.get_module_overview()
-
-        # Add scores from past occupations
-        if has_work_experience(): # skip if student does not have work experience
-            past_occupations_scored_modules = get_modules_scored_by_past_occupation(current_state)
-            for m in past_occupations_scored_modules:
-                title = m["module"]["module_title"]
-                score = m["occupation_score"]
-                for module in modules:
-                    if module["module"]["module_title"] == title:
-                        module["score"] += score
-                        break
-
-        # Add scores from future occupations
-        future_occupations_scored_modules = get_modules_scored_by_future_occupation(current_state)
-        for m in future_occupations_scored_modules:
-            title = m["module"]["module_title"]
-            for module in modules:
-                if module["module"]["module_title"] == title:
-                    module["score"] += 1 / 6
-                    break
-
-        # Add scores from preferences
-        preferences_scored_modules = get_modules_scored_by_preferences(current_state)
-        for m in preferences_scored_modules:
-            title = m["module"]["module_title"]
-            pref_score = m["preference_score"]
-            for module in modules:
-                if module["module"]["module_title"] == title:
-                    module["score"] += pref_score / 6
-                    break
-
-        # Sort modules by score
-        modules = sorted(modules, key=lambda x: x["score"], reverse=True)
-
-        # Save result
-        current_state["modules_retrieved"] = modules
-        await ctx.set("state", current_state)
-
-        # Format output
-        modules_summary = "\n".join(
-            f"- {m['module']['module_title']} (Score: {m['score']:.2f})"
-            for m in modules
-        )
-        return modules_summary
-
-    except Exception as e:
-        return f"An error occurred: {e}"
+from assistant.llm import llm_for
+from assistant.retrieval import STRATEGIES, retrieve_modules
+from utils.tracing import traced
 
 
+@traced("tool.dispatch_module_suggestion")
 async def dispatch_module_suggestion(ctx: Context) -> str:
     """
     Dispatch to the correct module suggestion function based on the retrieval strategy in context.
     """
     state = await ctx.get("state")
     strategy = state.get("retrieval_strategy")
-    if strategy == "past_experience":
-        return await suggest_modules_by_past_occupation(ctx)
-    elif strategy == "future_goals":
-        return await suggest_modules_by_future_occupation(ctx)
-    elif strategy == "preferences":
-        return await suggest_modules_by_preferences(ctx)
-    elif strategy == "balanced":
-        return await suggest_modules_balanced(ctx)
-    else:
+    if strategy not in STRATEGIES:
         return f"Unknown retrieval strategy: {strategy}"
+    try:
+        modules, summary = retrieve_modules(state, strategy)
+        state["modules_retrieved"] = modules
+        await ctx.set("state", state)
+        return summary
+    except Exception as e:
+        return f"An error occurred: {e}"
 
 
 module_retrieval_agent = FunctionAgent(
@@ -232,7 +65,7 @@ module_retrieval_agent = FunctionAgent(
 
         """
     ),
-    llm=llm,
+    llm=llm_for("ModuleRetrievalAgent"),
     tools=[dispatch_module_suggestion],
     can_handoff_to=["StudyPlannerAgent"],
 )
@@ -1,6 +1,6 @@
 from llama_index.core.agent.workflow import FunctionAgent
 from llama_index.core.workflow import Context
-from assistant.llm import llm
+from assistant.llm import llm_for
 from utils.neo4j_methods import Neo4jMethods
 
 
@@ -49,7 +49,7 @@ occupation_agent = FunctionAgent(
         Once you have created the summary, use the StudyPlannerAgent to generate a study plan based on the suggested modules.
         """
     ),
-    llm=llm,
+    llm=llm_for("OccupationAgent"),
     tools=[suggest_modules_by_occupation],
     can_handoff_to=["StudyPlannerAgent"],
 )
@@ -1,10 +1,17 @@
+import streamlit as st
 from llama_index.core.agent.workflow import FunctionAgent
 from llama_index.core.workflow import Context
 
-from assistant.llm import llm
+from assistant.llm import llm_for
+from assistant.serialization import render_teaching_sessions
+from utils.catalog import get_catalog
 from utils.neo4j_methods import Neo4jMethods
+from utils.semester_planner import plan_semesters
+from utils.timetable import DEFAULT_LIMIT, conflict_free_timetables, render_timetables, session_groups
+from utils.tracing import traced
 
 
+@traced("tool.extract_teaching_sessions")
 async def extract_teaching_sessions(ctx: Context) -> str:
     """Extract the modules needed in the study plan."""
 
@@ -23,21 +30,61 @@ async def extract_teaching_sessions(ctx: Context) -> str:
         # Update the state with the retrieved data
         current_state["teaching_sessions_modules"] = modules_data
         await ctx.set("state", current_state)
-        # Generate the prompt content
-        prompt = ""
-        for module in modules_data:
-            prompt += f"Module: {module['module_title']} ({module['module_type']})\n"
-            prompt += f"Description: {module['module_description']}\n"
-            prompt += f"Teaching Sessions:\n"
-            for ts in module["teaching_session"]:
-                # Handle teaching session fields with 'N/A'
-                prompt += f"- Year:{ts.get('ay', 'N/A')} Semester:{ts.get('semester', 'N/A')} Group Name: {ts.get('group_name', 'N/A')} Day:{ts.get('day', 'N/A')} Time:{ts.get('time', 'N/A')} Location:{ts.get('location', 'N/A')}\n"
-            prompt += "\n"
-        return prompt
+        return render_teaching_sessions(modules_data)
     except Exception as e:
         return f"An error occurred: {e}"
 
 
+@traced("tool.plan_study_semesters")
+async def plan_study_semesters(ctx: Context) -> str:
+    """Compute the semester-wise study plan that satisfies the graduation rules."""
+
+    current_state = await ctx.get("state")
+    try:
+        plan = plan_semesters(
+            modules_retrieved=current_state["modules_retrieved"],
+            taken_modules=current_state["taken_modules"],
+            expected_semesters=current_state["expected_semesters"],
+            catalog_modules=get_catalog().modules,
+        )
+        current_state["study_plan"] = plan.to_dict()
+        await ctx.set("state", current_state)
+        return plan.to_markdown()
+    except Exception as e:
+        return f"An error occurred: {e}"
+
+
+@traced("tool.extract_weekly_timetables")
+async def extract_weekly_timetables(ctx: Context) -> str:
+    """List every weekly timetable without time overlaps for the first semester of the study plan."""
+
+    current_state = await ctx.get("state")
+    study_plan = current_state.get("study_plan")
+    if not study_plan:
+        return "No study plan yet: call 'plan_study_semesters' first."
+    try:
+        first_semester = next((s for s in study_plan["semesters"] if s["modules"]), None)
+        if first_semester is None:
+            return "The study plan has no modules."
+        catalog = get_catalog()
+        modules = {
+            m["module_title"]: catalog.modules_by_title[m["module_title"]]["teaching_sessions"]
+            for m in first_semester["modules"]
+            if m["module_title"] in catalog.modules_by_title
+        }
+        if not any(session_groups(title, sessions, first_semester["season"]) for title, sessions in modules.items()):
+            return f"No teaching sessions are scheduled for the modules of {first_semester['season']} {first_semester['year']}."
+        timetables = conflict_free_timetables(
+            modules,
+            season=first_semester["season"],
+            limit=int(st.secrets.get("TIMETABLE_LIMIT", DEFAULT_LIMIT)),
+        )
+        return render_timetables(timetables)
+    except Exception as e:
+        return f"An error occurred: {e}"
+
+
+@traced("tool.extract_number_of_semesters")
 async def extract_number_of_semesters(ctx: Context) -> str:
     """Extract the number of semesters needed in the study plan."""
 
@@ -46,6 +93,7 @@ async def extract_number_of_semesters(ctx: Context) -> str:
     return expected_semesters
 
 
+@traced("tool.extract_credits_taken_and_remaining")
 async def extract_credits_taken_and_remaining(ctx: Context) -> dict:
     """Extract the number of credits taken by the student."""
 
@@ -69,58 +117,24 @@ First of all, you must execute step1. After that, you can proceed to step2.
 
 **Step 1**: Generate the semester-wise study plan.
 
-- The list of modules available for planning is already in your context under the key 'modules_retrieved'.    
-- Use the tools provided to retrieve the following additional information:  
-  1. The tool 'extract_number_of_semesters' to extract total number of semesters required for the study plan.  
-  2. The tool 'extract_credits_taken_and_remaining' to extract credits already completed and the credits remaining.
-  3. The tool 'extract_teaching_sessions' to extract module teaching sessions and description about modules.
-- Note: The **Master Thesis** and **Master Thesis Proposal** modules do **not** have scheduled teaching sessions and can be started in **any semester**, as long as the prescribed sequence and graduation rules are respected.
+- Call the tool 'plan_study_semesters' first. It computes the plan from 'modules_retrieved', the taken modules, the number of semesters and the seasonal availability of every module, and already enforces all the rules listed below.
+- **Present exactly the plan returned by the tool.** Do not add, remove or reorder modules, and do not move modules between semesters.
+- Your only additions are a brief description of each module, which you can take from the tool 'extract_teaching_sessions', and the Additional Notes the tool returns.
 
-The modules have already been ranked by importance based on the selected retrieval strategy (e.g., past experience, future goals, or user preferences).  
-**Always prioritize modules in the exact order they are received — earlier modules are more important.** Do not reorder them or deprioritize any unless needed for constraint satisfaction.
-
-
-Follow these rules:
+For reference when describing the plan, it follows these rules:
 
 1.  **Graduation Credit Requirement**:
-    *   The student must complete exactly **90 credits**, divided as:
-        *   **60 credits** from the Main Study Plan.
-        *   **30 credits** from thesis-related modules:
-            *   Research Methods in Information Systems (6 credits),
-            *   Master Thesis Proposal (6 credits),
-            *   Master Thesis (18 credits).
+    *   The student must complete exactly **90 credits**: **60 credits** from the Main Study Plan and **30 credits** from Research Methods in Information Systems (6), Master Thesis Proposal (6) and Master Thesis (18).
 
 2.  **Module Distribution**:
-    *   Schedule all **Main Study Plan modules before any thesis-related modules**.
-    *   The order of thesis-related modules must always be:
-        1.  **Research Methods in Information Systems**,
-        2.  **Master Thesis Proposal**,
-        3.  **Master Thesis**.
-    *   Ensure that **no Main Study Plan module is scheduled after thesis-related modules**.
-    *   Assign **one module per semester**, unless all available semesters are already filled.
-    *   Distribute modules evenly to minimize empty semesters.
-    *   Place empty semesters only at the **end of the plan** and allow them as buffer time for the thesis.
+    *   All Main Study Plan modules come before the thesis-related modules, which follow the order **Research Methods → Master Thesis Proposal → Master Thesis** in the last semesters of the plan.
+    *   Modules are spread as evenly as possible; empty semesters only appear at the end, as buffer time for the thesis.
 
 3.  **Module Priorities**:
-    *Thesis-related modules, along with the following modules, are mandatory (if not already completed):
-        *   Alignment of Business and IT,
-        *   Business Intelligence,
-        *   Business Process Management,
-        *   Strategic Business Innovation.
-    *   All other modules are elective and can be used to complete the remaining credits in the Main Study Plan.
-    *   Each module is worth **6 credits** and must respect its seasonal availability (Spring or Autumn).
-
-4.  **Thesis-Related Modules**:
-    *   Schedule **Research Methods**, **Master Thesis Proposal**, and **Master Thesis** in the last two or three semesters.
-    *   Always maintain the sequence: **Research Methods → Master Thesis Proposal → Master Thesis**.
-    *   The Master Thesis must be treated as a single **18-credit module**.
-
-5.  **Validation**:
-    *   After scheduling, **validate that Main Study Plan modules are completed before thesis-related modules**.
-    *   Ensure that the thesis-related modules follow the correct order.
-    *   If any module violates these rules, rearrange the schedule to comply.
-
-6.  **Response Format**:
+    *   Mandatory modules not yet completed are always included; electives complete the Main Study Plan in the ranked order of 'modules_retrieved', earlier modules as early as possible.
+    *   Each module is only scheduled in a season (Spring or Autumn) in which it is taught.
+
+4.  **Response Format**:
     Provide the study plan first, followed by additional notes and omit Important Notes.
 
     ### Semester-Wise Study Plan for [Number of Semesters]:
@@ -145,16 +159,10 @@ When you have the semester-wise study plan, proceed to the next step.
 
 **Step 2**: Generate a weekly study schedule.
 
-Given the semester-wise study plan generated in Step 1, create a week plan *only* for the upcoming semester (the first one). Assume you have access to the specific teaching session data (module name, day, time, location) for the modules planned in that first semester.
+Given the semester-wise study plan generated in Step 1, create a week plan *only* for the upcoming semester (the first one).
 
-**Study Weekly Scheduling Guidelines:**
-- The weekly study schedule must align with the first semester of the study plan from Step 1.
-- Assign study sessions based *only* on available teaching sessions provided in the input data.
-- Display the schedule in a structured week format.
-
-**Constraints:**
-- Only include the pre-defined teaching sessions from the input data. Do not add extra study blocks or infer additional activities.
-- The schedule must strictly follow the week, day, and time information provided for each session.
+- Call the tool 'extract_weekly_timetables'. It reads the teaching sessions of the modules in the first semester of the plan and returns every combination of teaching groups without time overlaps, already in the output format below.
+- **Present the timetables exactly as returned by the tool.** Do not add, drop, merge or change sessions, and do not compute combinations yourself.
 
 **Output Rules:**
 - Your response **must start directly** with the semester-wise study plan.
@@ -169,10 +177,7 @@ Given the semester-wise study plan generated in Step 1, create a week plan *only
 - 📌 [Module Name]: [Day] at [Time] in [Location] ([Group Name])
 - 📌 [Module Name]: [Day] at [Time] in [Location] ([Group Name])
 ```
-*   *(Repeat the line `- 📌 [Module Name]: [Day] at [Time] in [Location]` for each teaching session in the first semester).*
-
-**Handling Multiple Sessions per Module:**
-- If at least one module planned for the upcoming (first) semester has more than one teaching session associated with it, propose *every possible combination* of teaching sessions for that semester *without creating time overlaps* between different modules' sessions. Each valid combination should be presented as a separate weekly schedule following the specified output format. Do this combination analysis *only* for the modules planned for the upcoming semester.
+*   *(One schedule per conflict-free combination of teaching groups, as returned by 'extract_weekly_timetables').*
 
 ### Important Notes:
 - Ensure Main Study Plan modules are completed before thesis-related modules (in the overall study plan).
@@ -186,8 +191,10 @@ Given the semester-wise study plan generated in Step 1, create a week plan *only
 - Ensure that the weekly study scheduling (Step 2) is generated only after the study plan (Step 1).
     """
     ),
-    llm=llm,
+    llm=llm_for("StudyPlannerAgent"),
     tools=[
+        plan_study_semesters,
+        extract_weekly_timetables,
         extract_teaching_sessions,
         extract_number_of_semesters,
         extract_credits_taken_and_remaining,
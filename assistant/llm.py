@@ -1,13 +1,29 @@
 import streamlit as st
 from llama_index.llms.anthropic import Anthropic
 
-llm = Anthropic(
+from assistant.llm_cache import CachedAnthropic, get_llm_response_cache
+
+LLM_SETTINGS = dict(
     model="claude-3-7-sonnet-20250219",
     api_key=st.secrets["ANTHROPIC_KEY"],
     temperature=0,
     max_tokens=64000,
 )
 
+llm = Anthropic(**LLM_SETTINGS)
+
+
+def llm_for(agent):
+    """
+    The LLM for an agent: answers are cached on disk unless the agent is listed
+    in the LLM_CACHE_OPT_OUT secret or LLM_CACHE_PATH is set to "".
+    """
+    response_cache = get_llm_response_cache()
+    if response_cache is None or agent in st.secrets.get("LLM_CACHE_OPT_OUT", []):
+        return llm
+    return CachedAnthropic(response_cache, agent=agent, **LLM_SETTINGS)
+
+
 # TODO: Migrate emebedding implementation to llama-index
 from langchain_ollama import OllamaEmbeddings
 
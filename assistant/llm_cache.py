@@ -0,0 +1,184 @@
+import argparse
+import hashlib
+import json
+import threading
+from collections import defaultdict
+
+from llama_index.core.base.llms.types import ChatResponse
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.llms.anthropic import Anthropic
+
+from utils.disk_cache import DiskCache
+
+DEFAULT_CACHE_PATH = ".cache/llm_responses.sqlite"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def response_key(model, settings, messages, kwargs):
+    """
+    Hash of everything a response depends on. The system prompt is the first
+    of the messages, and the tool definitions and tool choice arrive in kwargs.
+    """
+    payload = json.dumps(
+        {
+            "model": model,
+            "settings": settings,
+            "messages": [message.model_dump(mode="json") for message in messages],
+            "kwargs": kwargs,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """Chat responses in a size-bounded DiskCache, with hit counts per agent."""
+
+    def __init__(self, disk):
+        self.disk = disk
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def get(self, key, agent=None):
+        response = self.disk.get(key)
+        with self._lock:
+            if response is None:
+                self.misses[agent] += 1
+            else:
+                self.hits[agent] += 1
+        return response
+
+    def set(self, key, response):
+        # Only the message is kept: the raw provider response is not needed to
+        # replay it and its token usage was not spent again.
+        self.disk.set(key, ChatResponse(message=response.message, additional_kwargs=response.additional_kwargs))
+
+    def stats(self):
+        with self._lock:
+            agents = {}
+            for agent in sorted(set(self.hits) | set(self.misses), key=str):
+                lookups = self.hits[agent] + self.misses[agent]
+                agents[agent] = {
+                    "hits": self.hits[agent],
+                    "misses": self.misses[agent],
+                    "hit_rate": self.hits[agent] / lookups if lookups else 0.0,
+                }
+        return {"agents": agents, **self.disk.stats()}
+
+
+def _replay(response):
+    """A cached response as a fresh object, with its whole text as the one delta."""
+    message = response.message.model_copy(deep=True)
+    return ChatResponse(
+        message=message,
+        delta=message.content or "",
+        additional_kwargs={**response.additional_kwargs, "cache_hit": True},
+    )
+
+
+class CachedAnthropic(Anthropic):
+    """
+    Anthropic client that answers repeated requests from an LLMResponseCache.
+
+    Responses with tool calls are cached like any other: replaying one gives
+    the same tool call ids, so the rest of a rerun keeps hitting the cache as
+    long as the tools return the same results. Streams are only stored once
+    they were read to the end.
+    """
+
+    _response_cache: LLMResponseCache = PrivateAttr()
+    _agent: str = PrivateAttr(default=None)
+
+    def __init__(self, response_cache, agent=None, **kwargs):
+        super().__init__(**kwargs)
+        self._response_cache = response_cache
+        self._agent = agent
+
+    def _key(self, messages, kwargs):
+        settings = {"temperature": self.temperature, "max_tokens": self.max_tokens}
+        return response_key(self.model, settings, messages, kwargs)
+
+    def chat(self, messages, **kwargs):
+        key = self._key(messages, kwargs)
+        cached = self._response_cache.get(key, self._agent)
+        if cached is not None:
+            return _replay(cached)
+        response = super().chat(messages, **kwargs)
+        self._response_cache.set(key, response)
+        return response
+
+    async def achat(self, messages, **kwargs):
+        key = self._key(messages, kwargs)
+        cached = self._response_cache.get(key, self._agent)
+        if cached is not None:
+            return _replay(cached)
+        response = await super().achat(messages, **kwargs)
+        self._response_cache.set(key, response)
+        return response
+
+    def stream_chat(self, messages, **kwargs):
+        key = self._key(messages, kwargs)
+        cached = self._response_cache.get(key, self._agent)
+        if cached is not None:
+            return iter([_replay(cached)])
+        return self._record(key, super().stream_chat(messages, **kwargs))
+
+    async def astream_chat(self, messages, **kwargs):
+        key = self._key(messages, kwargs)
+        cached = self._response_cache.get(key, self._agent)
+        if cached is not None:
+            return self._replay_async(cached)
+        return self._record_async(key, await super().astream_chat(messages, **kwargs))
+
+    def _record(self, key, stream):
+        last = None
+        for last in stream:
+            yield last
+        if last is not None:
+            self._response_cache.set(key, last)
+
+    async def _record_async(self, key, stream):
+        last = None
+        async for last in stream:
+            yield last
+        if last is not None:
+            self._response_cache.set(key, last)
+
+    @staticmethod
+    async def _replay_async(response):
+        yield _replay(response)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_response_cache(path=None, max_bytes=None):
+    """Process-wide cache at LLM_CACHE_PATH, bounded by LLM_CACHE_MAX_BYTES; None when the path is empty."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                if path is None or max_bytes is None:
+                    import streamlit as st
+
+                    path = st.secrets.get("LLM_CACHE_PATH", DEFAULT_CACHE_PATH) if path is None else path
+                    max_bytes = st.secrets.get("LLM_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES) if max_bytes is None else max_bytes
+                if not path:
+                    return None
+                _cache = LLMResponseCache(DiskCache(path, max_bytes=int(max_bytes)))
+    return _cache
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show the size of the LLM response cache, or clear it.")
+    parser.add_argument("--path", default=DEFAULT_CACHE_PATH)
+    parser.add_argument("--clear", action="store_true", help="drop every cached response")
+    args = parser.parse_args()
+    disk = DiskCache(args.path)
+    if args.clear:
+        disk.clear()
+    stats = disk.stats()
+    print(f"{stats['entries']} cached responses, {stats['bytes'] / 1024 / 1024:.1f} MiB in {args.path}")
@@ -0,0 +1,211 @@
+import copy
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from assistant.serialization import (
+    SUMMARY_FORMAT_VERSION,
+    get_token_budget,
+    render_occupation_modules,
+    render_scored_modules,
+)
+from utils.catalog import get_catalog
+from utils.job_ranker import JobRanker
+from utils.neo4j_methods import Neo4jMethods
+from utils.retrieval_cache import get_retrieval_cache, retrieval_key
+from utils.tracing import in_current_trace, span
+
+# The retrieval strategies without the agent around them. Importing this
+# needs no LLM, embeddings or Supabase session, so benchmarks can use it;
+# only retrieve_modules, and the past occupation retrieval when no work
+# experience is given, read the current user from Supabase.
+
+# How much each retrieval adds to a module's balanced score: the occupation
+# score of each past occupation it supports, a flat amount for each desired
+# occupation it supports, and its preference score. Override any of them with
+# the BALANCED_WEIGHTS secret table.
+BALANCED_WEIGHTS = {"past_occupation": 1.0, "future_occupation": 1 / 6, "preferences": 1 / 6}
+
+# State keys the retrievals read; together with the work experience, the
+# graph version and retrieval_settings() they fully determine the result.
+PROFILE_KEYS = (
+    "taken_modules",
+    "desired_occupations",
+    "desired_lecturers",
+    "available_days",
+    "assessment_type",
+    "oral_assessment",
+    "project_work",
+)
+
+
+def get_modules_scored_by_past_occupation(state, work_experience=None):
+    weights = {"work_period": 0.5, "recency": 0.3, "job_type": 0.2}
+    max_experience_years = 10
+
+    taken_modules = state["taken_modules"]
+
+    ranker = JobRanker(weights, max_experience_years)
+    ranked_jobs = ranker.get_ranked_jobs(work_experience)
+
+    occupation_list = [job[0] for job in ranked_jobs]
+    score_lookup = {job[0]: job[1] for job in ranked_jobs}
+
+    neo4j_methods = Neo4jMethods()
+    modules_data_with_scores = neo4j_methods.get_modules_by_occupation(occupation_list, taken_modules)
+
+    for item in modules_data_with_scores:
+        occupation = item["occupation"]["occupation"]
+        item["occupation_score"] = score_lookup.get(occupation, 0)
+
+    return sorted(modules_data_with_scores, key=lambda x: x["occupation_score"], reverse=True)
+
+
+def get_modules_scored_by_future_occupation(state):
+    taken_modules = state["taken_modules"]
+    desired_occupations = state["desired_occupations"]
+
+    neo4j_methods = Neo4jMethods()
+    return neo4j_methods.get_modules_by_occupation(
+        desired_occupations, taken_modules
+    )
+
+
+def get_modules_scored_by_preferences(state):
+    taken_modules = state["taken_modules"]
+    available_days = state["available_days"]
+    desired_lecturers = state["desired_lecturers"]
+    assessment_type = state["assessment_type"]
+    project_work = state["project_work"]
+    oral_assessment = state["oral_assessment"]
+
+    neo4j_methods = Neo4jMethods()
+    return neo4j_methods.get_modules_by_preferences(
+        taken_modules=taken_modules,
+        desired_lecturers=desired_lecturers,
+        available_days=available_days,
+        assessment_type=assessment_type,
+        project_work=project_work,
+        oral_assessment=oral_assessment
+    )
+
+
+def get_balanced_weights():
+    return {**BALANCED_WEIGHTS, **st.secrets.get("BALANCED_WEIGHTS", {})}
+
+
+def _modules_scored_by_past_occupation_if_any(state, work_experience=None):
+    if work_experience is None:
+        from utils.supabase_methods import get_work_experience
+
+        work_experience = get_work_experience()
+    if not work_experience:  # skip if student does not have work experience
+        return []
+    return get_modules_scored_by_past_occupation(state, work_experience)
+
+
+def balance_modules(past, future, preferences, weights):
+    """Every module with its balanced score from the three retrievals' results, highest first."""
+    modules = Neo4jMethods().get_module_overview()
+    by_title = {module["module"]["module_title"]: module for module in modules}
+
+    def add(title, score):
+        module = by_title.get(title)
+        if module is not None:
+            module["score"] += score
+
+    for m in past:
+        add(m["module"]["module_title"], weights["past_occupation"] * m["occupation_score"])
+    for m in future:
+        add(m["module"]["module_title"], weights["future_occupation"])
+    for m in preferences:
+        add(m["module"]["module_title"], weights["preferences"] * m["preference_score"])
+
+    # Sort modules by score
+    return sorted(modules, key=lambda x: x["score"], reverse=True)
+
+
+def get_modules_scored_balanced(state, weights=None, work_experience=None):
+    weights = weights or get_balanced_weights()
+
+    # The three retrievals are independent, so they run side by side.
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        past = executor.submit(in_current_trace(_modules_scored_by_past_occupation_if_any), state, work_experience)
+        future = executor.submit(in_current_trace(get_modules_scored_by_future_occupation), state)
+        preferences = executor.submit(in_current_trace(get_modules_scored_by_preferences), state)
+
+    return balance_modules(past.result(), future.result(), preferences.result(), weights)
+
+
+# Each strategy maps (state, work experience) to (modules, summary for the LLM).
+
+def retrieve_by_past_occupation(state, work_experience):
+    modules = get_modules_scored_by_past_occupation(state, work_experience)
+    return modules, render_occupation_modules(modules, score_key="occupation_score")
+
+
+def retrieve_by_future_occupation(state, work_experience):
+    modules = get_modules_scored_by_future_occupation(state)
+    return modules, render_occupation_modules(modules)
+
+
+def retrieve_by_preferences(state, work_experience):
+    modules = get_modules_scored_by_preferences(state)
+    return modules, render_scored_modules(modules, "preference_score")
+
+
+def retrieve_balanced(state, work_experience):
+    # Built from the other strategies' results in the retrieval cache, so a
+    # prefetch running all four strategies retrieves each list only once.
+    strategies = ["future_goals", "preferences"] + (["past_experience"] if work_experience else [])
+    with ThreadPoolExecutor(max_workers=len(strategies)) as executor:
+        results = {strategy: executor.submit(in_current_trace(retrieve_modules), state, strategy, work_experience)
+                   for strategy in strategies}
+    past = results["past_experience"].result()[0] if "past_experience" in results else []
+    modules = balance_modules(past, results["future_goals"].result()[0], results["preferences"].result()[0],
+                              get_balanced_weights())
+    return modules, render_scored_modules(modules, "score")
+
+
+STRATEGIES = {
+    "past_experience": retrieve_by_past_occupation,
+    "future_goals": retrieve_by_future_occupation,
+    "preferences": retrieve_by_preferences,
+    "balanced": retrieve_balanced,
+}
+
+
+def retrieval_settings():
+    """Configuration the retrieved modules and their summary depend on, besides the profile and the graph."""
+    return {
+        "graph_backend": st.secrets.get("GRAPH_BACKEND", "neo4j"),
+        "retrieval_backend": st.secrets.get("RETRIEVAL_BACKEND", "neo4j"),
+        "occupation_matching": st.secrets.get("OCCUPATION_MATCHING", "materialized"),
+        "balanced_weights": get_balanced_weights(),
+        "token_budget": get_token_budget(),
+        "summary_format": SUMMARY_FORMAT_VERSION,
+    }
+
+
+def retrieve_modules(state, strategy, work_experience=None):
+    """
+    Return (modules, summary) for a strategy, from the retrieval cache when the
+    profile, work experience, graph version and settings are unchanged.
+    """
+    from utils.supabase_methods import get_work_experience, user
+
+    if work_experience is None:
+        work_experience = get_work_experience()
+    profile = {key: state.get(key) for key in PROFILE_KEYS}
+    key = retrieval_key(user.id, profile, work_experience, strategy, get_catalog().version, retrieval_settings())
+    with span("retrieval", strategy=strategy) as s:
+        computed = []
+
+        def compute():
+            computed.append(True)
+            return STRATEGIES[strategy](state, work_experience)
+
+        modules, summary = get_retrieval_cache().get_or_compute(key, compute)
+        s.set(cache_hit=not computed, modules=len(modules), summary_chars=len(summary))
+    # Callers keep the list in their state and may change it.
+    return copy.deepcopy(modules), summary
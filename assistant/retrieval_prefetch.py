@@ -0,0 +1,30 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from assistant.retrieval import STRATEGIES, retrieve_modules
+from utils.tracing import in_current_trace
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="retrieval-prefetch")
+
+
+def _report_failure(strategy):
+    def callback(future):
+        if future.exception() is not None:
+            print(f"Prefetching {strategy} modules failed: {future.exception()}")
+    return callback
+
+
+def prefetch_retrievals(state, work_experience):
+    """
+    Start the module retrieval of every strategy in the background.
+
+    Results land in the retrieval cache, where dispatch_module_suggestion
+    picks them up, or waits for the one still running, once the workflow
+    reaches it. The past experience strategy is skipped without work experience.
+    """
+    futures = {}
+    for strategy in STRATEGIES:
+        if strategy == "past_experience" and not work_experience:
+            continue
+        futures[strategy] = _executor.submit(in_current_trace(retrieve_modules), state, strategy, work_experience)
+        futures[strategy].add_done_callback(_report_failure(strategy))
+    return futures
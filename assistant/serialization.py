@@ -0,0 +1,241 @@
+import math
+
+from utils.tracing import current_span
+
+# Upper bound, in estimated tokens, for one tool result. Override it with the
+# TOOL_TOKEN_BUDGET secret.
+DEFAULT_TOKEN_BUDGET = 4000
+
+# Part of the retrieval cache key; bump it whenever a summary's text changes.
+SUMMARY_FORMAT_VERSION = 2
+
+# Characters kept from the longest free-text cells (skill and module
+# descriptions, learning outcomes), tried in turn until a result fits.
+DETAIL_LEVELS = (400, 200, 100, 50, 0)
+
+
+def estimate_tokens(text):
+    """About four characters per token for English text; close enough for budgeting."""
+    return math.ceil(len(text) / 4)
+
+
+def get_token_budget():
+    import streamlit as st
+
+    return int(st.secrets.get("TOOL_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET))
+
+
+def truncate(text, limit):
+    """Cut text to at most limit characters at a word boundary, marking the cut with an ellipsis."""
+    text = " ".join(str(text or "").split())
+    if len(text) <= limit:
+        return text
+    if limit <= 1:
+        return ""
+    cut = text[:limit - 1].rsplit(" ", 1)[0] if " " in text[:limit - 1] else text[:limit - 1]
+    return cut.rstrip(" ,;.") + "…"
+
+
+def rank_limit(rank, count, limit):
+    """Characters for the row at rank (0 first): the top row gets limit, the last one a quarter of it."""
+    return int(limit * (1 - 0.75 * rank / max(count - 1, 1)))
+
+
+def table(title, columns, rows):
+    """A pipe-separated table under a header line; a "|" inside a cell becomes "/"."""
+    lines = [f"{title} ({' | '.join(columns)})"]
+    lines += [" | ".join(str(cell).replace("|", "/") for cell in row) for row in rows]
+    return "\n".join(lines)
+
+
+def fit_to_budget(render, row_count, budget, drop_rows=True):
+    """
+    Render with the most detail that fits the budget, then, if even the
+    shortest form is too long, with fewer rows, lowest ranked first dropped.
+    render(detail, rows) gets a DETAIL_LEVELS entry and the number of rows to keep.
+    With drop_rows=False every row is kept and the shortest form is returned
+    even when it is over budget.
+    """
+    for detail in DETAIL_LEVELS:
+        text = render(detail, row_count)
+        if estimate_tokens(text) <= budget:
+            return text
+    if not drop_rows:
+        return text
+    low, high = 0, row_count
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(render(0, middle)) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    text = render(0, low)
+    if low < row_count:
+        text += f"\n({row_count - low} lower ranked modules omitted)"
+    return text
+
+
+def log_savings(name, verbose, compact):
+    """Report the estimated tokens saved against the verbose rendering, on stdout and the current span."""
+    verbose_tokens, compact_tokens = estimate_tokens(verbose), estimate_tokens(compact)
+    print(f"📦 {name}: ~{compact_tokens} tokens instead of ~{verbose_tokens} (saved ~{verbose_tokens - compact_tokens})")
+    s = current_span()
+    if s is not None:
+        s.set(tokens_estimated=compact_tokens, tokens_saved=verbose_tokens - compact_tokens)
+
+
+def _compact(name, previous, render, row_count, budget, drop_rows=True):
+    """previous is the text the tool returned before these renderers, to report the savings against."""
+    budget = budget or get_token_budget()
+    text = fit_to_budget(render, row_count, budget, drop_rows)
+    log_savings(name, previous, text)
+    return text
+
+
+# The texts the tools returned before, only used to report the savings.
+
+def _previous_occupation_text(modules, score_key):
+    if score_key:
+        return "\n".join(
+            f"- Module: {m['module']}\n Occupation: {m['occupation']}\n Occupation Score: {m[score_key]:.2f}\n"
+            f"  Supporting Learning Outcomes: {m['supporting_learning_outcomes']}\n"
+            f"  Supported Skills: {m['supported_skills']}"
+            for m in modules
+        )
+    return "\n".join(
+        f"- Module: {m['module']}\n  Occupation: {m['occupation']}\n"
+        f"  Supporting Learning Outcomes: {m['supporting_learning_outcomes']}\n"
+        f"  Supported Skills: {m['supported_skills']}"
+        for m in modules
+    )
+
+
+def _previous_scored_text(modules, score_key):
+    if score_key == "preference_score":
+        return "\n".join(f"- {m['module']['module_title']} (Score: {m[score_key]})" for m in modules)
+    return "\n".join(f"- {m['module']['module_title']} (Score: {m[score_key]:.2f})" for m in modules)
+
+
+def _previous_teaching_sessions_text(modules):
+    text = ""
+    for module in modules:
+        text += f"Module: {module['module_title']} ({module['module_type']})\n"
+        text += f"Description: {module['module_description']}\n"
+        text += "Teaching Sessions:\n"
+        for ts in module["teaching_session"]:
+            text += (f"- Year:{ts.get('ay', 'N/A')} Semester:{ts.get('semester', 'N/A')} "
+                     f"Group Name: {ts.get('group_name', 'N/A')} Day:{ts.get('day', 'N/A')} "
+                     f"Time:{ts.get('time', 'N/A')} Location:{ts.get('location', 'N/A')}\n")
+        text += "\n"
+    return text
+
+
+def render_occupation_modules(modules, score_key=None, budget=None):
+    """
+    Modules supporting occupations, one row per module in rank order. Each
+    occupation and skill is described once, in its own table, and referred to
+    from the module rows by id.
+
+    Args:
+        modules (list): (module, occupation) records as returned by get_modules_by_occupation.
+        score_key (str): Record key of a score to show next to each occupation, e.g. "occupation_score".
+        budget (int): Token budget; TOOL_TOKEN_BUDGET by default.
+    """
+    rows, occupations, skills = {}, {}, {}
+    for record in modules:
+        title = record["module"]["module_title"]
+        row = rows.setdefault(title, {"type": record["module"].get("module_type"), "occupations": {},
+                                      "skills": [], "outcomes": []})
+        occupation = record["occupation"]
+        occupation_id = occupations.setdefault(occupation["occupation"], (f"O{len(occupations) + 1}", occupation))[0]
+        score = record.get(score_key) if score_key else None
+        row["occupations"].setdefault(occupation_id, score)
+        for skill in record["supported_skills"]:
+            skill_id = skills.setdefault(skill["title"], (f"S{len(skills) + 1}", skill))[0]
+            if skill_id not in row["skills"]:
+                row["skills"].append(skill_id)
+        for outcome in record["supporting_learning_outcomes"]:
+            if outcome not in row["outcomes"]:
+                row["outcomes"].append(outcome)
+    titles = list(rows)
+
+    def render(detail, kept):
+        used_occupations, used_skills, module_rows = set(), set(), []
+        for rank, title in enumerate(titles[:kept]):
+            row = rows[title]
+            used_occupations.update(row["occupations"])
+            used_skills.update(row["skills"])
+            module_rows.append((
+                rank + 1,
+                title,
+                row["type"],
+                ", ".join(f"{o} {s:.2f}" if s is not None else o for o, s in row["occupations"].items()),
+                ", ".join(row["skills"]),
+                truncate("; ".join(row["outcomes"]), rank_limit(rank, len(titles), detail)),
+            ))
+        parts = [table("Modules", ("rank", "module", "type", "occupations", "skills", "learning outcomes"),
+                       module_rows)]
+        parts.append(table("Occupations", ("id", "occupation", "description"), [
+            (o_id, name, truncate(o.get("description"), detail))
+            for name, (o_id, o) in occupations.items() if o_id in used_occupations
+        ]))
+        parts.append(table("Skills", ("id", "skill", "description"), [
+            (s_id, name, truncate(s.get("description"), rank_limit(rank, len(skills), detail)))
+            for rank, (name, (s_id, s)) in enumerate(skills.items()) if s_id in used_skills
+        ]))
+        return "\n\n".join(parts)
+
+    return _compact("modules by occupation", _previous_occupation_text(modules, score_key), render, len(titles),
+                    budget)
+
+
+def render_scored_modules(modules, score_key, budget=None):
+    """Modules with one score each, deduplicated by title and kept in the given rank order."""
+    rows = {}
+    for record in modules:
+        rows.setdefault(record["module"]["module_title"], (record["module"].get("module_type"), record[score_key]))
+    titles = list(rows)
+
+    def render(detail, kept):
+        return table("Modules", ("rank", "module", "type", "score"), [
+            (rank + 1, title, rows[title][0], f"{rows[title][1]:.2f}") for rank, title in enumerate(titles[:kept])
+        ])
+
+    return _compact(f"modules by {score_key}", _previous_scored_text(modules, score_key), render, len(titles),
+                    budget)
+
+
+def render_teaching_sessions(modules, budget=None):
+    """
+    Modules with their description, truncated more for later modules, and a
+    table of their distinct teaching sessions. The academic year is given
+    once when every session shares it. Modules are never left out, even
+    when the result is over budget.
+    """
+    sessions = {}
+    for module in modules:
+        distinct = {tuple((ts.get(key) or "N/A") for key in ("ay", "semester", "group_name", "day", "time", "location"))
+                    for ts in module["teaching_session"]}
+        sessions[module["module_title"]] = sorted(distinct)
+    years = {session[0] for rows in sessions.values() for session in rows}
+    shared_year = years.pop() if len(years) == 1 else None
+
+    def render(detail, kept):
+        kept_modules = modules[:kept]
+        parts = [table("Modules", ("id", "module", "type", "description"), [
+            (f"M{rank + 1}", m["module_title"], m["module_type"],
+             truncate(m["module_description"], rank_limit(rank, len(modules), detail)))
+            for rank, m in enumerate(kept_modules)
+        ])]
+        columns = ("module", "semester", "group", "day", "time", "location")
+        session_rows = [
+            (f"M{rank + 1}", *(session[1:] if shared_year else session))
+            for rank, m in enumerate(kept_modules) for session in sessions[m["module_title"]]
+        ]
+        title = f"Teaching sessions {shared_year}" if shared_year else "Teaching sessions"
+        parts.append(table(title, columns if shared_year else ("module", "year") + columns[1:], session_rows))
+        return "\n\n".join(parts)
+
+    # The planner needs every module, so only the descriptions are shortened.
+    return _compact("teaching sessions", _previous_teaching_sessions_text(modules), render, len(modules), budget,
+                    drop_rows=False)
@@ -0,0 +1,264 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from assistant.retrieval import (
+    BALANCED_WEIGHTS,
+    get_modules_scored_balanced,
+    get_modules_scored_by_future_occupation,
+    get_modules_scored_by_past_occupation,
+    get_modules_scored_by_preferences,
+)
+from esco import graph
+from utils.catalog import get_catalog
+from utils.graph_backend import use_graph_backend
+from utils.memory_graph import InMemoryGraph
+from utils.neo4j_driver import get_driver
+from utils.neo4j_methods import Neo4jMethods
+from utils.tracing import percentile
+
+DAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday")
+ASSESSMENT_TYPES = ("individual", "group", "individual_and_group", None)
+RESULTS_DIRECTORY = ".cache/benchmarks"
+
+# esco/csv has no occupations.csv; without it the fixture gets synthetic
+# occupations, each requiring a random set of the skills the modules teach.
+FIXTURE_OCCUPATIONS = 60
+
+# The materialized matches normally come from comparing embeddings (see
+# utils/skill_matching.py). The fixture uses the skills each learning outcome
+# promotes in the CSVs instead, so it needs neither Ollama nor a vector index.
+FIXTURE_MATCHES_QUERY = """
+    MATCH (lo:LearningOutcome)-[:has_skill]->(s:Skill)
+    MERGE (s)-[r:matches_learning_outcome]->(lo)
+    SET r.score = 1.0
+"""
+
+FIXTURE_INDEXES = [
+    "CREATE FULLTEXT INDEX occupations IF NOT EXISTS FOR (n:Occupation) ON EACH [n.occupation]",
+]
+
+
+def synthetic_occupations(count, seed=0):
+    """Occupation rows and occupation -> skill links in the shape esco.graph loads them."""
+    rng = random.Random(seed)
+    outcomes = pd.read_csv(graph.LEARNING_OUTCOMES_CSV)
+    taught = sorted({uri for column in ("Promoted skill", "Promoted knowledge")
+                     for value in outcomes[column].dropna() for uri in graph.split_uris(value)})
+    occupations, links = [], []
+    for i in range(count):
+        uri = f"urn:fixture:occupation:{i}"
+        occupations.append({"occupation": f"fixture occupation {i}", "uri": uri,
+                            "description": f"Synthetic occupation {i} of the benchmark fixture."})
+        for skill_uri in rng.sample(taught, min(len(taught), rng.randint(10, 40))):
+            links.append({"occupation_uri": uri, "skill_uri": skill_uri,
+                          "relation_type": rng.choice(["essential", "optional"])})
+    return occupations, links
+
+
+def load_memory_fixture(occupation_count=FIXTURE_OCCUPATIONS, seed=0):
+    """Use an InMemoryGraph of esco/csv as the graph backend, with the same occupations load_fixture uses."""
+    kwargs = {}
+    if not os.path.exists(graph.OCCUPATIONS_CSV):
+        occupations, links = synthetic_occupations(occupation_count, seed)
+        kwargs = {"occupations": occupations, "occupation_skills": links}
+    use_graph_backend(InMemoryGraph.load(**kwargs))
+
+
+def load_fixture(occupation_count=FIXTURE_OCCUPATIONS, seed=0):
+    """Load esco/csv into the Neo4j configured in the secrets, ready for every benchmarked query."""
+    driver = get_driver()
+    kwargs = {}
+    if not os.path.exists(graph.OCCUPATIONS_CSV):
+        occupations, links = synthetic_occupations(occupation_count, seed)
+        kwargs = {"occupations": lambda: graph.rebatch(occupations, graph.DEFAULT_BATCH_SIZE),
+                  "occupation_skills": lambda: graph.rebatch(links, graph.DEFAULT_BATCH_SIZE)}
+    graph.load_graph(driver, **kwargs)
+    graph.update_modules_with_assessment_info(driver)
+    for statement in FIXTURE_INDEXES + [FIXTURE_MATCHES_QUERY]:
+        driver.execute_query(statement, database_=graph.DATABASE)
+    driver.execute_query(graph.BUMP_GRAPH_VERSION_QUERY, database_=graph.DATABASE)
+
+
+def work_experience(occupations, rng):
+    """work_experience rows as stored in Supabase, for the past occupation strategy."""
+    rows = []
+    end = datetime.now() - timedelta(days=rng.randint(0, 365))
+    for occupation in rng.sample(occupations, min(len(occupations), rng.randint(1, 4))):
+        start = end - timedelta(days=rng.randint(90, 1500))
+        current = not rows and rng.random() < 0.3
+        rows.append({
+            "occupation": occupation,
+            "company_name": "company",
+            "start_date": start.strftime("%Y-%m-%d"),
+            "end_date": None if current else end.strftime("%Y-%m-%d"),
+            "current_work": current,
+            "part_time": rng.random() < 0.3,
+        })
+        end = start - timedelta(days=rng.randint(0, 365))
+    return rows
+
+
+def student_profiles(catalog, count, seed=0):
+    """Random but plausible students: the agent state plus their work experience."""
+    rng = random.Random(seed)
+    titles = list(catalog.module_titles)
+    occupations = list(catalog.occupation_titles)
+    professors = list(catalog.professors)
+    profiles = []
+    for _ in range(count):
+        state = {
+            "taken_modules": rng.sample(titles, min(len(titles), rng.randint(0, 4))),
+            "desired_occupations": rng.sample(occupations, min(len(occupations), rng.randint(1, 3))),
+            "desired_lecturers": rng.sample(professors, min(len(professors), rng.randint(0, 2))),
+            "available_days": rng.sample(DAYS, rng.randint(1, 4)),
+            "assessment_type": rng.choice(ASSESSMENT_TYPES),
+            "project_work": rng.random() < 0.5,
+            "oral_assessment": rng.random() < 0.5,
+        }
+        profiles.append((state, work_experience(occupations, rng)))
+    return profiles
+
+
+def cases(catalog):
+    """Benchmarked callables, each taking (state, work experience) and returning the rows it got."""
+    methods = Neo4jMethods()
+    titles = list(catalog.module_titles)
+    return {
+        "neo4j.get_modules": lambda state, jobs: methods.get_modules(),
+        "neo4j.get_professors": lambda state, jobs: methods.get_professors(),
+        "neo4j.get_module_overview": lambda state, jobs: methods.get_module_overview(),
+        "neo4j.search_occupation": lambda state, jobs: methods.search_occupation(
+            state["desired_occupations"][0].split()[0]),
+        "neo4j.get_extra_modules": lambda state, jobs: methods.get_extra_modules(),
+        "neo4j.get_teaching_sessions_by_modules": lambda state, jobs: methods.get_teaching_sessions_by_modules(
+            titles[:10], state["taken_modules"]),
+        "neo4j.get_modules_by_occupation": lambda state, jobs: methods.get_modules_by_occupation(
+            state["desired_occupations"], state["taken_modules"]),
+        "neo4j.get_preference_features": lambda state, jobs: methods.get_preference_features(
+            titles, state["desired_lecturers"], state["available_days"], state["assessment_type"]),
+        "neo4j.get_modules_by_preferences": lambda state, jobs: methods.get_modules_by_preferences(
+            state["taken_modules"], state["desired_lecturers"], state["available_days"],
+            state["assessment_type"], state["project_work"], state["oral_assessment"]),
+        "strategy.past_occupation": get_modules_scored_by_past_occupation,
+        "strategy.future_occupation": lambda state, jobs: get_modules_scored_by_future_occupation(state),
+        "strategy.preferences": lambda state, jobs: get_modules_scored_by_preferences(state),
+        "strategy.balanced": lambda state, jobs: get_modules_scored_balanced(state, BALANCED_WEIGHTS, jobs),
+    }
+
+
+def measure(function, profiles, repeat, warmup):
+    for state, jobs in profiles[:warmup]:
+        function(state, jobs)
+    timings, rows, errors = [], [], 0
+    for _ in range(repeat):
+        for state, jobs in profiles:
+            start = time.perf_counter()
+            try:
+                result = function(state, jobs)
+            except Exception as e:
+                errors += 1
+                print(f"  error: {e}")
+                continue
+            timings.append((time.perf_counter() - start) * 1000)
+            rows.append(len(result))
+    if not timings:
+        return {"calls": 0, "errors": errors}
+    return {
+        "calls": len(timings),
+        "errors": errors,
+        "p50_ms": percentile(timings, 0.5),
+        "p95_ms": percentile(timings, 0.95),
+        "max_ms": max(timings),
+        "mean_ms": statistics.mean(timings),
+        "mean_rows": statistics.mean(rows),
+        "max_rows": max(rows),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    print(f"{'case':<40} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'rows':>7} {'errors':>6}"
+          + (f" {'p50 vs base':>11} {'p95 vs base':>11}" if baseline else ""))
+    for name, r in results.items():
+        if not r["calls"]:
+            print(f"{name:<40} {'-':>8} {'-':>8} {'-':>8} {'-':>7} {r['errors']:>6}")
+            continue
+        line = (f"{name:<40} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['max_ms']:>8.2f} "
+                f"{r['mean_rows']:>7.1f} {r['errors']:>6}")
+        before = (baseline or {}).get(name)
+        if before and before.get("calls"):
+            line += f" {r['p50_ms'] / before['p50_ms']:>10.2f}x {r['p95_ms'] / before['p95_ms']:>10.2f}x"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time the Neo4jMethods queries and the module retrieval strategies for sample students.")
+    parser.add_argument("--backend", choices=("neo4j", "memory"), default="neo4j",
+                        help="the configured Neo4j, or an in-memory graph built from esco/csv")
+    parser.add_argument("--load-fixture", action="store_true",
+                        help="first load esco/csv into the configured Neo4j (use an empty, local database)")
+    parser.add_argument("--profiles", type=int, default=20, help="number of sample students")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per student and case")
+    parser.add_argument("--warmup", type=int, default=2, help="untimed calls per case before measuring")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cases", nargs="+", help="only run the cases starting with one of these prefixes")
+    parser.add_argument("--output", help="JSON file for the results (default: a new file in .cache/benchmarks)")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare p50/p95 against")
+    args = parser.parse_args()
+
+    if args.backend == "memory":
+        load_memory_fixture(seed=args.seed)
+    elif args.load_fixture:
+        load_fixture(seed=args.seed)
+
+    catalog = get_catalog()
+    profiles = student_profiles(catalog, args.profiles, args.seed)
+    results = {}
+    for name, function in cases(catalog).items():
+        if args.cases and not any(name.startswith(prefix) for prefix in args.cases):
+            continue
+        results[name] = measure(function, profiles, args.repeat, args.warmup)
+        print(f"{name}: {results[name].get('p50_ms', float('nan')):.2f} ms p50")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+    print()
+    print_results(results, baseline)
+
+    report = {
+        "benchmark": "graph",
+        "backend": args.backend,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "graph_version": list(catalog.version),
+        "settings": {"profiles": args.profiles, "repeat": args.repeat, "warmup": args.warmup, "seed": args.seed},
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIRECTORY, f"graph-{datetime.now():%Y%m%d-%H%M%S}.json")
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import argparse
+import random
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from dateutil.relativedelta import relativedelta
+
+from utils.job_ranker import JobRanker
+
+WEIGHTS = {"work_period": 0.5, "recency": 0.3, "job_type": 0.2}
+
+
+# The per-period datetime implementation JobRanker._rank_jobs replaced, kept
+# as the baseline for the timings and the output check.
+def reference_rank_jobs(self, jobs):
+    """
+    Rank jobs based on scores calculated using the algorithm.
+
+    Args:
+        jobs (list): List of job records.
+
+    Returns:
+        list: Ranked list of jobs with scores in descending order.
+    """
+    # Step 1: Initialize an empty dictionary to aggregate experiences by job title
+    merged_jobs = defaultdict(
+        lambda: {
+            "work_periods": [],
+            "time_since_last_work": float("inf"),
+            "job_type": "part-time",
+        }
+    )
+
+    # Step 2: Filter jobs to include only experiences from the last max_experience_years
+    current_date = datetime.now()
+    cutoff_date = current_date - relativedelta(years=self.max_experience_years)
+
+    filtered_jobs = [
+        job
+        for job in jobs
+        if datetime.strptime(job["work_period"]["end"], "%Y-%m") > cutoff_date
+    ]
+
+    # Step 3: Merge jobs with the same title
+    for job in filtered_jobs:
+        title = job["title"]
+        work_period = job["work_period"]
+        time_since_last_work = job["time_since_last_work"]
+        job_type = job["job_type"]
+
+        # Update merged_jobs
+        merged = merged_jobs[title]
+        merged["work_periods"].append(work_period)
+        merged["time_since_last_work"] = min(
+            merged["time_since_last_work"], time_since_last_work
+        )
+        if job_type == "full-time":
+            merged["job_type"] = "full-time"
+
+    # Merge work periods for each title
+    for title, data in merged_jobs.items():
+        periods = sorted(
+            data["work_periods"],
+            key=lambda x: datetime.strptime(x["start"], "%Y-%m"),
+        )
+        merged_periods = []
+        current_start = None
+        current_end = None
+
+        for period in periods:
+            start = datetime.strptime(period["start"], "%Y-%m")
+            end = datetime.strptime(period["end"], "%Y-%m")
+
+            if current_start is None:
+                current_start = start
+                current_end = end
+            elif start <= current_end + relativedelta(
+                months=1
+            ):  # Overlapping or contiguous
+                current_end = max(current_end, end)
+            else:
+                # Append the merged period as strings
+                merged_periods.append(
+                    {
+                        "start": current_start.strftime("%Y-%m"),
+                        "end": current_end.strftime("%Y-%m"),
+                    }
+                )
+                current_start = start
+                current_end = end
+
+        if current_start and current_end:
+            # Append the last merged period as strings
+            merged_periods.append(
+                {
+                    "start": current_start.strftime("%Y-%m"),
+                    "end": current_end.strftime("%Y-%m"),
+                }
+            )
+
+        merged_jobs[title]["work_periods"] = merged_periods
+
+    # Step 4: Compute normalization factors
+    max_duration = 0
+    max_recency = 0
+
+    for data in merged_jobs.values():
+        durations = [
+            (
+                datetime.strptime(period["end"], "%Y-%m")
+                - datetime.strptime(period["start"], "%Y-%m")
+            ).days
+            for period in data["work_periods"]
+        ]
+        max_duration = max(max_duration, sum(durations))
+        max_recency = max(max_recency, data["time_since_last_work"])
+
+    # Step 5: Initialize scores
+    scores = []
+
+    for title, data in merged_jobs.items():
+        # Calculate duration in months
+        total_duration = (
+            sum(
+                (
+                    datetime.strptime(period["end"], "%Y-%m")
+                    - datetime.strptime(period["start"], "%Y-%m")
+                ).days
+                for period in data["work_periods"]
+            )
+            / 30.0
+        )
+        normalized_duration = (
+            total_duration / max_duration if max_duration > 0 else 0
+        )
+
+        # Normalize recency
+        normalized_recency = (
+            (max_recency - data["time_since_last_work"]) / max_recency
+            if max_recency > 0
+            else 0
+        )
+
+        # Job type score
+        job_type_score = 1.0 if data["job_type"] == "full-time" else 0.5
+
+        # Calculate total score
+        score = (
+            self.weights["work_period"] * normalized_duration
+            + self.weights["recency"] * normalized_recency
+            + self.weights["job_type"] * job_type_score
+        )
+        scores.append((title, score))
+
+    # Step 7: Sort scores by score in descending order
+    ranked_jobs = sorted(scores, key=lambda x: x[1], reverse=True)
+
+    # Step 8: Return the sorted list of scores
+    return ranked_jobs
+
+
+def synthetic_jobs(count, titles, seed=0):
+    """Work history entries in the format JobRanker._convert_job_list produces."""
+    rng = random.Random(seed)
+    now = datetime.now()
+    now_index = now.year * 12 + now.month - 1
+    jobs = []
+    for _ in range(count):
+        end = now_index - rng.randint(0, 240)
+        start = end - rng.randint(0, 60)
+        jobs.append({
+            "title": f"occupation {rng.randrange(titles)}",
+            "company": "company",
+            "work_period": {"start": f"{start // 12:04d}-{start % 12 + 1:02d}",
+                            "end": f"{end // 12:04d}-{end % 12 + 1:02d}"},
+            "time_since_last_work": now_index - end,
+            "job_type": rng.choice(["full-time", "part-time"]),
+        })
+    return jobs
+
+
+def best_of(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return result, min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare JobRanker._rank_jobs with the datetime-based baseline.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000, 20000])
+    parser.add_argument("--titles", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    ranker = JobRanker(WEIGHTS, max_experience_years=15)
+    print(f"{'jobs':>8} {'baseline ms':>12} {'vectorized ms':>14} {'speedup':>8}")
+    for size in args.sizes:
+        jobs = synthetic_jobs(size, args.titles)
+        expected, baseline = best_of(lambda: reference_rank_jobs(ranker, jobs), args.repeat)
+        ranked, vectorized = best_of(lambda: ranker._rank_jobs(jobs), args.repeat)
+        if ranked != expected:
+            raise SystemExit(f"Rankings differ for {size} jobs")
+        print(f"{size:>8} {baseline * 1000:>12.2f} {vectorized * 1000:>14.2f} {baseline / vectorized:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import os
+import random
+import statistics
+import time
+
+import pandas as pd
+
+from utils.semester_planner import THESIS_MODULES, plan_semesters, validate_plan
+
+CSV_DIRECTORY = os.path.join(os.path.dirname(__file__), "..", "esco", "csv")
+
+
+def load_catalog_modules():
+    """Catalog modules with their teaching sessions, built from the CSVs the graph is loaded from."""
+    modules = pd.read_csv(os.path.join(CSV_DIRECTORY, "modules.csv"))
+    scheduling = pd.read_csv(os.path.join(CSV_DIRECTORY, "modules_scheduling.csv"), skipinitialspace=True)
+    sessions = {}
+    for row in scheduling.to_dict("records"):
+        sessions.setdefault(row["Individual Name"], []).append({"semester": row["Semester"], "day": row["Day"]})
+    return [
+        {
+            "individual_name": row["Individual Name"],
+            "module_title": row["Course_Title"],
+            "module_type": row["Course_Type"],
+            "teaching_sessions": sessions.get(row["Individual Name"], []),
+        }
+        for row in modules.to_dict("records")
+        if isinstance(row["Course_Title"], str)
+    ]
+
+
+def scenarios(catalog_modules, count, seed=0):
+    """Random rankings of the elective modules with a random set of already taken modules."""
+    rng = random.Random(seed)
+    titles = [m["module_title"] for m in catalog_modules if m["module_title"] not in THESIS_MODULES]
+    for _ in range(count):
+        ranked = rng.sample(titles, len(titles))
+        taken = rng.sample(titles, rng.randint(0, 4))
+        if rng.random() < 0.2:
+            taken.append(THESIS_MODULES[0])
+        yield [{"module": {"module_title": title}} for title in ranked], taken
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the semester planner for 3 to 10 expected semesters.")
+    parser.add_argument("--scenarios", type=int, default=200)
+    args = parser.parse_args()
+
+    catalog_modules = load_catalog_modules()
+    print(f"{'semesters':>9} {'mean ms':>8} {'p95 ms':>7} {'max ms':>7} {'invalid':>8} {'short':>6}")
+    for semesters in range(3, 11):
+        timings = []
+        invalid = 0
+        short = 0
+        for modules_retrieved, taken in scenarios(catalog_modules, args.scenarios, seed=semesters):
+            start = time.perf_counter()
+            plan = plan_semesters(modules_retrieved, taken, semesters, catalog_modules, start=("Autumn", 2025))
+            timings.append((time.perf_counter() - start) * 1000)
+            invalid += bool(validate_plan(plan, catalog_modules, taken))
+            short += bool(plan.missing_credits)
+        timings.sort()
+        print(f"{semesters:>9} {statistics.mean(timings):>8.2f} {timings[int(len(timings) * 0.95) - 1]:>7.2f} "
+              f"{timings[-1]:>7.2f} {invalid:>8} {short:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+from datetime import datetime
+
+from utils.tracing import percentile
+from utils.typeahead import DEFAULT_LIMIT, MAX_CACHED_QUERIES, TypeaheadIndex, occupation_entries
+
+RESULTS_DIRECTORY = ".cache/benchmarks"
+
+# The full ESCO taxonomy has about 3,000 occupations, most with several
+# alternative labels.
+SYNTHETIC_OCCUPATIONS = 3000
+MAX_SYNONYMS = 8
+
+MODIFIERS = (
+    "software data business network security cloud systems database web mobile application information "
+    "financial marketing sales project product quality research clinical medical dental veterinary legal "
+    "tax insurance real estate logistics supply chain procurement human resources training education "
+    "primary secondary vocational agricultural forestry fishery mining oil gas energy solar wind nuclear "
+    "electrical mechanical civil chemical environmental industrial aerospace automotive railway maritime "
+    "aviation construction building interior graphic fashion textile food beverage hotel restaurant travel "
+    "tourism sports fitness music film television radio print digital social media public policy"
+).split()
+HEADS = (
+    "engineer developer analyst manager architect consultant administrator scientist designer technician "
+    "specialist officer coordinator assistant advisor inspector operator supervisor director planner "
+    "researcher teacher lecturer instructor nurse therapist pharmacist surgeon accountant auditor lawyer "
+    "clerk agent broker trader editor writer journalist photographer producer curator librarian mechanic "
+    "electrician installer fitter welder driver pilot controller dispatcher chef cook baker"
+).split()
+SENIORITY = ("junior", "senior", "lead", "chief", "head", "trainee", "principal", "associate")
+
+
+def synthetic_entries(count=SYNTHETIC_OCCUPATIONS, seed=0):
+    """(title, synonyms) pairs shaped like ESCO occupations: modifiers, a head noun and variants of them."""
+    rng = random.Random(seed)
+
+    def label():
+        words = rng.sample(MODIFIERS, rng.randint(1, 3)) + [rng.choice(HEADS)]
+        if rng.random() < 0.2:
+            words.insert(0, rng.choice(SENIORITY))
+        return " ".join(words)
+
+    entries, titles = [], set()
+    while len(entries) < count:
+        title = label()
+        if title in titles:
+            continue
+        titles.add(title)
+        entries.append((title, [label() for _ in range(rng.randint(0, MAX_SYNONYMS))]))
+    return entries
+
+
+def catalog_entries():
+    from utils.catalog import get_catalog
+
+    return occupation_entries(get_catalog().occupations)
+
+
+def typo(text, rng):
+    """Drop, double or swap one character, as a hurried typist does."""
+    if len(text) < 4:
+        return text
+    i = rng.randrange(1, len(text) - 1)
+    return rng.choice((
+        text[:i] + text[i + 1:],
+        text[:i] + text[i] + text[i:],
+        text[:i - 1] + text[i] + text[i - 1] + text[i + 1:],
+    ))
+
+
+def queries(entries, count, typo_rate, seed=0):
+    """What a user has typed so far: prefixes of titles and synonyms, some with a typo."""
+    rng = random.Random(seed)
+    labels = [label for title, synonyms in entries for label in (title, *synonyms)]
+    result = []
+    for _ in range(count):
+        label = rng.choice(labels)
+        query = label[:rng.randint(1, len(label))]
+        if rng.random() < typo_rate:
+            query = typo(query, rng)
+        result.append(query)
+    return result
+
+
+def measure(index, batch, limit, cached):
+    """Uncached lookups start from an empty result cache; cached ones repeat a batch already looked up."""
+    index._results.clear()
+    if cached:
+        for query in batch:
+            index.search(query, limit)
+    timings = []
+    for query in batch:
+        if not cached:
+            index._results.clear()
+        start = time.perf_counter()
+        index.search(query, limit)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "calls": len(timings),
+        "p50_ms": percentile(timings, 0.5),
+        "p95_ms": percentile(timings, 0.95),
+        "p99_ms": percentile(timings, 0.99),
+        "max_ms": max(timings),
+        "mean_ms": statistics.mean(timings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time occupation typeahead lookups.")
+    parser.add_argument("--catalog", action="store_true",
+                        help="index the occupations of the configured graph instead of synthetic ones")
+    parser.add_argument("--occupations", type=int, default=SYNTHETIC_OCCUPATIONS,
+                        help="number of synthetic occupations")
+    parser.add_argument("--queries", type=int, default=2000, help="number of lookups per case")
+    parser.add_argument("--typo-rate", type=float, default=0.2, help="share of queries with a typo")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help="results per lookup")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON file for the results (default: a new file in .cache/benchmarks)")
+    args = parser.parse_args()
+
+    entries = catalog_entries() if args.catalog else synthetic_entries(args.occupations, args.seed)
+    start = time.perf_counter()
+    index = TypeaheadIndex(entries)
+    build_ms = (time.perf_counter() - start) * 1000
+    stats = index.stats()
+    print(f"Indexed {stats['titles']} occupations, {stats['labels']} labels in {build_ms:.0f} ms")
+
+    results = {}
+    for name, typo_rate in (("prefix", 0.0), ("mixed", args.typo_rate), ("typo", 1.0)):
+        batch = queries(entries, args.queries, typo_rate, args.seed)
+        results[f"{name}.uncached"] = measure(index, batch, args.limit, cached=False)
+        results[f"{name}.cached"] = measure(index, batch[:MAX_CACHED_QUERIES], args.limit, cached=True)
+
+    print(f"\n{'case':<20} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, r in results.items():
+        print(f"{name:<20} {r['p50_ms']:>8.3f} {r['p95_ms']:>8.3f} {r['p99_ms']:>8.3f} {r['max_ms']:>8.3f}")
+
+    report = {
+        "benchmark": "typeahead",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "settings": {"catalog": args.catalog, "occupations": stats["titles"], "labels": stats["labels"],
+                     "queries": args.queries, "typo_rate": args.typo_rate, "limit": args.limit, "seed": args.seed},
+        "build_ms": build_ms,
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIRECTORY, f"typeahead-{datetime.now():%Y%m%d-%H%M%S}.json")
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
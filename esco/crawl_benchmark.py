@@ -0,0 +1,41 @@
+import argparse
+import tempfile
+import time
+
+from esco import EscoCrawler
+from esco_stub_server import ROOT_URI, start_server
+
+
+def run(base_url, workers, cache_directory, rate):
+    crawler = EscoCrawler(api_base_url=base_url, max_workers=workers, requests_per_second=rate,
+                          cache_directory=cache_directory)
+    start = time.perf_counter()
+    occupations = crawler.crawl(ROOT_URI)
+    elapsed = time.perf_counter() - start
+    return len(occupations), crawler.requests, crawler.cache_hits, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the ESCO crawler against the stand-in API.')
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8, 16])
+    parser.add_argument('--rate', type=float, default=0, help='requests per second, 0 for unlimited')
+    args = parser.parse_args()
+
+    server, base_url = start_server(latency=args.latency)
+    try:
+        print(f'{"workers":>8} {"occupations":>12} {"requests":>9} {"seconds":>8} {"requests/s":>11}')
+        for workers in args.workers:
+            with tempfile.TemporaryDirectory() as cache_directory:
+                count, requests_made, _, elapsed = run(base_url, workers, cache_directory, args.rate)
+                print(f'{workers:>8} {count:>12} {requests_made:>9} {elapsed:>8.2f} {requests_made / elapsed:>11.1f}')
+
+                # A second crawl over the same cache is what a resumed run costs.
+                count, requests_made, hits, elapsed = run(base_url, workers, cache_directory, args.rate)
+                print(f'{"resumed":>8} {count:>12} {requests_made:>9} {elapsed:>8.2f} ({hits} cache hits)')
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,21 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
 import requests
 import pandas as pd
 
-API_OCCUPATION_URL = 'https://ec.europa.eu/esco/api/resource/occupation'
-API_SKILL_URL = 'https://ec.europa.eu/esco/api/resource/skill'
+API_BASE_URL = 'https://ec.europa.eu/esco/api'
 SELECTED_VERSION = 'v1.2.0'
 
+CACHE_DIRECTORY = os.path.join(os.getcwd(), 'esco_cache')
+MAX_WORKERS = 8
+REQUESTS_PER_SECOND = 10
+MAX_RETRIES = 3
+
 
 class Skill:
     def __init__(self, title, uri, skill_type, description=""):
@@ -19,97 +30,219 @@ class Skill:
 
 
 class Occupation:
-    def __init__(self, title, description, skills, optional_skills, uri):
+    def __init__(self, title, description, skills, optional_skills, uri, alternative_labels=()):
         self.uri = uri
         self.title = title
         self.description = description
         self.skills = skills
         self.optional_skills = optional_skills
+        self.alternative_labels = list(alternative_labels)
 
     def __repr__(self):
         return (f'Occupation(uri={self.uri!r}, title={self.title!r}, description={self.description!r}, '
-                f'skills={self.skills!r}, optional_skills={self.optional_skills!r})')
-
-
-def fetch_occupation_json(uri):
-    params = {
-        'uri': uri,
-        'selectedVersion': SELECTED_VERSION
-    }
-    try:
-        response = requests.get(API_OCCUPATION_URL, params=params)
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
-        print(f"Error fetching data for URI {uri}: {e}")
-        return {}
-
-
-def fetch_skill_json(uri):
-    """Fetch skill details from the API_SKILL_URL."""
-    params = {
-        'uri': uri,
-        'selectedVersion': SELECTED_VERSION
-    }
-    try:
-        response = requests.get(API_SKILL_URL, params=params)
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
-        print(f"Error fetching skill data for URI {uri}: {e}")
-        return {}
-
-
-def extract_skills(json_data, link_key):
-    skills = []
-
-    for skill in json_data.get('_links', {}).get(link_key, []):
-        skill_name = skill.get('title')
-        skill_uri = skill.get('uri')
-        skill_category = skill.get('skillType')
-
-        # Fetch the description of the skill from the API
-        skill_description_json = fetch_skill_json(skill_uri)
-        skill_description = skill_description_json.get('description', {}).get('en', {}).get('literal', '')
-
-        if skill_category == 'http://data.europa.eu/esco/skill-type/skill':
-            skills.append(Skill(skill_name, skill_uri, 'skill', description=skill_description))
-        elif skill_category == 'http://data.europa.eu/esco/skill-type/knowledge':
-            skills.append(Skill(skill_name, skill_uri, 'knowledge', description=skill_description))
-
-    return skills
-
-
-def build_occupation(json_data):
-    job_title = json_data.get('title')
-    job_description = json_data.get('description', {}).get('en', {}).get('literal', '')
-
-    # Extract the URI from the JSON data
-    uri = json_data.get('uri', '')
-
-    skills = extract_skills(json_data, 'hasEssentialSkill')
-    optional_skills = extract_skills(json_data, 'hasOptionalSkill')
-
-    return Occupation(job_title, job_description, skills, optional_skills, uri)
-
+                f'skills={self.skills!r}, optional_skills={self.optional_skills!r}, '
+                f'alternative_labels={self.alternative_labels!r})')
+
+
+class ResponseCache:
+    """
+    One JSON file per fetched resource.
+
+    Files are written atomically, so an interrupted crawl can be restarted
+    and only fetches what is not on disk yet.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, kind, uri):
+        digest = hashlib.sha1(f'{SELECTED_VERSION}:{uri}'.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, kind, digest + '.json')
+
+    def get(self, kind, uri):
+        try:
+            with open(self._path(kind, uri), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def set(self, kind, uri, data):
+        path = self._path(kind, uri)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+
+class RateLimiter:
+    """Spaces request starts at least 1/rate seconds apart across all threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class EscoCrawler:
+    """
+    Walks the ESCO occupation hierarchy with a bounded thread pool.
+
+    Every occupation and every skill is fetched at most once per crawl, and
+    at most once ever when a cache directory is used.
+    """
+
+    def __init__(self, api_base_url=API_BASE_URL, max_workers=MAX_WORKERS, requests_per_second=REQUESTS_PER_SECOND,
+                 cache_directory=CACHE_DIRECTORY):
+        self.urls = {
+            'occupation': api_base_url + '/resource/occupation',
+            'skill': api_base_url + '/resource/skill',
+        }
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self.cache = ResponseCache(cache_directory) if cache_directory else None
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.cache_hits = 0
+
+    def _session(self):
+        if not hasattr(self._local, 'session'):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def fetch(self, kind, uri):
+        if self.cache:
+            cached = self.cache.get(kind, uri)
+            if cached is not None:
+                with self._stats_lock:
+                    self.cache_hits += 1
+                return cached
+
+        params = {'uri': uri, 'selectedVersion': SELECTED_VERSION}
+        for attempt in range(MAX_RETRIES):
+            self.rate_limiter.acquire()
+            with self._stats_lock:
+                self.requests += 1
+            try:
+                response = self._session().get(self.urls[kind], params=params, timeout=30)
+                if response.status_code == 429 or response.status_code >= 500:
+                    raise requests.HTTPError(f'{response.status_code} from ESCO', response=response)
+                response.raise_for_status()
+                data = response.json()
+                break
+            except requests.RequestException as e:
+                retryable = e.response is None or e.response.status_code == 429 or e.response.status_code >= 500
+                if attempt + 1 == MAX_RETRIES or not retryable:
+                    print(f"Error fetching {kind} data for URI {uri}: {e}")
+                    return {}
+                time.sleep(2 ** attempt)
+
+        if self.cache:
+            self.cache.set(kind, uri, data)
+        return data
+
+    def crawl(self, root_uri):
+        """Return the occupations below root_uri, each with its essential and optional skills."""
+        occupations_json = {}
+        skills_json = {}
+        seen = {('occupation', root_uri)}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {executor.submit(self.fetch, 'occupation', root_uri): ('occupation', root_uri)}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, uri = pending.pop(future)
+                    data = future.result()
+                    if kind == 'skill':
+                        skills_json[uri] = data
+                        continue
+
+                    occupations_json[uri] = data
+                    links = data.get('_links', {})
+                    discovered = [('occupation', link.get('uri')) for link in _narrower_links(links)]
+                    discovered += [('skill', link.get('uri'))
+                                   for key in ('hasEssentialSkill', 'hasOptionalSkill')
+                                   for link in links.get(key, [])]
+                    for item in discovered:
+                        if item[1] and item not in seen:
+                            seen.add(item)
+                            pending[executor.submit(self.fetch, *item)] = item
+
+        return self._build(root_uri, occupations_json, skills_json)
+
+    def _build(self, root_uri, occupations_json, skills_json):
+        skills = {}
+
+        def skill_list(links):
+            result = []
+            for link in links:
+                uri = link.get('uri')
+                if uri not in skills:
+                    description = skills_json.get(uri, {}).get('description', {}).get('en', {}).get('literal', '')
+                    skill_category = link.get('skillType')
+                    if skill_category == 'http://data.europa.eu/esco/skill-type/skill':
+                        skills[uri] = Skill(link.get('title'), uri, 'skill', description=description)
+                    elif skill_category == 'http://data.europa.eu/esco/skill-type/knowledge':
+                        skills[uri] = Skill(link.get('title'), uri, 'knowledge', description=description)
+                    else:
+                        skills[uri] = None
+                if skills[uri] is not None:
+                    result.append(skills[uri])
+            return result
+
+        # Same depth-first, children-before-parent order as the recursive walk,
+        # but an occupation reachable from several parents is listed once.
+        occupations = []
+        visited = set()
+        stack = [(root_uri, False)]
+        while stack:
+            uri, expanded = stack.pop()
+            json_data = occupations_json.get(uri, {})
+            links = json_data.get('_links', {})
+            if expanded:
+                if 'hasEssentialSkill' in links:
+                    occupations.append(Occupation(
+                        json_data.get('title'),
+                        json_data.get('description', {}).get('en', {}).get('literal', ''),
+                        skill_list(links.get('hasEssentialSkill', [])),
+                        skill_list(links.get('hasOptionalSkill', [])),
+                        json_data.get('uri', ''),
+                        json_data.get('alternativeLabel', {}).get('en', []),
+                    ))
+                continue
+            if uri in visited:
+                continue
+            visited.add(uri)
+            stack.append((uri, True))
+            children = [link.get('uri') for link in _narrower_links(links) if link.get('uri')]
+            stack.extend((child, False) for child in reversed(children))
+        return occupations
+
+
+def _narrower_links(links):
+    # Check for both 'narrowerOccupation' and 'narrowerConcept'
+    return links.get('narrowerOccupation', []) + links.get('narrowerConcept', [])
 
-def gather_occupations(uri):
-    json_data = fetch_occupation_json(uri)
-    occupations = []
 
-    # Check for both 'narrowerOccupation' and 'narrowerConcept'
-    narrower_uris = json_data.get('_links', {}).get('narrowerOccupation', []) + json_data.get('_links', {}).get(
-        'narrowerConcept', [])
-
-    for narrower_occupation in narrower_uris:
-        narrower_occupation_uri = narrower_occupation.get('uri')
-        if narrower_occupation_uri:
-            occupations.extend(gather_occupations(narrower_occupation_uri))
-
-    if 'hasEssentialSkill' in json_data.get('_links', {}):
-        occupation = build_occupation(json_data)
-        occupations.append(occupation)
-        print(occupation.title + ' DONE')
+def gather_occupations(uri, **crawler_options):
+    crawler = EscoCrawler(**crawler_options)
+    start = time.perf_counter()
+    occupations = crawler.crawl(uri)
+    elapsed = time.perf_counter() - start
+    print(f'{len(occupations)} occupations in {elapsed:.1f}s '
+          f'({crawler.requests} requests, {crawler.cache_hits} cache hits)')
     return occupations
 
 
@@ -169,7 +302,9 @@ def save_to_csv(occupations):
             'essential_skills': ','.join(essential_skills_uris),
             'essential_knowledge': ','.join(essential_knowledge_uris),
             'optional_skills': ','.join(optional_skills_uris),
-            'optional_knowledge': ','.join(optional_knowledge_uris)
+            'optional_knowledge': ','.join(optional_knowledge_uris),
+            # Labels can contain commas, so they are separated by "|".
+            'alternative_labels': '|'.join(occupation.alternative_labels)
         })
 
     occupations_df = pd.DataFrame(occupations_data)
@@ -0,0 +1,102 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+ROOT_URI = 'http://data.europa.eu/esco/isco/C0'
+SKILL_TYPE = 'http://data.europa.eu/esco/skill-type/skill'
+KNOWLEDGE_TYPE = 'http://data.europa.eu/esco/skill-type/knowledge'
+
+
+def build_taxonomy(depth=3, breadth=5, skill_pool=400, essential=15, optional=10, seed=42):
+    """
+    Generate an ESCO-shaped occupation tree whose leaves share skills from a
+    common pool, as the real taxonomy does.
+    """
+    rng = random.Random(seed)
+    skills = {}
+    for i in range(skill_pool):
+        uri = f'http://data.europa.eu/esco/skill/stub-{i}'
+        skills[uri] = {
+            'uri': uri,
+            'title': f'skill {i}',
+            'skillType': SKILL_TYPE if i % 3 else KNOWLEDGE_TYPE,
+            'description': {'en': {'literal': f'Description of skill {i}.'}},
+        }
+    skill_uris = list(skills)
+
+    occupations = {}
+
+    def add(uri, level):
+        node = {'uri': uri, 'title': f'occupation {uri.rsplit("/", 1)[-1]}',
+                'description': {'en': {'literal': f'Description of {uri}.'}},
+                'alternativeLabel': {'en': [f'job {uri.rsplit("/", 1)[-1]}']}, '_links': {}}
+        occupations[uri] = node
+        if level == depth:
+            picked = rng.sample(skill_uris, essential + optional)
+            links = [{'uri': u, 'title': skills[u]['title'], 'skillType': skills[u]['skillType']} for u in picked]
+            node['_links']['hasEssentialSkill'] = links[:essential]
+            node['_links']['hasOptionalSkill'] = links[essential:]
+            return
+        children = [f'{uri}.{i}' for i in range(breadth)]
+        key = 'narrowerConcept' if level < depth - 1 else 'narrowerOccupation'
+        node['_links'][key] = [{'uri': child} for child in children]
+        for child in children:
+            add(child, level + 1)
+
+    add(ROOT_URI, 0)
+    return occupations, skills
+
+
+def make_handler(occupations, skills, latency):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            uri = parse_qs(parsed.query).get('uri', [''])[0]
+            if parsed.path.endswith('/resource/occupation'):
+                body = occupations.get(uri)
+            elif parsed.path.endswith('/resource/skill'):
+                body = skills.get(uri)
+            else:
+                body = None
+            if latency:
+                time.sleep(latency)
+            if body is None:
+                self.send_response(404)
+                self.end_headers()
+                return
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start_server(port=0, latency=0.02, **taxonomy_options):
+    """Start the stand-in API in a background thread; returns (server, base_url)."""
+    occupations, skills = build_taxonomy(**taxonomy_options)
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(occupations, skills, latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}/esco/api'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve a synthetic ESCO API for offline crawls.')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.02, help='seconds added to every response')
+    args = parser.parse_args()
+    server, base_url = start_server(args.port, args.latency)
+    print(f'Stand-in ESCO API at {base_url} (root occupation {ROOT_URI})')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -2,12 +2,17 @@ from neo4j import GraphDatabase
 import pandas as pd
 import os
 import json
+import time
 
 URI_NEO4J = 'URI'
 AUTH = ('USER', 'PASSWORD')
+DATABASE = 'neo4j'
+
+# Rows sent per UNWIND statement; every phase runs as a single transaction.
+DEFAULT_BATCH_SIZE = 1000
 
 # Constants for CSV paths
-CSV_DIRECTORY = os.path.join(os.getcwd(), 'csv')
+CSV_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'csv')
 SKILLS_CSV = os.path.join(CSV_DIRECTORY, 'skills.csv')
 KNOWLEDGE_CSV = os.path.join(CSV_DIRECTORY, 'knowledge.csv')
 OCCUPATIONS_CSV = os.path.join(CSV_DIRECTORY, 'occupations.csv')
@@ -16,262 +21,276 @@ MODULES_CSV = os.path.join(CSV_DIRECTORY, 'modules.csv')
 SCHEDULING_CSV = os.path.join(CSV_DIRECTORY, 'modules_scheduling.csv')
 ASSESSMENTS_JSON = os.path.join(CSV_DIRECTORY, 'modules_assessments.json')
 
+SCHEMA = [
+    'CREATE CONSTRAINT skill_uri IF NOT EXISTS FOR (n:Skill) REQUIRE n.uri IS UNIQUE',
+    'CREATE CONSTRAINT occupation_uri IF NOT EXISTS FOR (n:Occupation) REQUIRE n.uri IS UNIQUE',
+    'CREATE CONSTRAINT module_individual_name IF NOT EXISTS FOR (n:Module) REQUIRE n.individual_name IS UNIQUE',
+    'CREATE INDEX module_title IF NOT EXISTS FOR (n:Module) ON (n.module_title)',
+    'CREATE INDEX learning_outcome_text IF NOT EXISTS FOR (n:LearningOutcome) ON (n.learning_outcome)',
+    'CREATE INDEX teaching_session_module IF NOT EXISTS FOR (n:TeachingSession) ON (n.module)',
+    'CREATE INDEX professor_name IF NOT EXISTS FOR (n:Professor) ON (n.professor_name, n.professor_surname)',
+]
+
+SKILLS_QUERY = '''
+    UNWIND $rows AS row
+    MERGE (n:Skill {uri: row.uri})
+    SET n.title = row.title, n.skill_type = row.skill_type, n.index = row.index, n.description = row.description
+'''
+
+OCCUPATIONS_QUERY = '''
+    UNWIND $rows AS row
+    MERGE (o:Occupation {uri: row.uri})
+    SET o.occupation = row.occupation, o.description = row.description,
+        o.alternative_labels = row.alternative_labels
+'''
+
+LEARNING_OUTCOMES_QUERY = '''
+    UNWIND $rows AS row
+    MERGE (lo:LearningOutcome {learning_outcome: row.learning_outcome, module_title: row.module_title})
+'''
+
+MODULES_QUERY = '''
+    UNWIND $rows AS row
+    MERGE (n:Module {individual_name: row.individual_name})
+    SET n.module_link = row.module_link, n.module_title = row.module_title,
+        n.module_description = row.module_description, n.module_type = row.module_type,
+        n.module_comment = row.module_comment,
+        n.module_competency_to_be_achieved = row.module_competency_to_be_achieved,
+        n.module_content = row.module_content
+'''
+
+MODULE_LEARNING_OUTCOME_QUERY = '''
+    UNWIND $rows AS row
+    MATCH (module:Module {individual_name: row.module_name})
+    MATCH (lo:LearningOutcome {learning_outcome: row.learning_outcome})
+    MERGE (module)-[:has_learning_outcome]->(lo)
+'''
+
+LEARNING_OUTCOME_SKILL_QUERY = '''
+    UNWIND $rows AS row
+    MATCH (lo:LearningOutcome {learning_outcome: row.learning_outcome})
+    MATCH (skill:Skill {uri: row.skill_uri})
+    MERGE (lo)-[:has_skill]->(skill)
+'''
+
+OCCUPATION_SKILL_QUERY = '''
+    UNWIND $rows AS row
+    MATCH (occupation:Occupation {uri: row.occupation_uri})
+    MATCH (skill:Skill {uri: row.skill_uri})
+    MERGE (occupation)-[:requires_skill {relationType: row.relation_type}]->(skill)
+'''
+
+TEACHING_SESSIONS_QUERY = '''
+    UNWIND $rows AS row
+    MERGE (t:TeachingSession {module: row.module, group_name: row.group_name, day: row.day, time: row.time,
+                              periodicity: row.periodicity, semester: row.semester, location: row.location,
+                              ay: row.ay})
+    ON CREATE SET t.uuid = randomUUID()
+    WITH t, row
+    MATCH (module:Module {individual_name: row.module})
+    MERGE (module)-[:has_schedule]->(t)
+    MERGE (p:Professor {professor_name: row.professor_name, professor_surname: row.professor_surname})
+    ON CREATE SET p.uuid = randomUUID()
+    MERGE (t)-[:taught_by]->(p)
+'''
+
+ASSESSMENTS_QUERY = '''
+    UNWIND $rows AS row
+    MATCH (m:Module {module_title: row.module_name})
+    SET m.project_work = row.project_work,
+        m.assessment_type = row.assessment_type,
+        m.oral_assessment = row.oral_assessment
+'''
+
+# Lets running app processes notice the new catalog (see utils/catalog.py).
+BUMP_GRAPH_VERSION_QUERY = '''
+    MERGE (v:GraphVersion {id: 'catalog'})
+    SET v.version = coalesce(v.version, 0) + 1, v.updated_at = datetime()
+'''
+
+
+def read_csv_chunks(path, batch_size, **kwargs):
+    """Stream a CSV as lists of row dicts, with missing values as None."""
+    for chunk in pd.read_csv(path, chunksize=batch_size, **kwargs):
+        chunk = chunk.astype(object).where(pd.notna(chunk), None)
+        yield chunk.to_dict('records')
+
+
+def rebatch(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def split_uris(value):
+    if not value:
+        return []
+    return [uri.strip() for uri in value.split(',') if uri.strip()]
+
+
+def split_labels(value):
+    if not value:
+        return []
+    return [label.strip() for label in value.split('|') if label.strip()]
+
+
+def run_phase(driver, name, query, batches):
+    """
+    Run every batch of one phase inside a single write transaction and report rows/s.
+
+    ``batches`` is a callable returning a fresh iterator, because the driver
+    may retry the whole transaction.
+    """
+    def work(tx):
+        count = 0
+        for batch in batches():
+            tx.run(query, rows=batch).consume()
+            count += len(batch)
+        return count
+
+    start = time.perf_counter()
+    with driver.session(database=DATABASE) as session:
+        count = session.execute_write(work)
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print(f'{name}: {count} rows in {elapsed:.2f}s ({rate:.0f} rows/s)')
+    return count
+
+
+def create_schema(driver):
+    for statement in SCHEMA:
+        driver.execute_query(statement, database_=DATABASE)
+
+
+def skill_batches(path, skill_type, batch_size):
+    for rows in read_csv_chunks(path, batch_size):
+        yield [{'title': r['title'], 'skill_type': skill_type, 'index': r['index'],
+                'description': r['description'], 'uri': r['uri']} for r in rows]
+
+
+def occupation_batches(batch_size):
+    for rows in read_csv_chunks(OCCUPATIONS_CSV, batch_size):
+        # CSVs written before the crawler kept alternative labels lack the column.
+        yield [{'occupation': r['occupation'], 'uri': r['uri'], 'description': r['description'],
+                'alternative_labels': split_labels(r.get('alternative_labels'))} for r in rows]
+
+
+def learning_outcome_batches(batch_size):
+    for rows in read_csv_chunks(LEARNING_OUTCOMES_CSV, batch_size):
+        yield [{'learning_outcome': r['Learning Outcome'], 'module_title': r['Module Title']} for r in rows]
+
+
+def module_batches(batch_size):
+    for rows in read_csv_chunks(MODULES_CSV, batch_size):
+        yield [{
+            'individual_name': r['Individual Name'],
+            'module_link': r['Course_Link'],
+            'module_title': r['Course_Title'],
+            'module_description': r['Course_Description'],
+            'module_type': r['Course_Type'],
+            'module_comment': r['Course_Comment'] or '',
+            'module_competency_to_be_achieved': r['Course_Competency_to_be_achieved'],
+            'module_content': r['Course_Content'],
+        } for r in rows]
+
+
+def module_learning_outcome_batches(batch_size):
+    for rows in read_csv_chunks(LEARNING_OUTCOMES_CSV, batch_size):
+        yield [{'module_name': r['Module Title'], 'learning_outcome': r['Learning Outcome']} for r in rows]
+
+
+def learning_outcome_skill_batches(batch_size):
+    def links():
+        for rows in read_csv_chunks(LEARNING_OUTCOMES_CSV, batch_size):
+            for r in rows:
+                for uri in split_uris(r['Promoted skill']) + split_uris(r['Promoted knowledge']):
+                    yield {'learning_outcome': r['Learning Outcome'], 'skill_uri': uri}
+    return rebatch(links(), batch_size)
+
+
+def occupation_skill_batches(batch_size):
+    columns = [('essential_skills', 'essential'), ('essential_knowledge', 'essential'),
+               ('optional_skills', 'optional'), ('optional_knowledge', 'optional')]
+
+    def links():
+        for rows in read_csv_chunks(OCCUPATIONS_CSV, batch_size):
+            for r in rows:
+                for column, relation_type in columns:
+                    for uri in split_uris(r[column]):
+                        yield {'occupation_uri': r['uri'], 'skill_uri': uri, 'relation_type': relation_type}
+    return rebatch(links(), batch_size)
+
 
-def add_module(driver, individual_name, module_link, module_title, module_description, module_type, module_comment,
-               module_competency_to_be_achieved, module_content):
-    driver.execute_query(
-        '''
-        MERGE (n:Module {individual_name: $individual_name, module_link: $module_link, module_title: $module_title, module_description: $module_description, module_type: $module_type, module_comment: $module_comment, module_competency_to_be_achieved: $module_competency_to_be_achieved, module_content: $module_content})
-        RETURN n
-        ''',
-        individual_name=individual_name, module_link=module_link, module_title=module_title,
-        module_description=module_description, module_type=module_type, module_comment=module_comment,
-        module_competency_to_be_achieved=module_competency_to_be_achieved, module_content=module_content,
-        database_="neo4j"
-    )
-
-
-def add_learning_outcome(driver, learning_outcome, module_title):
-    driver.execute_query(
-        '''
-        MERGE (lo:LearningOutcome {learning_outcome: $learning_outcome, module_title: $module_title})
-        RETURN lo
-        ''',
-        learning_outcome=learning_outcome, module_title=module_title, database_='neo4j'
-    )
-
-
-def add_skill(driver, title, skill_type, index, description, uri):
-    driver.execute_query(
-        '''
-        MERGE (n:Skill {title: $title, skill_type: $skill_type, index: $index, description: $description, uri: $uri})
-        RETURN n
-        ''',
-        title=title, skill_type=skill_type, index=index, description=description, uri=uri, database_='neo4j'
-    )
-
-
-def add_occupation(driver, occupation, uri, description):
-    driver.execute_query(
-        '''
-        MERGE (o:Occupation {occupation: $occupation, uri: $uri, description: $description})
-        RETURN o
-        ''',
-        occupation=occupation, uri=uri, description=description, database_='neo4j'
-    )
-
-
-def add_professor(driver, professor_name, professor_surname):
-    records, _, _ = driver.execute_query(
-        '''
-        MERGE (p:Professor {professor_name: $professor_name, professor_surname: $professor_surname})
-        ON CREATE SET p.uuid = randomUUID()
-        RETURN p.uuid AS node_uuid
-        ''',
-        professor_name=professor_name, professor_surname=professor_surname, database_='neo4j'
-    )
-    return records[0]['node_uuid']
-
-
-def add_teaching_session(driver, module, group_name, day, time, periodicity, semester, location, ay):
-    records, _, _ = driver.execute_query(
-        '''
-        MERGE (t:TeachingSession {module:$module, group_name: $group_name, day: $day, time:$time, periodicity: $periodicity, semester: $semester, location:$location, ay:$ay})
-        ON CREATE SET t.uuid = randomUUID()
-        RETURN t.uuid AS node_uuid
-        ''',
-        module=module, group_name=group_name, day=day, time=time, periodicity=periodicity, semester=semester,
-        location=location, ay=ay,
-        database_='neo4j'
-    )
-    return records[0]['node_uuid']
-
-
-def link_module_teachingSession(driver, module_name, teaching_session_uuid):
-    driver.execute_query(
-        '''
-        MATCH (module:Module {individual_name: $module_name})
-        MATCH (t:TeachingSession {uuid: $teaching_session_uuid})
-        MERGE (module)-[r:has_schedule]->(t)
-        RETURN r
-        ''',
-        module_name=module_name, teaching_session_uuid=teaching_session_uuid, database_="neo4j"
-    )
-
-
-def link_teachingSession_professor(driver, teaching_session_uuid, professor_uuid):
-    driver.execute_query(
-        '''
-        MATCH (t:TeachingSession {uuid: $teaching_session_uuid})
-        MATCH (p:Professor {uuid: $professor_uuid})
-        MERGE (t)-[r:taught_by]->(p)
-        RETURN r
-        ''',
-        teaching_session_uuid=teaching_session_uuid, professor_uuid=professor_uuid, database_="neo4j"
-    )
-
-
-def link_occupation_skill(driver, occupation_uri, skill_uri, relation_type):
-    driver.execute_query(
-        '''
-        MATCH (node1:Occupation {uri: $occupation_uri})
-        MATCH (node2:Skill {uri: $skill_uri})
-        MERGE (node1)-[r:requires_skill {relationType: $relation_type}]->(node2)
-        RETURN r
-        ''',
-        occupation_uri=occupation_uri, skill_uri=skill_uri, relation_type=relation_type, database_="neo4j"
-    )
-
-
-def link_module_learning_outcome(driver, module_name, learning_outcome):
-    driver.execute_query(
-        '''
-        MATCH (module:Module {individual_name: $module_name})
-        MATCH (lo:LearningOutcome {learning_outcome: $learning_outcome})
-        MERGE (module)-[r:has_learning_outcome]->(lo)
-        RETURN r
-        ''',
-        module_name=module_name, learning_outcome=learning_outcome, database_="neo4j"
-    )
-
-
-def link_learning_objective_skill(driver, learning_outcome, skill_uri):
-    driver.execute_query(
-        '''
-        MATCH (lo:LearningOutcome {learning_outcome: $learning_outcome})
-        MATCH (skill:Skill {uri: $skill_uri})
-        MERGE (lo)-[r:has_skill]->(skill)
-        RETURN r
-        ''',
-        learning_outcome=learning_outcome, skill_uri=skill_uri, database_="neo4j"
-    )
-
-
-def process_occupation_skill_link(driver, df):
-    for _, r in df.iterrows():
-        if pd.notna(r['essential_skills']):
-            essential_skills = r['essential_skills'].split(',')
-            for skill_uri in essential_skills:
-                link_occupation_skill(driver, r['uri'], skill_uri.strip(), 'essential')
-
-        if pd.notna(r['essential_knowledge']):
-            essential_knowledge = r['essential_knowledge'].split(',')
-            for knowledge_uri in essential_knowledge:
-                link_occupation_skill(driver, r['uri'], knowledge_uri.strip(), 'essential')
-
-        if pd.notna(r['optional_skills']):
-            optional_skills = r['optional_skills'].split(',')
-            for skill_uri in optional_skills:
-                link_occupation_skill(driver, r['uri'], skill_uri.strip(), 'optional')
-
-        if pd.notna(r['optional_knowledge']):
-            optional_knowledge = r['optional_knowledge'].split(',')
-            for knowledge_uri in optional_knowledge:
-                link_occupation_skill(driver, r['uri'], knowledge_uri.strip(), 'optional')
-
-
-def process_module_learning_outcome_link(driver, df):
-    for _, r in df.iterrows():
-        module_title = r['Module Title']
-        learning_outcome = r['Learning Outcome']
-        link_module_learning_outcome(driver, module_title, learning_outcome)
-
-
-def process_learning_outcome_skill_link(driver, df):
-    for _, r in df.iterrows():
-        if pd.notna(r['Promoted skill']):
-            skills_uris = r['Promoted skill'].split(',')
-            for uri in skills_uris:
-                link_learning_objective_skill(driver, r['Learning Outcome'], uri.strip())
-        if pd.notna(r['Promoted knowledge']):
-            knowledge_uris = r['Promoted knowledge'].split(',')
-            for uri in knowledge_uris:
-                link_learning_objective_skill(driver, r['Learning Outcome'], uri.strip())
-
-
-def update_modules_with_assessment_info():
+def teaching_session_batches(batch_size):
+    for rows in read_csv_chunks(SCHEDULING_CSV, batch_size, skipinitialspace=True):
+        yield [{
+            'module': r['Individual Name'],
+            'group_name': r['Group_Name'],
+            'day': r['Day'],
+            'time': r['Time'],
+            'periodicity': r['Periodicity'],
+            'semester': r['Semester'],
+            'location': r['Location'],
+            'ay': r['AY'],
+            'professor_name': r['Professor_Name'],
+            'professor_surname': r['Professor_Surname'],
+        } for r in rows]
+
+
+def update_modules_with_assessment_info(driver=None, batch_size=DEFAULT_BATCH_SIZE):
     with open(ASSESSMENTS_JSON, 'r', encoding='utf-8') as f:
         assessment_data = json.load(f)
 
-    with GraphDatabase.driver(URI_NEO4J, auth=AUTH) as driver:
-        for entry in assessment_data:
-            module_name = entry['module_name']
-            project_work = entry['project_work']
-            assessment_type = entry['assessment_type']
-            oral_assessment = entry['oral_assessment']
-
-            driver.execute_query(
-                '''
-                MATCH (m:Module {module_title: $module_name})
-                SET m.project_work = $project_work,
-                    m.assessment_type = $assessment_type,
-                    m.oral_assessment = $oral_assessment
-                RETURN m
-                ''',
-                module_name=module_name,
-                project_work=project_work,
-                assessment_type=assessment_type,
-                oral_assessment=oral_assessment,
-                database_="neo4j"
-            )
-
-
-
-
-def populate_graph():
+    rows = [{
+        'module_name': entry['module_name'],
+        'project_work': entry['project_work'],
+        'assessment_type': entry['assessment_type'],
+        'oral_assessment': entry['oral_assessment'],
+    } for entry in assessment_data]
+
+    if driver is None:
+        with GraphDatabase.driver(URI_NEO4J, auth=AUTH) as d:
+            run_phase(d, 'assessments', ASSESSMENTS_QUERY, lambda: rebatch(rows, batch_size))
+            d.execute_query(BUMP_GRAPH_VERSION_QUERY, database_=DATABASE)
+    else:
+        run_phase(driver, 'assessments', ASSESSMENTS_QUERY, lambda: rebatch(rows, batch_size))
+
+
+def load_graph(d, batch_size=DEFAULT_BATCH_SIZE, occupations=None, occupation_skills=None):
+    """
+    Run every load phase on an open driver. ``occupations`` and
+    ``occupation_skills`` return the batches of those phases; by default they
+    are read from OCCUPATIONS_CSV.
+    """
+    occupations = occupations or (lambda: occupation_batches(batch_size))
+    occupation_skills = occupation_skills or (lambda: occupation_skill_batches(batch_size))
+    create_schema(d)
+
+    # create nodes
+    run_phase(d, 'skills', SKILLS_QUERY, lambda: skill_batches(SKILLS_CSV, 'skill', batch_size))
+    run_phase(d, 'knowledge', SKILLS_QUERY, lambda: skill_batches(KNOWLEDGE_CSV, 'knowledge', batch_size))
+    run_phase(d, 'occupations', OCCUPATIONS_QUERY, occupations)
+    run_phase(d, 'learning outcomes', LEARNING_OUTCOMES_QUERY, lambda: learning_outcome_batches(batch_size))
+    run_phase(d, 'modules', MODULES_QUERY, lambda: module_batches(batch_size))
+
+    # create relationships
+    run_phase(d, 'module -> learning outcome', MODULE_LEARNING_OUTCOME_QUERY,
+              lambda: module_learning_outcome_batches(batch_size))
+    run_phase(d, 'learning outcome -> skill', LEARNING_OUTCOME_SKILL_QUERY,
+              lambda: learning_outcome_skill_batches(batch_size))
+    run_phase(d, 'occupation -> skill', OCCUPATION_SKILL_QUERY, occupation_skills)
+
+    # add scheduling and professors
+    run_phase(d, 'teaching sessions', TEACHING_SESSIONS_QUERY, lambda: teaching_session_batches(batch_size))
+
+    d.execute_query(BUMP_GRAPH_VERSION_QUERY, database_=DATABASE)
+
+
+def populate_graph(batch_size=DEFAULT_BATCH_SIZE):
     with GraphDatabase.driver(URI_NEO4J, auth=AUTH) as d:
-        # create nodes
-        skills_df = pd.read_csv(SKILLS_CSV)
-        for _, row in skills_df.iterrows():
-            add_skill(d, row['title'], 'skill', row['index'], row['description'], row['uri'])
-
-        knowledge_df = pd.read_csv(KNOWLEDGE_CSV)
-        for _, row in knowledge_df.iterrows():
-            add_skill(d, row['title'], 'knowledge', row['index'], row['description'], row['uri'])
-
-        occupations_df = pd.read_csv(OCCUPATIONS_CSV)
-        for _, row in occupations_df.iterrows():
-            add_occupation(d, row['occupation'], row['uri'], row['description'])
-
-        learning_outcomes_df = pd.read_csv(LEARNING_OUTCOMES_CSV)
-        for _, row in learning_outcomes_df.iterrows():
-            add_learning_outcome(d, row['Learning Outcome'], row['Module Title'])
-
-        modules_df = pd.read_csv(MODULES_CSV)
-        for _, row in modules_df.iterrows():
-            course_comment = row['Course_Comment']
-            if pd.isna(course_comment):
-                course_comment = ""
-            add_module(d, row['Individual Name'], row['Course_Link'], row['Course_Title'], row['Course_Description'],
-                    row['Course_Type'], course_comment, row['Course_Competency_to_be_achieved'],
-                    row['Course_Content'])
-
-        # create relationships
-        process_module_learning_outcome_link(d, learning_outcomes_df)
-        process_learning_outcome_skill_link(d, learning_outcomes_df)
-        process_occupation_skill_link(d, occupations_df)
-
-        # add scheduling and professors
-        scheduling_df = pd.read_csv(SCHEDULING_CSV, skipinitialspace=True)
-        for _, row in scheduling_df.iterrows():
-            teaching_session_uuid = add_teaching_session(
-                d,
-                module=row['Individual Name'],
-                group_name=row['Group_Name'],
-                day=row['Day'],
-                time=row['Time'],
-                periodicity=row['Periodicity'],
-                semester=row['Semester'],
-                location=row['Location'],
-                ay=row['AY'])
-
-            link_module_teachingSession(d, module_name=row['Individual Name'],
-                                        teaching_session_uuid=teaching_session_uuid)
-
-            professor_uuid = add_professor(
-                d, professor_name=row['Professor_Name'], professor_surname=row['Professor_Surname'])
-
-            link_teachingSession_professor(d, teaching_session_uuid=teaching_session_uuid,
-                                        professor_uuid=professor_uuid)
-
-
+        load_graph(d, batch_size)
@@ -1,30 +1,31 @@
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import pandas as pd
 from langchain_anthropic import ChatAnthropic
-from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
-
-# Load the data
-modules_df = pd.read_csv('./csv/modules.csv')
-skills_df = pd.read_csv('./csv/skills.csv')
-knowledge_df = pd.read_csv('./csv/knowledge.csv')
-
-# Configure Langchain Community with Anthropic Claude
-llm = ChatAnthropic(temperature=0,
-                    anthropic_api_key="API_KEY",
-                    model_name="claude-3-5-sonnet-20240620")
-
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 
-# Sample function for querying Claude 3.5 using Langchain Community
-def get_learning_outcomes(modules_df, skills_df, knowledge_df):
-    # Constructing the skills and knowledge lists
-    skills_list = "\n".join([f"{row['index']} {row['skill']}" for _, row in skills_df.iterrows()])
-    knowledge_list = "\n".join([f"{row['index']} {row['knowledge']}" for _, row in knowledge_df.iterrows()])
+CSV_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'csv')
+MODULES_CSV = os.path.join(CSV_DIRECTORY, 'modules.csv')
+SKILLS_CSV = os.path.join(CSV_DIRECTORY, 'skills.csv')
+KNOWLEDGE_CSV = os.path.join(CSV_DIRECTORY, 'knowledge.csv')
+OUTPUT_CSV = os.path.join(CSV_DIRECTORY, 'learning_outcomes.csv')
+CHECKPOINT_DIRECTORY = os.path.join(CSV_DIRECTORY, 'learning_outcomes_checkpoints')
+CALLS_LOG = os.path.join(CHECKPOINT_DIRECTORY, 'calls.jsonl')
+OUTPUT_HEADER = 'Module Title, Learning Outcome, Promoted Skill and Knowledge'
+MAX_WORKERS = 4
 
-    # Initializing the output
-    output = 'Module Title, Learning Outcome, Promoted Skill and Knowledge\n'
-
-    # Define the prompt template
-    prompt_template = """
+# The skills and knowledge lists are identical for every module, so they go in
+# a cached system prompt and only the module description changes per call.
+SHARED_PROMPT = """
     Hello,
     I have module descriptions and lists of skill and knowledge concepts. Now I need a table with the learning outcomes that students can expect to gain from the module solely based on the module descriptions and map them to the skill and knowledge concepts they promote.
     To begin, I will provide you with two lists: one containing concepts of skills, and another containing concepts of knowledge. These lists will serve as the reference for your analysis.
@@ -35,54 +36,240 @@ def get_learning_outcomes(modules_df, skills_df, knowledge_df):
     Knowledge:
     {knowledge_list}
 
-    {module_description_prompt}
-
-    Make your analysis in a csv file with the following columns:
+    For each module description I send you, make your analysis in a csv file with the following columns:
     • Module Title
     • Learning Outcome.
     • Promoted Skill and Knowledge. This column must contain skills and knowledge IDs separated by commas.
     Each column value must be enclosed in double quotes.
-    
+
 
     The answer must be the csv file, without any additional information.
     """
 
-    prompt = PromptTemplate(
-        input_variables=["skills_list", "knowledge_list", "module_description_prompt"],
-        template=prompt_template
-    )
 
-    llm_chain = LLMChain(llm=llm, prompt=prompt)
+def build_llm():
+    # Configure Langchain Community with Anthropic Claude
+    return ChatAnthropic(temperature=0,
+                         anthropic_api_key="API_KEY",
+                         model_name="claude-3-5-sonnet-20240620")
 
-    # Loop through each module description
-    for _, module_row in modules_df.iterrows():
-        module_title = module_row['Individual Name']
-        module_text = module_row['Course_Description']
-        module_comment = module_row['Course_Comment']
-        module_objectives = module_row['Course_Competency_to_be_achieved']
-        module_content = module_row['Course_Content']
-
-        # Creating the module description prompt
-        module_description_prompt = f"""
+
+class FakeLLM:
+    """
+    Offline stand-in for the chat model, for benchmarking the pipeline.
+
+    Answers with a few learning outcomes citing random skill and knowledge IDs
+    after a simulated latency, and reports token usage the way Anthropic's
+    prompt caching would: the first call writes the shared prefix, later calls read it.
+    """
+
+    def __init__(self, ids, latency=1.0, failure_rate=0.0, seed=0):
+        self.ids = list(ids)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._cached_prefixes = set()
+
+    def invoke(self, messages):
+        system, human = messages
+        prefix = system.content[0]['text']
+        with self._lock:
+            cache_hit = prefix in self._cached_prefixes
+            self._cached_prefixes.add(prefix)
+            fail = self._random.random() < self.failure_rate
+            ids = [self._random.sample(self.ids, 3) for _ in range(3)]
+        time.sleep(self.latency)
+        if fail:
+            raise RuntimeError('simulated LLM failure')
+
+        title = human.content.split('Module Title:', 1)[1].splitlines()[0].strip()
+        rows = [OUTPUT_HEADER] + [
+            f'"{title}","Learning outcome {i + 1} of {title}","{", ".join(picked)}"' for i, picked in enumerate(ids)
+        ]
+        prefix_tokens = len(prefix) // 4
+        content = '\n'.join(rows)
+        return AIMessage(content=content, usage_metadata={
+            'input_tokens': prefix_tokens + len(human.content) // 4,
+            'output_tokens': len(content) // 4,
+            'total_tokens': prefix_tokens + (len(human.content) + len(content)) // 4,
+            'input_token_details': {'cache_read': prefix_tokens if cache_hit else 0,
+                                    'cache_creation': 0 if cache_hit else prefix_tokens},
+        })
+
+
+def build_system_message(skills_df, knowledge_df):
+    skills_list = "\n".join(f"{row['index']} {row['title']}" for _, row in skills_df.iterrows())
+    knowledge_list = "\n".join(f"{row['index']} {row['title']}" for _, row in knowledge_df.iterrows())
+    text = SHARED_PROMPT.format(skills_list=skills_list, knowledge_list=knowledge_list)
+    return SystemMessage(content=[{'type': 'text', 'text': text, 'cache_control': {'type': 'ephemeral'}}])
+
+
+def module_description_prompt(module_row):
+    return f"""
         This is the module description:
-        Module Title: {module_title}
-        Module Text: {module_text}
-        Module Comment: {module_comment}
-        Module Objectives: {module_objectives}
-        Module Content: {module_content}
+        Module Title: {module_row['Individual Name']}
+        Module Text: {module_row['Course_Description']}
+        Module Comment: {module_row['Course_Comment']}
+        Module Objectives: {module_row['Course_Competency_to_be_achieved']}
+        Module Content: {module_row['Course_Content']}
         """
 
-        # Running the LLM chain to generate the response
-        response = llm_chain.invoke({
-            "skills_list": skills_list,
-            "knowledge_list": knowledge_list,
-            "module_description_prompt": module_description_prompt,
-        })
-        response = response['text'].splitlines()
-        output += '\n'.join(response[1:]) + '\n'
-    with open('./csv/learning_outcomes.csv', 'w') as file:
-        file.write(output)
 
+def run_fingerprint(llm, system_message):
+    """Hash of the model, its temperature and the shared prompt, which every checkpoint depends on."""
+    model = getattr(llm, 'model', None) or type(llm).__name__
+    text = system_message.content[0]['text']
+    return hashlib.sha1(f'{model}\n{getattr(llm, "temperature", None)}\n{text}'.encode('utf-8')).hexdigest()
+
+
+def checkpoint_path(module_row, fingerprint):
+    # Keyed by the full prompt, so a changed prompt, model or module description is analyzed again.
+    key = f'{fingerprint}\n{module_description_prompt(module_row)}'
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return os.path.join(CHECKPOINT_DIRECTORY, f'{digest}.csv')
+
+
+def write_atomic(path, text):
+    tmp_path = f'{path}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        file.write(text)
+    os.replace(tmp_path, path)
+
+
+def response_rows(content):
+    # The first line of every answer is the CSV header.
+    lines = [line for line in content.splitlines() if line.strip()]
+    return '\n'.join(lines[1:]) + '\n'
+
+
+class CallLog:
+    """Appends one JSON line per LLM call with its latency and token usage."""
+
+    def __init__(self, path):
+        self.path = path
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def record(self, module_title, latency, usage, error=None):
+        details = usage.get('input_token_details') or {}
+        entry = {
+            'module': module_title,
+            'latency': round(latency, 3),
+            'input_tokens': usage.get('input_tokens', 0),
+            'output_tokens': usage.get('output_tokens', 0),
+            'cache_read_tokens': details.get('cache_read', 0),
+            'cache_creation_tokens': details.get('cache_creation', 0),
+            'error': error,
+        }
+        with self._lock:
+            self.calls.append(entry)
+            with open(self.path, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(entry) + '\n')
+
+    def summary(self):
+        succeeded = [call for call in self.calls if call['error'] is None]
+        latencies = sorted(call['latency'] for call in succeeded)
+        if not latencies:
+            return f'{len(self.calls)} calls, none succeeded'
+        input_tokens = sum(call['input_tokens'] for call in succeeded)
+        cache_read = sum(call['cache_read_tokens'] for call in succeeded)
+        cache_share = cache_read / input_tokens if input_tokens else 0
+        return (f'{len(succeeded)}/{len(self.calls)} calls succeeded, '
+                f'latency p50 {latencies[len(latencies) // 2]:.2f}s max {latencies[-1]:.2f}s, '
+                f'{input_tokens} input tokens ({cache_share:.0%} read from the prompt cache), '
+                f'{sum(call["output_tokens"] for call in succeeded)} output tokens')
+
+
+def analyze_module(llm, system_message, module_row, log, fingerprint):
+    module_title = module_row['Individual Name']
+    start = time.perf_counter()
+    try:
+        response = llm.invoke([system_message, HumanMessage(content=module_description_prompt(module_row))])
+    except Exception as e:
+        log.record(module_title, time.perf_counter() - start, {}, error=str(e))
+        raise
+    log.record(module_title, time.perf_counter() - start, response.usage_metadata or {})
+    write_atomic(checkpoint_path(module_row, fingerprint), response_rows(response.content))
+    return module_title
+
+
+def get_learning_outcomes(modules_df, skills_df, knowledge_df, llm, max_workers=MAX_WORKERS):
+    """
+    Extract learning outcomes for every module, at most max_workers calls at a time.
+
+    Each module's rows are checkpointed as soon as they arrive, and modules
+    with a checkpoint for the same model and prompts are skipped, so a failed
+    or interrupted run can simply be started again. The output CSV is
+    assembled from the checkpoints once all modules are done.
+    """
+    os.makedirs(CHECKPOINT_DIRECTORY, exist_ok=True)
+    system_message = build_system_message(skills_df, knowledge_df)
+    fingerprint = run_fingerprint(llm, system_message)
+    log = CallLog(CALLS_LOG)
+
+    pending = [row for _, row in modules_df.iterrows() if not os.path.exists(checkpoint_path(row, fingerprint))]
+    print(f'{len(modules_df) - len(pending)} modules already checkpointed, {len(pending)} to analyze')
+
+    start = time.perf_counter()
+    failed = []
+    if pending:
+        # A single call first, so the cached prefix exists before the others fan out.
+        try:
+            analyze_module(llm, system_message, pending[0], log, fingerprint)
+        except Exception as e:
+            failed.append(pending[0]['Individual Name'])
+            print(f'{pending[0]["Individual Name"]} failed: {e}')
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(analyze_module, llm, system_message, row, log, fingerprint): row['Individual Name']
+                for row in pending[1:]
+            }
+            for done, future in enumerate(as_completed(futures), start=2):
+                try:
+                    future.result()
+                except Exception as e:
+                    failed.append(futures[future])
+                    print(f'{futures[future]} failed: {e}')
+                else:
+                    print(f'[{done}/{len(pending)}] {futures[future]}')
+
+    elapsed = time.perf_counter() - start
+    print(f'Analyzed {len(pending) - len(failed)} modules in {elapsed:.1f}s; {log.summary()}')
+    if failed:
+        print(f'{len(failed)} modules failed; run again to retry them: {", ".join(failed)}')
+        return False
+
+    output = io.StringIO()
+    output.write(OUTPUT_HEADER + '\n')
+    for _, module_row in modules_df.iterrows():
+        with open(checkpoint_path(module_row, fingerprint), encoding='utf-8') as file:
+            output.write(file.read())
+    write_atomic(OUTPUT_CSV, output.getvalue())
+    return True
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Extract module learning outcomes and their ESCO skills.')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, help='concurrent LLM calls')
+    parser.add_argument('--limit', type=int, help='only analyze the first N modules')
+    parser.add_argument('--fake', action='store_true', help='use an offline fake LLM instead of Anthropic')
+    parser.add_argument('--fake-latency', type=float, default=1.0, help='seconds per fake LLM call')
+    parser.add_argument('--fake-failure-rate', type=float, default=0.0, help='share of fake LLM calls that fail')
+    args = parser.parse_args()
+
+    # Load the data
+    modules_df = pd.read_csv(MODULES_CSV)
+    skills_df = pd.read_csv(SKILLS_CSV)
+    knowledge_df = pd.read_csv(KNOWLEDGE_CSV)
+    if args.limit:
+        modules_df = modules_df.head(args.limit)
+
+    if args.fake:
+        llm = FakeLLM(list(skills_df['index']) + list(knowledge_df['index']),
+                      latency=args.fake_latency, failure_rate=args.fake_failure_rate)
+    else:
+        llm = build_llm()
 
-# call the function
-get_learning_outcomes(modules_df, skills_df, knowledge_df)
\ No newline at end of file
+    get_learning_outcomes(modules_df, skills_df, knowledge_df, llm, max_workers=args.workers)
@@ -1,5 +1,14 @@
 import streamlit as st
 from utils.auth import is_authenticated
+from utils.queries import warm_queries_in_background
+
+
+@st.cache_resource
+def warm_up_queries():
+    # Runs once per server process; plans every registered Cypher query.
+    warm_queries_in_background()
+    return True
+
 
 is_auth = is_authenticated()
 logout_page = st.Page(
@@ -32,6 +41,7 @@ account_pages = [logout_page]
 student_pages = [student_career, work_experience, study_planner]
 not_auth_pages = [login, register]
 if is_authenticated():
+    warm_up_queries()
     pg = st.navigation(
         {"Account": account_pages} | {"Student Prefences and Career": student_pages}
     )
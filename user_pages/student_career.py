@@ -2,6 +2,7 @@ import streamlit as st
 from utils.neo4j_methods import Neo4jMethods
 from utils.supabase_methods import get_student, update_student, create_student
 from utils.models import Student
+from utils.typeahead import occupation_options
 
 MANDATORY_MODULES = [
     "Alignment of Business and IT",
@@ -35,16 +36,22 @@ project_type_labels = {
 
 # student -> desired_lecturers, available_days, individual_or_group_exam, oral_exam_or_not, project_work
 
+# The career path picker sits outside the form so a search applies as soon as
+# it is entered; it only lists the matches besides what is already selected.
+if "desired_jobs" not in st.session_state:
+    st.session_state.desired_jobs = [job for job in student.desired_jobs if job in occupations]
+career_search = st.text_input("Search career paths", placeholder="Type an occupation, e.g. data analyst")
+desired_jobs = st.multiselect(
+    "Select your career path",
+    occupation_options(career_search, st.session_state.desired_jobs),
+    placeholder="Choose one or more options",
+    key="desired_jobs",
+)
+
 with st.form("my_form"):
     name = st.text_input("Name", value=student.name)
     surname = st.text_input("Surname", value=student.surname)
     semesters = st.slider("Expected Semesters", 3, 10, value=student.expected_semesters)
-    desired_jobs = st.multiselect(
-        "Select your career path",
-        occupations,
-        placeholder="Choose one or more options",
-        default=filter(lambda i: i in student.desired_jobs, occupations),
-    )
     taken_courses = st.multiselect(
         "Courses already taken",
         courses,
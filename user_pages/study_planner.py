@@ -1,11 +1,19 @@
 import asyncio
+import time
+
 import streamlit as st
-from assistant.agent_workflow import execute_agent_workflow
-from utils.supabase_methods import get_student, has_work_experience, get_work_experience
+from assistant.agent_workflow import build_initial_state, stream_agent_workflow
+from assistant.retrieval_prefetch import prefetch_retrievals
+from utils.supabase_methods import get_student, get_work_experience
 
 student = get_student()
 work_experiences = get_work_experience()
-has_past_experience = has_work_experience()
+has_past_experience = bool(work_experiences)
+
+# Compute every strategy's module list while the student picks one; the
+# workflow then finds it in the retrieval cache.
+if student is not None:
+    prefetch_retrievals(build_initial_state(student, None), work_experiences)
 
 st.title("Get a Study Plan")
 
@@ -46,16 +54,33 @@ with col4:
         st.session_state.user_msg = "Suggest me some modules based on a balanced approach of past work, future goals, and preferences."
         st.session_state.should_generate = True
 
-# If a button was clicked, show spinner and generate plan
+# Rendering every delta would redraw the page constantly; redraw at most this often.
+RENDER_INTERVAL_SECONDS = 0.1
+
+
+async def stream_study_plan(placeholder):
+    sections = {}
+    last_render = 0.0
+    async for chunk in stream_agent_workflow(
+        user_msg=st.session_state.user_msg,
+        retrieval_strategy=st.session_state.retrieval_strategy,
+    ):
+        if chunk.metrics is not None:
+            placeholder.empty()
+            return chunk.final, chunk.metrics
+        sections[chunk.agent] = sections.get(chunk.agent, "") + chunk.delta
+        if time.monotonic() - last_render >= RENDER_INTERVAL_SECONDS:
+            last_render = time.monotonic()
+            placeholder.markdown("\n\n".join(f"**{agent}**\n\n{text}" for agent, text in sections.items()))
+    return None, None
+
+
+# If a button was clicked, stream the agents' output while the plan is generated
 if st.session_state.should_generate:
     with st.spinner("Generating study plan... please wait..."):
-        content = asyncio.run(
-            execute_agent_workflow(
-                user_msg=st.session_state.user_msg,
-                retrieval_strategy=st.session_state.retrieval_strategy,
-            )
-        )
+        content, metrics = asyncio.run(stream_study_plan(st.empty()))
     st.session_state.study_plan_output = content
+    st.session_state.study_plan_metrics = metrics
     st.session_state.should_generate = False
 
 if st.session_state.study_plan_output:
@@ -69,4 +94,8 @@ if st.session_state.study_plan_output:
 
     strategy_name = strategy_labels.get(st.session_state.retrieval_strategy, "Study Plan")
     st.success(f"{strategy_name} generated successfully!")
+    metrics = st.session_state.get("study_plan_metrics")
+    if metrics and metrics["time_to_first_token"] is not None:
+        st.caption(f"First output after {metrics['time_to_first_token']:.1f}s, "
+                   f"complete after {metrics['total_time']:.1f}s")
     st.write(st.session_state.study_plan_output)
\ No newline at end of file
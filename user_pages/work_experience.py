@@ -1,24 +1,24 @@
 from datetime import date
 import streamlit as st
 
-from utils.neo4j_methods import Neo4jMethods
 from utils.supabase_methods import (
     get_work_experience,
     add_work_experience,
     delete_work_experience,
 )
+from utils.typeahead import occupation_options
 
 st.title("Working Career Details")
 work_experiences = get_work_experience()
-neo4j_methods = Neo4jMethods()
-occupations = neo4j_methods.get_occupations()
 with st.expander("Add Work Experience"):
     current_occ = st.checkbox("I currently work here")
     if current_occ:
         st.success("You are currently working here")
+    # Outside the form, so the positions follow a search without submitting it.
+    position_search = st.text_input("Search positions", placeholder="Type an occupation, e.g. software developer")
     with st.form("my_form", clear_on_submit=True):
         company = st.text_input("Company")
-        position = st.selectbox("Position", occupations, placeholder="Choose an option")
+        position = st.selectbox("Position", occupation_options(position_search), placeholder="Choose an option")
         start = st.date_input(
             "Start Date",
             date.today(),
@@ -35,7 +35,7 @@ with st.expander("Add Work Experience"):
         part_time = st.checkbox("Part-Time")
         submitted = st.form_submit_button("Submit")
         if submitted:
-            if len(company) < 1 or len(position) < 1:
+            if len(company) < 1 or not position:
                 st.error("Company and Position are required")
             else:
                 add_work_experience(
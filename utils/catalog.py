@@ -0,0 +1,131 @@
+import threading
+import time
+from types import MappingProxyType
+
+import streamlit as st
+
+from utils.graph_backend import get_graph_backend
+from utils.queries import run_query
+
+DEFAULT_TTL_SECONDS = 300
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class CatalogSnapshot:
+    """Read-only view of modules, teaching sessions, professors and occupations."""
+
+    def __init__(self, version, modules, occupations, professors):
+        self.version = version
+        self.modules = _freeze(modules)
+        self.occupations = _freeze(occupations)
+        self.professors = tuple(professors)
+        self.checked_at = time.monotonic()
+        self.modules_by_title = MappingProxyType({m["module_title"]: m for m in self.modules})
+        self.modules_by_individual_name = MappingProxyType({m["individual_name"]: m for m in self.modules})
+
+    @property
+    def module_titles(self):
+        return tuple(m["module_title"] for m in self.modules)
+
+    @property
+    def occupation_titles(self):
+        return tuple(o["occupation"] for o in self.occupations)
+
+    def __repr__(self):
+        return (f"CatalogSnapshot(version={self.version!r}, modules={len(self.modules)}, "
+                f"occupations={len(self.occupations)}, professors={len(self.professors)})")
+
+
+def fetch_graph_version():
+    """Return the marker that changes whenever the catalog in the graph changes."""
+    return get_graph_backend().graph_version()
+
+
+def bump_graph_version():
+    """Mark the catalog as changed so running processes reload their snapshot."""
+    return run_query("bump_graph_version").records[0]["version"]
+
+
+def load_snapshot():
+    version = fetch_graph_version()
+    catalog = get_graph_backend().load_catalog()
+    return CatalogSnapshot(version, catalog["modules"], catalog["occupations"], catalog["professors"])
+
+
+class CatalogCache:
+    """
+    Serves the current snapshot from memory.
+
+    Only the very first call waits for Neo4j. Once the snapshot is older than
+    the TTL, a background thread compares the graph version marker and
+    reloads the catalog only if it changed; readers keep the previous
+    snapshot meanwhile.
+    """
+
+    def __init__(self, ttl_seconds):
+        self.ttl_seconds = ttl_seconds
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def get(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = load_snapshot()
+                return self._snapshot
+        if time.monotonic() - snapshot.checked_at > self.ttl_seconds:
+            self._refresh_in_background()
+        return snapshot
+
+    def invalidate(self):
+        """Reload on the next background check regardless of the TTL."""
+        snapshot = self._snapshot
+        if snapshot is not None:
+            snapshot.checked_at = float("-inf")
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh, name="catalog-refresh", daemon=True).start()
+
+    def _refresh(self):
+        try:
+            current = self._snapshot
+            if fetch_graph_version() == current.version:
+                current.checked_at = time.monotonic()
+            else:
+                self._snapshot = load_snapshot()
+        except Exception as e:
+            # Keep serving the old snapshot and retry after another TTL.
+            self._snapshot.checked_at = time.monotonic()
+            print("Error refreshing catalog snapshot: ", e)
+        finally:
+            self._refreshing = False
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_catalog_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = CatalogCache(float(st.secrets.get("CATALOG_TTL_SECONDS", DEFAULT_TTL_SECONDS)))
+    return _cache
+
+
+def get_catalog():
+    """Return the process-wide catalog snapshot."""
+    return get_catalog_cache().get()
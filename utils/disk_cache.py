@@ -0,0 +1,122 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+
+class DiskCache:
+    """
+    Small key/value store in a SQLite file.
+
+    Values are pickled. When ``max_bytes`` is set, the least recently read
+    entries are evicted once the stored values grow beyond it.
+    """
+
+    def __init__(self, path, max_bytes=None):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self._connection.commit()
+
+    def get(self, key, default=None):
+        return self.get_many([key]).get(key, default)
+
+    def get_many(self, keys):
+        """Return a dict with the cached values for the keys that are present."""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            # SQLite limits the number of bound variables per statement.
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._connection.execute(
+                    f"SELECT key, value FROM entries WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                found.update((key, pickle.loads(value)) for key, value in rows)
+            if found:
+                now = time.time()
+                self._connection.executemany(
+                    "UPDATE entries SET accessed = ? WHERE key = ?", [(now, key) for key in found]
+                )
+                self._connection.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def set(self, key, value):
+        self.set_many({key: value})
+
+    def set_many(self, items):
+        now = time.time()
+        rows = []
+        for key, value in items.items():
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            rows.append((key, blob, len(blob), now))
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, size, accessed) VALUES (?, ?, ?, ?)", rows
+            )
+            self._evict()
+            self._connection.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self._connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._connection.commit()
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM entries WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)
+            )
+            self._connection.commit()
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute("DELETE FROM entries")
+            self._connection.commit()
+
+    def _evict(self):
+        if self.max_bytes is None:
+            return
+        total = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed = 0
+        victims = []
+        for key, size in self._connection.execute("SELECT key, size FROM entries ORDER BY accessed").fetchall():
+            if total - freed <= self.max_bytes:
+                break
+            victims.append((key,))
+            freed += size
+        self._connection.executemany("DELETE FROM entries WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,136 @@
+import argparse
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from assistant.llm import embeddings
+from utils.catalog import bump_graph_version
+from utils.disk_cache import DiskCache
+from utils.neo4j_driver import execute_query
+from utils.queries import run_query
+
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_WORKERS = 4
+DEFAULT_CACHE_PATH = ".cache/embeddings.sqlite"
+WRITE_BATCH_SIZE = 500
+
+
+class EmbeddingTarget:
+    """A node label whose text property is embedded into a vector property."""
+
+    def __init__(self, label, text_property, embedding_property, index_name, read_query, write_query):
+        self.label = label
+        self.text_property = text_property
+        self.embedding_property = embedding_property
+        self.index_name = index_name
+        self.read_query = read_query
+        self.write_query = write_query
+
+    def format_text(self, text):
+        # Same text layout Neo4jVector.from_existing_graph embedded, so vectors
+        # written by earlier runs stay comparable with new ones.
+        return f"\n{self.text_property}:{text or ''}"
+
+
+TARGETS = [
+    EmbeddingTarget("Skill", "description", "embeddingDescription", "skillDescription",
+                    "skill_embedding_texts", "set_skill_embeddings"),
+    EmbeddingTarget("LearningOutcome", "learning_outcome", "embeddingLearningOutcome", "learningOutcomeIndex",
+                    "learning_outcome_embedding_texts", "set_learning_outcome_embeddings"),
+]
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _batches(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _model_name():
+    return getattr(embeddings, "model", type(embeddings).__name__)
+
+
+def embed_texts(texts, cache, batch_size, workers):
+    """
+    Return {hash: vector} for the given texts, embedding only those missing
+    from the cache, in batches spread over concurrent workers.
+    """
+    model = _model_name()
+    by_hash = {text_hash(text): text for text in texts}
+    prefix = f"{model}:"
+    cached = cache.get_many(prefix + h for h in by_hash)
+    vectors = {key[len(prefix):]: vector for key, vector in cached.items()}
+
+    missing = [h for h in by_hash if h not in vectors]
+    batches = list(_batches(missing, batch_size))
+
+    def embed(batch):
+        return batch, embeddings.embed_documents([by_hash[h] for h in batch])
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for batch, batch_vectors in executor.map(embed, batches):
+            fresh = dict(zip(batch, batch_vectors))
+            cache.set_many({prefix + h: vector for h, vector in fresh.items()})
+            vectors.update(fresh)
+    return vectors, len(missing)
+
+
+def ensure_vector_index(target, dimensions):
+    # Index DDL cannot take parameters, hence the formatted statement.
+    execute_query(
+        f"CREATE VECTOR INDEX {target.index_name} IF NOT EXISTS "
+        f"FOR (n:{target.label}) ON (n.{target.embedding_property}) "
+        f"OPTIONS {{indexConfig: {{`vector.dimensions`: {int(dimensions)}, "
+        f"`vector.similarity_function`: 'cosine'}}}}"
+    )
+
+
+def refresh_target(target, cache, batch_size, workers):
+    nodes = run_query(target.read_query).records
+    changed = []
+    for record in nodes:
+        text = target.format_text(record["text"])
+        digest = text_hash(text)
+        if digest != record["hash"]:
+            changed.append((record["id"], text, digest))
+
+    start = time.perf_counter()
+    vectors, embedded = embed_texts([text for _, text, _ in changed], cache, batch_size, workers)
+    embed_seconds = time.perf_counter() - start
+
+    rows = [{"id": node_id, "embedding": vectors[digest], "hash": digest} for node_id, _, digest in changed]
+    for batch in _batches(rows, WRITE_BATCH_SIZE):
+        run_query(target.write_query, rows=batch)
+    if rows:
+        ensure_vector_index(target, len(rows[0]["embedding"]))
+
+    throughput = embedded / embed_seconds if embedded and embed_seconds > 0 else 0.0
+    print(f"{target.label}: {len(nodes)} nodes, {len(changed)} changed, {embedded} embedded, "
+          f"{len(changed) - embedded} from cache, {throughput:.1f} texts/s")
+    return {"nodes": len(nodes), "changed": len(changed), "embedded": embedded, "texts_per_second": throughput}
+
+
+def refresh_embeddings(batch_size=None, workers=None, cache_path=None):
+    """Re-embed only the Skill and LearningOutcome texts that changed since the last run."""
+    batch_size = batch_size or int(st.secrets.get("EMBEDDING_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+    workers = workers or int(st.secrets.get("EMBEDDING_WORKERS", DEFAULT_WORKERS))
+    cache = DiskCache(cache_path or st.secrets.get("EMBEDDING_CACHE_PATH", DEFAULT_CACHE_PATH))
+
+    report = {target.label: refresh_target(target, cache, batch_size, workers) for target in TARGETS}
+    if any(result["changed"] for result in report.values()):
+        bump_graph_version()
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embed new or changed Skill and LearningOutcome texts.")
+    parser.add_argument("--batch-size", type=int)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--cache-path")
+    args = parser.parse_args()
+    refresh_embeddings(args.batch_size, args.workers, args.cache_path)
@@ -0,0 +1,88 @@
+import threading
+from typing import Protocol
+
+PREFERENCE_FEATURES = ("day_match", "lecturer_match", "assessment_match", "project_work", "oral_assessment")
+
+
+class GraphBackend(Protocol):
+    """
+    The reads Neo4jMethods and the catalog need from a graph store.
+
+    Implementations: Neo4jBackend (utils.neo4j_backend), which runs the
+    registered Cypher queries, and InMemoryGraph (utils.memory_graph), which
+    answers from indexes built from esco/csv. Results are plain dicts and
+    lists in the shapes documented on each method.
+    """
+
+    def graph_version(self):
+        """A tuple that changes whenever the catalog changes."""
+
+    def load_catalog(self):
+        """
+        Dict with "modules" (each with its teaching sessions and their
+        professors), "occupations" and "professors" ("name surname" strings),
+        as CatalogSnapshot takes them.
+        """
+
+    def search_occupation(self, search):
+        """Occupation titles matching free text, best match first."""
+
+    def teaching_sessions_by_modules(self, modules, taken_modules):
+        """
+        The given modules plus the mandatory modules not taken yet, each as
+        {module_title, module_type, module_description, teaching_session}.
+        Modules without teaching sessions are left out.
+        """
+
+    def modules_by_occupation(self, occupations, taken_modules):
+        """
+        One dict per (module, occupation) pair with the module, the supporting
+        learning outcomes, the supported skills and the occupation, most
+        supported skills first. Taken modules are left out.
+        """
+
+    def extra_modules(self):
+        """The thesis-related modules as {module_title, module_type, teaching_session}."""
+
+    def preference_features(self, names, desired_lecturers, available_days, accepted_types):
+        """Feature vector (see PREFERENCE_FEATURES) of every module named by individual name or title."""
+
+    def modules_by_preferences(self, taken_modules, desired_lecturers, available_days, assessment_type,
+                               project_work, oral_assessment):
+        """Every module not taken as {module, preference_score}, highest score first."""
+
+    def refresh_indexes(self):
+        """Bring derived data such as embeddings and skill matches up to date."""
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_graph_backend():
+    """
+    Process-wide backend chosen by the GRAPH_BACKEND secret: "neo4j" (default)
+    or "memory" for an InMemoryGraph loaded from esco/csv.
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                import streamlit as st
+
+                if st.secrets.get("GRAPH_BACKEND", "neo4j") == "memory":
+                    from utils.memory_graph import InMemoryGraph
+
+                    _backend = InMemoryGraph.load()
+                else:
+                    from utils.neo4j_backend import Neo4jBackend
+
+                    _backend = Neo4jBackend()
+    return _backend
+
+
+def use_graph_backend(backend):
+    """Replace the process-wide backend, e.g. with an InMemoryGraph in tests and benchmarks."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
@@ -1,8 +1,28 @@
+import argparse
+import csv
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
-from collections import defaultdict
 
-from utils.supabase_methods import get_work_experience
+import numpy as np
+
+
+def _month_index(period):
+    """Months since year 0 for a "%Y-%m" string."""
+    return int(period[:4]) * 12 + int(period[5:7]) - 1
+
+
+def _rank_student(args):
+    # Module-level so it can be pickled for the process pool.
+    weights, max_experience_years, jobs = args
+    ranker = JobRanker(weights, max_experience_years)
+    return ranker._rank_jobs(ranker._convert_job_list(jobs))
+
+
+def _first_day(month_indices):
+    """Days since the epoch of the first day of each month index."""
+    return (month_indices - 1970 * 12).astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
 
 
 class JobRanker:
@@ -21,147 +41,77 @@ class JobRanker:
         """
         Rank jobs based on scores calculated using the algorithm.
 
+        Work periods are parsed once into integer month indices and every
+        step after that (filtering, merging, normalization, scoring) runs on
+        NumPy arrays.
+
         Args:
             jobs (list): List of job records.
 
         Returns:
             list: Ranked list of jobs with scores in descending order.
         """
-        # Step 1: Initialize an empty dictionary to aggregate experiences by job title
-        merged_jobs = defaultdict(
-            lambda: {
-                "work_periods": [],
-                "time_since_last_work": float("inf"),
-                "job_type": "part-time",
-            }
+        # Step 1: Parse the periods once into month indices
+        starts = np.fromiter((_month_index(job["work_period"]["start"]) for job in jobs), np.int64, len(jobs))
+        ends = np.fromiter((_month_index(job["work_period"]["end"]) for job in jobs), np.int64, len(jobs))
+        recency = np.fromiter((job["time_since_last_work"] for job in jobs), np.float64, len(jobs))
+        full_time = np.fromiter((job["job_type"] == "full-time" for job in jobs), np.bool_, len(jobs))
+
+        # Step 2: Filter jobs to include only experiences from the last max_experience_years.
+        # A period ending in month m ends after the cutoff date iff m is past the cutoff month.
+        cutoff_date = datetime.now() - relativedelta(years=self.max_experience_years)
+        keep = ends > cutoff_date.year * 12 + cutoff_date.month - 1
+        kept = np.flatnonzero(keep)
+        if kept.size == 0:
+            return []
+
+        # Step 3: Group jobs by title, in order of first appearance
+        title_codes = {}
+        groups = np.fromiter(
+            (title_codes.setdefault(jobs[i]["title"], len(title_codes)) for i in kept), np.int64, kept.size
+        )
+        titles = list(title_codes)
+        n_titles = len(titles)
+        starts, ends, recency, full_time = starts[keep], ends[keep], recency[keep], full_time[keep]
+
+        time_since_last_work = np.full(n_titles, np.inf)
+        np.minimum.at(time_since_last_work, groups, recency)
+        is_full_time = np.zeros(n_titles, dtype=np.bool_)
+        np.logical_or.at(is_full_time, groups, full_time)
+
+        # Merge overlapping or contiguous periods (start <= previous end + 1 month) per title.
+        # lexsort is stable, so periods with equal starts keep their input order.
+        order = np.lexsort((starts, groups))
+        groups, starts, ends = groups[order], starts[order], ends[order]
+        span = int(ends.max() - min(ends.min(), starts.min())) + 2
+        running_end = np.maximum.accumulate(ends + groups * span) - groups * span
+        new_period = np.ones(groups.size, dtype=np.bool_)
+        new_period[1:] = (groups[1:] != groups[:-1]) | (starts[1:] > running_end[:-1] + 1)
+        period_heads = np.flatnonzero(new_period)
+        period_starts = starts[period_heads]
+        period_ends = np.maximum.reduceat(ends, period_heads)
+
+        # Step 4: Compute durations in days and the normalization factors
+        period_days = _first_day(period_ends) - _first_day(period_starts)
+        days = np.bincount(groups[period_heads], weights=period_days, minlength=n_titles)
+        max_duration = max(days.max(), 0)
+        max_recency = max(time_since_last_work.max(), 0)
+
+        # Step 5: Score every title
+        normalized_duration = days / 30.0 / max_duration if max_duration > 0 else np.zeros(n_titles)
+        normalized_recency = (
+            (max_recency - time_since_last_work) / max_recency if max_recency > 0 else np.zeros(n_titles)
+        )
+        job_type_score = np.where(is_full_time, 1.0, 0.5)
+        scores = (
+            self.weights["work_period"] * normalized_duration
+            + self.weights["recency"] * normalized_recency
+            + self.weights["job_type"] * job_type_score
         )
 
-        # Step 2: Filter jobs to include only experiences from the last max_experience_years
-        current_date = datetime.now()
-        cutoff_date = current_date - relativedelta(years=self.max_experience_years)
-
-        filtered_jobs = [
-            job
-            for job in jobs
-            if datetime.strptime(job["work_period"]["end"], "%Y-%m") > cutoff_date
-        ]
-
-        # Step 3: Merge jobs with the same title
-        for job in filtered_jobs:
-            title = job["title"]
-            work_period = job["work_period"]
-            time_since_last_work = job["time_since_last_work"]
-            job_type = job["job_type"]
-
-            # Update merged_jobs
-            merged = merged_jobs[title]
-            merged["work_periods"].append(work_period)
-            merged["time_since_last_work"] = min(
-                merged["time_since_last_work"], time_since_last_work
-            )
-            if job_type == "full-time":
-                merged["job_type"] = "full-time"
-
-        # Merge work periods for each title
-        for title, data in merged_jobs.items():
-            periods = sorted(
-                data["work_periods"],
-                key=lambda x: datetime.strptime(x["start"], "%Y-%m"),
-            )
-            merged_periods = []
-            current_start = None
-            current_end = None
-
-            for period in periods:
-                start = datetime.strptime(period["start"], "%Y-%m")
-                end = datetime.strptime(period["end"], "%Y-%m")
-
-                if current_start is None:
-                    current_start = start
-                    current_end = end
-                elif start <= current_end + relativedelta(
-                    months=1
-                ):  # Overlapping or contiguous
-                    current_end = max(current_end, end)
-                else:
-                    # Append the merged period as strings
-                    merged_periods.append(
-                        {
-                            "start": current_start.strftime("%Y-%m"),
-                            "end": current_end.strftime("%Y-%m"),
-                        }
-                    )
-                    current_start = start
-                    current_end = end
-
-            if current_start and current_end:
-                # Append the last merged period as strings
-                merged_periods.append(
-                    {
-                        "start": current_start.strftime("%Y-%m"),
-                        "end": current_end.strftime("%Y-%m"),
-                    }
-                )
-
-            merged_jobs[title]["work_periods"] = merged_periods
-
-        # Step 4: Compute normalization factors
-        max_duration = 0
-        max_recency = 0
-
-        for data in merged_jobs.values():
-            durations = [
-                (
-                    datetime.strptime(period["end"], "%Y-%m")
-                    - datetime.strptime(period["start"], "%Y-%m")
-                ).days
-                for period in data["work_periods"]
-            ]
-            max_duration = max(max_duration, sum(durations))
-            max_recency = max(max_recency, data["time_since_last_work"])
-
-        # Step 5: Initialize scores
-        scores = []
-
-        for title, data in merged_jobs.items():
-            # Calculate duration in months
-            total_duration = (
-                sum(
-                    (
-                        datetime.strptime(period["end"], "%Y-%m")
-                        - datetime.strptime(period["start"], "%Y-%m")
-                    ).days
-                    for period in data["work_periods"]
-                )
-                / 30.0
-            )
-            normalized_duration = (
-                total_duration / max_duration if max_duration > 0 else 0
-            )
-
-            # Normalize recency
-            normalized_recency = (
-                (max_recency - data["time_since_last_work"]) / max_recency
-                if max_recency > 0
-                else 0
-            )
-
-            # Job type score
-            job_type_score = 1.0 if data["job_type"] == "full-time" else 0.5
-
-            # Calculate total score
-            score = (
-                self.weights["work_period"] * normalized_duration
-                + self.weights["recency"] * normalized_recency
-                + self.weights["job_type"] * job_type_score
-            )
-            scores.append((title, score))
-
-        # Step 7: Sort scores by score in descending order
-        ranked_jobs = sorted(scores, key=lambda x: x[1], reverse=True)
-
-        # Step 8: Return the sorted list of scores
-        return ranked_jobs
+        # Step 6: Sort scores in descending order, ties in order of first appearance
+        ranking = np.argsort(-scores, kind="stable")
+        return [(titles[i], score) for i, score in zip(ranking.tolist(), scores[ranking].tolist())]
 
     def _convert_job_list(self, jobs):
         """
@@ -210,13 +160,87 @@ class JobRanker:
 
         return converted_jobs
 
-    def get_ranked_jobs(self):
+    def get_ranked_jobs(self, jobs=None):
         """
         Get the ranked jobs based on the current state of the JobRanker.
 
+        Args:
+            jobs (list): work_experience rows already fetched; fetched for the current user if None.
+
         Returns:
             list: Ranked list of jobs with scores in descending order.
         """
-        jobs = get_work_experience()
+        if jobs is None:
+            from utils.supabase_methods import get_work_experience
+
+            jobs = get_work_experience()
         converted_jobs = self._convert_job_list(jobs)
         return self._rank_jobs(converted_jobs)
+
+    def rank_cohort(self, jobs_by_user, processes=None):
+        """
+        Rank the work experience of many students.
+
+        Args:
+            jobs_by_user (dict): work_experience rows keyed by user id.
+            processes (int): Rank on a pool of this many processes instead of in-process.
+
+        Returns:
+            dict: Ranked list of (occupation, score) per user id.
+        """
+        user_ids = list(jobs_by_user)
+        tasks = [(self.weights, self.max_experience_years, jobs_by_user[user_id]) for user_id in user_ids]
+        if processes and processes > 1:
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                chunksize = max(1, len(tasks) // (processes * 4))
+                ranked = list(executor.map(_rank_student, tasks, chunksize=chunksize))
+        else:
+            ranked = [_rank_student(task) for task in tasks]
+        return dict(zip(user_ids, ranked))
+
+    def get_cohort_ranked_jobs(self, client, user_ids=None, processes=None):
+        """
+        Rank the jobs of the given students, or of every student, from one bulk fetch.
+
+        Args:
+            client: Supabase client allowed to read every student's rows, e.g.
+                utils.supabase_batch.get_service_client().
+
+        Returns:
+            list: ranked_occupation_table rows.
+        """
+        from utils.supabase_batch import get_work_experience_for_users
+
+        jobs_by_user = defaultdict(list)
+        for row in get_work_experience_for_users(client, user_ids):
+            jobs_by_user[row["user_id"]].append(row)
+        return ranked_occupation_table(self.rank_cohort(jobs_by_user, processes))
+
+
+def ranked_occupation_table(ranked_by_user, ranked_at=None):
+    """Flatten per-student rankings into rows of user_id, rank, occupation, score and ranked_at."""
+    ranked_at = (ranked_at or datetime.now()).isoformat(timespec="seconds")
+    return [
+        {"user_id": user_id, "rank": rank, "occupation": occupation, "score": score, "ranked_at": ranked_at}
+        for user_id, ranked in ranked_by_user.items()
+        for rank, (occupation, score) in enumerate(ranked, start=1)
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank the past occupations of every student.")
+    parser.add_argument("--output", default="ranked_occupations.csv")
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--max-experience-years", type=int, default=10)
+    args = parser.parse_args()
+
+    from utils.supabase_batch import get_service_client
+
+    ranker = JobRanker({"work_period": 0.5, "recency": 0.3, "job_type": 0.2}, args.max_experience_years)
+    table = ranker.get_cohort_ranked_jobs(get_service_client(), processes=args.processes)
+    with open(args.output, "w", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames=["user_id", "rank", "occupation", "score", "ranked_at"])
+        writer.writeheader()
+        writer.writerows(table)
+    print(f"Wrote {len(table)} ranked occupations for {len({row['user_id'] for row in table})} students "
+          f"to {args.output}")
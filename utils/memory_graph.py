@@ -0,0 +1,291 @@
+import json
+import os
+import re
+from collections import defaultdict
+
+from esco import graph
+from utils.graph_backend import PREFERENCE_FEATURES
+
+THESIS_MODULES = (
+    "Course_Research_Methods_in_Information_Systems",
+    "Course_Master_Thesis",
+    "Course_Master_Thesis_Proposal",
+)
+SESSION_FIELDS = ("ay", "day", "group_name", "location", "periodicity", "semester", "time")
+_WORD = re.compile(r"\w+")
+
+
+def _rows(batches):
+    return [row for batch in batches for row in batch]
+
+
+def _words(text):
+    return _WORD.findall((text or "").lower())
+
+
+class InMemoryGraph:
+    """
+    GraphBackend holding the whole graph in dicts, loaded from the same files
+    esco/graph.py loads into Neo4j, so every query is a few lookups.
+
+    Skill -> learning outcome matches are the skills each learning outcome
+    promotes in the CSV; Neo4j derives them from embeddings instead, so
+    occupation retrievals can differ slightly between the two backends.
+    Without esco/csv/occupations.csv there are no occupations.
+    """
+
+    def __init__(self, modules, sessions, skills, occupations, occupation_skills, outcome_modules, outcome_skills):
+        """
+        Args:
+            modules (list): Module rows as esco.graph.module_batches yields them, with the assessment fields.
+            sessions (list): Teaching session rows as esco.graph.teaching_session_batches yields them.
+            skills (list): Skill and knowledge rows with uri, title and description.
+            occupations (list): Occupation rows with occupation, uri, description and optionally alternative_labels.
+            occupation_skills (list): (occupation uri, skill uri) pairs.
+            outcome_modules (list): (learning outcome, module individual name) pairs.
+            outcome_skills (list): (learning outcome, skill uri) pairs.
+        """
+        self.modules = {m["individual_name"]: dict(m) for m in modules}
+        self.modules_by_title = defaultdict(list)
+        for module in self.modules.values():
+            self.modules_by_title[module["module_title"]].append(module)
+
+        # Sessions are merged on all their fields, like the TeachingSession
+        # nodes; each keeps the distinct professors teaching it.
+        self.sessions = defaultdict(dict)
+        professors = {}
+        for row in sessions:
+            if row["module"] not in self.modules:
+                continue
+            key = tuple(row[field] for field in SESSION_FIELDS)
+            session = self.sessions[row["module"]].setdefault(key, {field: row[field] for field in SESSION_FIELDS})
+            professor = (row["professor_name"], row["professor_surname"])
+            professors[professor] = None
+            session.setdefault("_professors", {})[professor] = None
+        self.professors = list(professors)
+        self.days = {name: {s["day"] for s in sessions.values()} for name, sessions in self.sessions.items()}
+        self.surnames = {
+            name: {surname for s in sessions.values() for _, surname in s["_professors"] if surname}
+            for name, sessions in self.sessions.items()
+        }
+
+        self.skills = {s["uri"]: {"title": s["title"], "description": s["description"]} for s in skills}
+        self.occupations = {o["occupation"]: o for o in occupations}
+        self.occupation_skills = defaultdict(dict)
+        occupation_titles = {o["uri"]: o["occupation"] for o in occupations}
+        for occupation_uri, skill_uri in occupation_skills:
+            if occupation_uri in occupation_titles and skill_uri in self.skills:
+                self.occupation_skills[occupation_titles[occupation_uri]][skill_uri] = None
+
+        self.outcome_modules = defaultdict(dict)
+        for outcome, module in outcome_modules:
+            if module in self.modules:
+                self.outcome_modules[outcome][module] = None
+        self.skill_outcomes = defaultdict(dict)
+        for outcome, skill_uri in outcome_skills:
+            if skill_uri in self.skills and outcome in self.outcome_modules:
+                self.skill_outcomes[skill_uri][outcome] = None
+
+        self._occupation_index = defaultdict(set)
+        for title in self.occupations:
+            for word in _words(title):
+                self._occupation_index[word].add(title)
+        self._modules_by_occupation = {}
+
+    @classmethod
+    def load(cls, batch_size=graph.DEFAULT_BATCH_SIZE, occupations=None, occupation_skills=None):
+        """
+        Read esco/csv the way esco/graph.py does. ``occupations`` and
+        ``occupation_skills`` (occupation and link rows as esco/graph.py loads
+        them) replace the ones read from OCCUPATIONS_CSV.
+        """
+        modules = _rows(graph.module_batches(batch_size))
+        with open(graph.ASSESSMENTS_JSON, encoding="utf-8") as file:
+            assessments = {entry["module_name"]: entry for entry in json.load(file)}
+        for module in modules:
+            assessment = assessments.get(module["module_title"], {})
+            for field in ("assessment_type", "project_work", "oral_assessment"):
+                module[field] = assessment.get(field)
+
+        skills = (_rows(graph.skill_batches(graph.SKILLS_CSV, "skill", batch_size))
+                  + _rows(graph.skill_batches(graph.KNOWLEDGE_CSV, "knowledge", batch_size)))
+        if occupations is None:
+            if os.path.exists(graph.OCCUPATIONS_CSV):
+                occupations = _rows(graph.occupation_batches(batch_size))
+                occupation_skills = _rows(graph.occupation_skill_batches(batch_size))
+            else:
+                print(f"{graph.OCCUPATIONS_CSV} not found: the in-memory graph has no occupations")
+                occupations, occupation_skills = [], []
+        return cls(
+            modules=modules,
+            sessions=_rows(graph.teaching_session_batches(batch_size)),
+            skills=skills,
+            occupations=occupations,
+            occupation_skills=[(link["occupation_uri"], link["skill_uri"]) for link in occupation_skills or []],
+            outcome_modules=[(row["learning_outcome"], row["module_name"])
+                             for row in _rows(graph.module_learning_outcome_batches(batch_size))],
+            outcome_skills=[(link["learning_outcome"], link["skill_uri"])
+                            for link in _rows(graph.learning_outcome_skill_batches(batch_size))],
+        )
+
+    def _sessions(self, individual_name, professors=False):
+        result = []
+        for session in self.sessions.get(individual_name, {}).values():
+            entry = {field: session[field] for field in SESSION_FIELDS}
+            if professors:
+                entry["professors"] = [{"professor_name": name, "professor_surname": surname}
+                                       for name, surname in session["_professors"]]
+            result.append(entry)
+        return result
+
+    def graph_version(self):
+        sessions = sum(len(s) for s in self.sessions.values())
+        return ("memory", len(self.modules), sessions, len(self.occupations), len(self.professors))
+
+    def load_catalog(self):
+        return {
+            "modules": [
+                {
+                    "individual_name": m["individual_name"],
+                    "module_title": m["module_title"],
+                    "module_type": m["module_type"],
+                    "module_description": m["module_description"],
+                    "assessment_type": m["assessment_type"],
+                    "project_work": m["project_work"],
+                    "oral_assessment": m["oral_assessment"],
+                    "teaching_sessions": self._sessions(name, professors=True),
+                }
+                for name, m in self.modules.items()
+            ],
+            "occupations": [{"occupation": o["occupation"], "description": o["description"], "uri": o["uri"],
+                             "alternative_labels": o.get("alternative_labels") or []}
+                            for o in self.occupations.values()],
+            "professors": [f"{name} {surname}" for name, surname in self.professors],
+        }
+
+    def search_occupation(self, search):
+        """Occupations sharing the most words with the search, then the shortest."""
+        counts = defaultdict(int)
+        for word in set(_words(search)):
+            for title in self._occupation_index.get(word, ()):
+                counts[title] += 1
+        return sorted(counts, key=lambda title: (-counts[title], len(title), title))
+
+    def teaching_sessions_by_modules(self, modules, taken_modules):
+        wanted = set(modules)
+        taken = set(taken_modules)
+        selected = [name for name, m in self.modules.items() if m["module_title"] in wanted]
+        selected += [name for name, m in self.modules.items()
+                     if m["module_type"] == "mandatory" and m["module_title"] not in taken]
+        return [
+            {
+                "module_title": self.modules[name]["module_title"],
+                "module_type": self.modules[name]["module_type"],
+                "module_description": self.modules[name]["module_description"] or "",
+                "teaching_session": self._sessions(name),
+            }
+            for name in dict.fromkeys(selected)
+            if self.sessions.get(name)
+        ]
+
+    def _occupation_modules(self, occupation):
+        """Rows of one occupation for every module, before leaving out the taken ones; kept for reuse."""
+        rows = self._modules_by_occupation.get(occupation)
+        if rows is None:
+            grouped = {}
+            for skill_uri in self.occupation_skills.get(occupation, ()):
+                for outcome in self.skill_outcomes.get(skill_uri, ()):
+                    for name in self.outcome_modules[outcome]:
+                        module = self.modules[name]
+                        key = (module["module_title"], module["module_type"])
+                        entry = grouped.setdefault(key, ({}, {}))
+                        entry[0][outcome] = None
+                        entry[1][skill_uri] = None
+            o = self.occupations[occupation]
+            rows = self._modules_by_occupation[occupation] = [
+                ({"module_title": title, "module_type": module_type}, list(outcomes), list(skills),
+                 {"occupation": o["occupation"], "description": o["description"]})
+                for (title, module_type), (outcomes, skills) in grouped.items()
+            ]
+        return rows
+
+    def modules_by_occupation(self, occupations, taken_modules):
+        taken = set(taken_modules)
+        result = [
+            {
+                "module": dict(module),
+                "supporting_learning_outcomes": list(outcomes),
+                "supported_skills": [dict(self.skills[uri]) for uri in skills],
+                "occupation": dict(occupation),
+            }
+            for title in dict.fromkeys(occupations)
+            if title in self.occupations
+            for module, outcomes, skills, occupation in self._occupation_modules(title)
+            if module["module_title"] not in taken
+        ]
+        return sorted(result, key=lambda entry: len(entry["supported_skills"]), reverse=True)
+
+    def extra_modules(self):
+        return [
+            {
+                "module_title": self.modules[name]["module_title"],
+                "module_type": self.modules[name]["module_type"],
+                "teaching_session": self._sessions(name),
+            }
+            for name in THESIS_MODULES
+            if name in self.modules
+        ]
+
+    def _lecturer_match(self, name, desired_lecturers):
+        return any(surname in desired for surname in self.surnames.get(name, ()) for desired in desired_lecturers)
+
+    def preference_features(self, names, desired_lecturers, available_days, accepted_types):
+        available_days = set(available_days)
+        accepted_types = set(accepted_types)
+        features = {}
+        for requested in names:
+            matches = [self.modules[requested]] if requested in self.modules else self.modules_by_title.get(requested, [])
+            for module in matches:
+                name = module["individual_name"]
+                vector = features.setdefault(requested, dict.fromkeys(PREFERENCE_FEATURES, False))
+                # A title can be shared by several modules; any match counts.
+                current = {
+                    "day_match": bool(self.days.get(name, set()) & available_days),
+                    "lecturer_match": self._lecturer_match(name, desired_lecturers),
+                    "assessment_match": module["assessment_type"] is not None
+                    and module["assessment_type"].lower() in accepted_types,
+                    "project_work": module["project_work"] is True,
+                    "oral_assessment": module["oral_assessment"] is True,
+                }
+                for feature in PREFERENCE_FEATURES:
+                    vector[feature] = vector[feature] or current[feature]
+        return features
+
+    def modules_by_preferences(self, taken_modules, desired_lecturers, available_days, assessment_type,
+                               project_work, oral_assessment):
+        taken = set(taken_modules)
+        available_days = set(available_days)
+        if assessment_type == "individual_and_group":
+            accepted_types = {"individual", "group", "individual_and_group"}
+        else:
+            accepted_types = {assessment_type}
+        result = []
+        for name, module in self.modules.items():
+            if name in taken:
+                continue
+            # Missing assessment fields never match, as comparisons with null in Cypher.
+            score = (
+                int(bool(self.days.get(name, set()) & available_days))
+                + int(self._lecturer_match(name, desired_lecturers))
+                + int(module["assessment_type"] is not None and module["assessment_type"] in accepted_types)
+                + int(module["project_work"] is not None and module["project_work"] == project_work)
+                + int(module["oral_assessment"] is not None and module["oral_assessment"] == oral_assessment)
+            )
+            result.append({
+                "module": {"module_title": module["module_title"], "module_type": module["module_type"]},
+                "preference_score": score,
+            })
+        return sorted(result, key=lambda entry: entry["preference_score"], reverse=True)
+
+    def refresh_indexes(self):
+        print("The in-memory graph has no indexes to refresh")
@@ -0,0 +1,135 @@
+import streamlit as st
+
+from utils.catalog import get_catalog
+from utils.embedding_refresh import refresh_embeddings
+from utils.graph_backend import PREFERENCE_FEATURES
+from utils.queries import escape_lucene, run_query
+from utils.skill_matching import refresh_skill_matches
+from utils.vector_index import get_vector_index
+
+
+class Neo4jBackend:
+    """GraphBackend answering from Neo4j with the queries registered in utils.queries."""
+
+    def __init__(self):
+        self._materialized = None  # (graph version, whether matches exist)
+
+    def has_materialized_matches(self):
+        """Whether the matches_learning_outcome relationships exist; checked once per graph version."""
+        version = get_catalog().version
+        cached = self._materialized
+        if cached is None or cached[0] != version:
+            present = run_query("has_skill_matches").records[0]["present"]
+            cached = self._materialized = (version, present)
+        return cached[1]
+
+    def graph_version(self):
+        record = run_query("graph_version").records[0]
+        return tuple(record.values())
+
+    def load_catalog(self):
+        record = run_query("load_catalog").records[0]
+        return {"modules": record["modules"], "occupations": record["occupations"], "professors": record["professors"]}
+
+    def search_occupation(self, search):
+        result = run_query("search_occupation", search=escape_lucene(search))
+        return [record[0] for record in result.records]
+
+    def teaching_sessions_by_modules(self, modules, taken_modules):
+        records = run_query(
+            "teaching_sessions_by_modules", modules=list(modules), taken_modules=list(taken_modules)
+        )
+
+        result = []
+        for record in records.records:
+            tmp = record["module"]
+            result.append({
+                "module_title": tmp.get("module_title"),
+                "module_type": tmp.get("module_type"),
+                "module_description": tmp.get("module_description", ""),
+                # Include description, default empty string
+                "teaching_session": record.get("teaching_session", [])
+            })
+        return result
+
+    def modules_by_occupation(self, occupations, taken_modules):
+        """
+        RETRIEVAL_BACKEND selects where the similarity search runs: "neo4j"
+        (default) or "numpy" for the in-process index in utils.vector_index.
+        """
+        if st.secrets.get("RETRIEVAL_BACKEND", "neo4j") == "numpy":
+            return get_vector_index().modules_by_occupation(occupations, taken_modules)
+        # "materialized" reads the matches_learning_outcome relationships kept
+        # up to date by utils.skill_matching; "vector" queries the index live.
+        # Graphs the refresh has never run on fall back to the vector query.
+        if (st.secrets.get("OCCUPATION_MATCHING", "materialized") == "vector"
+                or not self.has_materialized_matches()):
+            query_name = "modules_by_occupation_vector"
+        else:
+            query_name = "modules_by_occupation"
+        result = run_query(
+            query_name, occupations=list(occupations), taken_modules=list(taken_modules)
+        )
+        return [record.data() for record in result.records]
+
+    def extra_modules(self):
+        result = run_query("extra_modules")
+        return [
+            {
+                "module_title": record["module_title"],
+                "module_type": record["module_type"],
+                "teaching_session": record["teaching_session"] or []  # fallback to empty list
+            }
+            for record in result.records
+        ]
+
+    def preference_features(self, names, desired_lecturers, available_days, accepted_types):
+        result = run_query(
+            "preference_features",
+            names=list(names),
+            desired_lecturers=list(desired_lecturers),
+            available_days=list(available_days),
+            accepted_types=list(accepted_types),
+        )
+        features = {}
+        for record in result.records:
+            vector = features.setdefault(record["name"], dict.fromkeys(PREFERENCE_FEATURES, False))
+            # A title can be shared by several module nodes; any match counts.
+            for feature in PREFERENCE_FEATURES:
+                vector[feature] = vector[feature] or record[feature]
+        return features
+
+    def modules_by_preferences(self, taken_modules, desired_lecturers, available_days, assessment_type,
+                               project_work, oral_assessment):
+        result = run_query(
+            "modules_by_preferences",
+            taken_modules=list(taken_modules),
+            desired_lecturers=list(desired_lecturers),
+            available_days=list(available_days),
+            assessment_type=assessment_type,
+            project_work=project_work,
+            oral_assessment=oral_assessment,
+        )
+        return [
+            {
+                "module": {
+                    "module_title": record["name"],
+                    "module_type": record["module_type"]
+                },
+                "preference_score": record["preference_score"]
+            }
+            for record in result.records
+        ]
+
+    def refresh_indexes(self):
+        try:
+            refresh_embeddings()
+        except Exception as e:
+            print("Error updating embeddings: ", e)
+
+        print("Indexes updated")
+
+        try:
+            refresh_skill_matches()
+        except Exception as e:
+            print("Error refreshing skill matches: ", e)
@@ -0,0 +1,139 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+from neo4j import GraphDatabase
+
+DEFAULT_MAX_POOL_SIZE = 50
+DEFAULT_ACQUISITION_TIMEOUT = 60.0
+DEFAULT_MAX_CONNECTION_LIFETIME = 3600.0
+
+_driver = None
+_driver_lock = threading.Lock()
+_metrics = None
+
+
+class PoolMetrics:
+    """Counters describing how the shared driver's connection pool is used."""
+
+    def __init__(self, max_pool_size, acquisition_timeout):
+        self.max_pool_size = max_pool_size
+        self.acquisition_timeout = acquisition_timeout
+        self._slots = threading.BoundedSemaphore(max_pool_size)
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.acquisitions = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @contextmanager
+    def acquire(self):
+        """
+        Reserve one pool slot for the duration of a query.
+
+        The semaphore has the same size as the driver's pool, so the time spent
+        waiting here is the time a caller would otherwise spend waiting for a
+        free connection inside the driver.
+        """
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.acquisition_timeout):
+            raise TimeoutError(f"No Neo4j connection available after {self.acquisition_timeout}s")
+        wait = time.perf_counter() - start
+        with self._lock:
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            self.acquisitions += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            self._slots.release()
+
+    def snapshot(self, driver=None):
+        """Return the current counters as a plain dict."""
+        with self._lock:
+            opened = _open_connection_count(driver)
+            return {
+                "max_pool_size": self.max_pool_size,
+                "in_use": self.in_use,
+                "idle": max(opened - self.in_use, 0) if opened is not None else None,
+                "open_connections": opened,
+                "peak_in_use": self.peak_in_use,
+                "acquisitions": self.acquisitions,
+                "avg_wait_ms": (self.total_wait / self.acquisitions * 1000) if self.acquisitions else 0.0,
+                "max_wait_ms": self.max_wait * 1000,
+            }
+
+
+def _open_connection_count(driver):
+    # The driver does not expose its pool publicly; read it defensively so a
+    # driver upgrade only loses the idle count instead of breaking queries.
+    pool = getattr(driver, "_pool", None)
+    connections = getattr(pool, "connections", None)
+    if connections is None:
+        return None
+    return sum(len(conns) for conns in connections.values())
+
+
+def _pool_config():
+    return {
+        "max_connection_pool_size": int(st.secrets.get("NEO4J_MAX_POOL_SIZE", DEFAULT_MAX_POOL_SIZE)),
+        "connection_acquisition_timeout": float(
+            st.secrets.get("NEO4J_ACQUISITION_TIMEOUT", DEFAULT_ACQUISITION_TIMEOUT)
+        ),
+        "max_connection_lifetime": float(
+            st.secrets.get("NEO4J_MAX_CONNECTION_LIFETIME", DEFAULT_MAX_CONNECTION_LIFETIME)
+        ),
+    }
+
+
+def get_driver():
+    """Return the process-wide Neo4j driver, creating it on first use."""
+    global _driver, _metrics
+    if _driver is None:
+        with _driver_lock:
+            if _driver is None:
+                config = _pool_config()
+                _metrics = PoolMetrics(
+                    config["max_connection_pool_size"], config["connection_acquisition_timeout"]
+                )
+                _driver = GraphDatabase.driver(
+                    st.secrets["NEO4J_URI"],
+                    auth=(st.secrets["NEO4J_USERNAME"], st.secrets["NEO4J_PASSWORD"]),
+                    **config,
+                )
+    return _driver
+
+
+def execute_query(query_, parameters_=None, **kwargs):
+    """
+    Run a query on the shared driver, accounting for it in the pool metrics.
+
+    Arguments follow GraphDatabase.driver().execute_query: extra keyword
+    arguments become query parameters.
+    """
+    driver = get_driver()
+    with _metrics.acquire():
+        return driver.execute_query(query_, parameters_, **kwargs)
+
+
+def get_pool_metrics():
+    """Return in-use, idle and wait-time figures for the shared pool."""
+    if _metrics is None:
+        return None
+    return _metrics.snapshot(_driver)
+
+
+def close_driver():
+    """Close the shared driver; the next query opens a new one."""
+    global _driver, _metrics
+    with _driver_lock:
+        if _driver is not None:
+            _driver.close()
+        _driver = None
+        _metrics = None
@@ -0,0 +1,378 @@
+import re
+import threading
+import time
+
+from utils.neo4j_driver import execute_query
+from utils.tracing import span
+
+
+class Query:
+    """A named Cypher statement whose text never changes between calls."""
+
+    def __init__(self, name, text, warm_parameters=None):
+        self.name = name
+        self.text = text
+        self.warm_parameters = warm_parameters or {}
+
+
+class QueryStats:
+    """
+    Per-query counters.
+
+    Neo4j caches execution plans by query text. Registered queries have fixed
+    text, so only the first call per process should need planning. The driver
+    does not report whether a call was planned; ``available_after`` is the
+    server-reported time until the first row, which includes planning, so
+    compare ``first_available_after_ms`` with ``avg_available_after_ms`` to
+    see the cache at work.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.total_available_after_ms = 0.0
+        self.first_available_after_ms = None
+        self.warmed = False
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "avg_ms": self.total_ms / self.calls if self.calls else 0.0,
+            "first_available_after_ms": self.first_available_after_ms,
+            "avg_available_after_ms": self.total_available_after_ms / self.calls if self.calls else 0.0,
+            "warmed": self.warmed,
+        }
+
+
+REGISTRY = {}
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def register(name, text, warm_parameters=None):
+    REGISTRY[name] = Query(name, text, warm_parameters)
+    _stats[name] = QueryStats()
+    return REGISTRY[name]
+
+
+def run_query(name, **parameters):
+    """Execute a registered query with the given parameters."""
+    query = REGISTRY[name]
+    stats = _stats[name]
+    start = time.perf_counter()
+    try:
+        with span(f"cypher.{name}") as s:
+            result = execute_query(query.text, parameters)
+            s.set(rows=len(result.records))
+    except Exception:
+        with _stats_lock:
+            stats.errors += 1
+        raise
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    available_after = result.summary.result_available_after or 0
+    with _stats_lock:
+        if stats.calls == 0:
+            stats.first_available_after_ms = available_after
+        stats.calls += 1
+        stats.total_ms += elapsed_ms
+        stats.total_available_after_ms += available_after
+    return result
+
+
+def warm_queries():
+    """Plan every registered query with EXPLAIN so the first real call is a cache hit."""
+    for name, query in REGISTRY.items():
+        try:
+            execute_query("EXPLAIN " + query.text, query.warm_parameters)
+            with _stats_lock:
+                _stats[name].warmed = True
+        except Exception as e:
+            print(f"Error warming query {name}: ", e)
+
+
+def warm_queries_in_background():
+    threading.Thread(target=warm_queries, name="query-warmup", daemon=True).start()
+
+
+def get_query_stats():
+    with _stats_lock:
+        return {name: stats.as_dict() for name, stats in _stats.items()}
+
+
+_LUCENE_SPECIAL_CHARACTERS = re.compile(r'([+\-!(){}\[\]^"~*?:\\/]|&&|\|\|)')
+
+
+def escape_lucene(text):
+    """Escape user input for db.index.fulltext.queryNodes."""
+    return _LUCENE_SPECIAL_CHARACTERS.sub(r"\\\1", text)
+
+
+register("search_occupation", """
+    CALL db.index.fulltext.queryNodes("occupations", $search) YIELD node, score
+    RETURN node.occupation
+""", {"search": ""})
+
+register("load_catalog", """
+    CALL {
+        MATCH (m:Module)
+        OPTIONAL MATCH (m)-[:has_schedule]->(ts:TeachingSession)
+        OPTIONAL MATCH (ts)-[:taught_by]->(p:Professor)
+        WITH m, ts, collect(DISTINCT p{.professor_name, .professor_surname}) AS professors
+        WITH m, collect(ts{.ay, .day, .group_name, .location, .periodicity, .semester, .time, professors: professors}) AS sessions
+        RETURN collect(m{.individual_name, .module_title, .module_type, .module_description,
+                         .assessment_type, .project_work, .oral_assessment,
+                         teaching_sessions: sessions}) AS modules
+    }
+    CALL {
+        MATCH (o:Occupation)
+        RETURN collect(o{.occupation, .description, .uri, .alternative_labels}) AS occupations
+    }
+    CALL {
+        MATCH (p:Professor)
+        RETURN collect(p.professor_name + ' ' + p.professor_surname) AS professors
+    }
+    RETURN modules, occupations, professors
+""")
+
+# The loaders bump GraphVersion whenever they change the catalog. Graphs
+# loaded before the marker existed fall back to node counts.
+register("graph_version", """
+    OPTIONAL MATCH (v:GraphVersion {id: 'catalog'})
+    WITH v.version AS version
+    CALL { MATCH (m:Module) RETURN count(m) AS modules }
+    CALL { MATCH (:Module)-[r:has_schedule]->(:TeachingSession) RETURN count(r) AS sessions }
+    CALL { MATCH (o:Occupation) RETURN count(o) AS occupations }
+    CALL { MATCH (p:Professor) RETURN count(p) AS professors }
+    RETURN version, modules, sessions, occupations, professors
+""")
+
+register("bump_graph_version", """
+    MERGE (v:GraphVersion {id: 'catalog'})
+    SET v.version = coalesce(v.version, 0) + 1, v.updated_at = datetime()
+    RETURN v.version AS version
+""")
+
+register("teaching_sessions_by_modules", """
+    MATCH (m:Module)-[:has_schedule]->(ts:TeachingSession)
+    WHERE m.module_title IN $modules
+    RETURN m{.module_title, .module_type, .module_description} AS module,
+           collect(DISTINCT ts{.ay, .day, .group_name, .location, .periodicity, .semester, .time}) AS teaching_session
+    UNION
+    MATCH (m:Module {module_type: "mandatory"})-[:has_schedule]->(ts:TeachingSession)
+    WHERE NOT m.module_title IN $taken_modules
+    RETURN m{.module_title, .module_type, .module_description} AS module,
+           collect(DISTINCT ts{.ay, .day, .group_name, .location, .periodicity, .semester, .time}) AS teaching_session
+""", {"modules": [], "taken_modules": []})
+
+register("modules_by_occupation", """
+    MATCH (o:Occupation)-[:requires_skill]->(s:Skill)-[:matches_learning_outcome]->(lo:LearningOutcome)
+    WHERE o.occupation IN $occupations
+    MATCH (lo)<-[:has_learning_outcome]-(m:Module)
+    WHERE NOT m.module_title IN $taken_modules
+    RETURN m{.module_title, .module_type} AS module,
+           collect(DISTINCT lo.learning_outcome) AS supporting_learning_outcomes,
+           collect(DISTINCT s{.title, .description}) AS supported_skills,
+           o{.occupation, .description} AS occupation
+    ORDER BY size(supported_skills) DESC
+""", {"occupations": [], "taken_modules": []})
+
+# Whether utils.skill_matching has materialized any match on this graph.
+register("has_skill_matches", """
+    RETURN EXISTS { MATCH (:Skill)-[:matches_learning_outcome]->(:LearningOutcome) } AS present
+""")
+
+# Same result as modules_by_occupation, computed from the vector index on
+# every call. Used when the materialized matches have not been built.
+register("modules_by_occupation_vector", """
+    MATCH (o:Occupation)-[:requires_skill]->(s:Skill)
+    WHERE o.occupation IN $occupations
+    CALL db.index.vector.queryNodes('learningOutcomeIndex', 3, s.embeddingDescription)
+    YIELD node AS lo, score
+    WHERE score > 0.92
+    MATCH (lo)<-[:has_learning_outcome]-(m:Module)
+    WHERE NOT m.module_title IN $taken_modules
+    RETURN m{.module_title, .module_type} AS module,
+           collect(DISTINCT lo.learning_outcome) AS supporting_learning_outcomes,
+           collect(DISTINCT s{.title, .description}) AS supported_skills,
+           o{.occupation, .description} AS occupation
+    ORDER BY size(supported_skills) DESC
+""", {"occupations": [], "taken_modules": []})
+
+register("load_vector_index", """
+    CALL {
+        MATCH (s:Skill)
+        WHERE s.embeddingDescription IS NOT NULL
+        RETURN collect({uri: s.uri, title: s.title, description: s.description,
+                        embedding: s.embeddingDescription}) AS skills
+    }
+    CALL {
+        MATCH (o:Occupation)
+        OPTIONAL MATCH (o)-[:requires_skill]->(s:Skill)
+        WITH o, collect(s.uri) AS skills
+        RETURN collect({occupation: o.occupation, description: o.description, skills: skills}) AS occupations
+    }
+    CALL {
+        MATCH (lo:LearningOutcome)
+        WHERE lo.embeddingLearningOutcome IS NOT NULL
+        OPTIONAL MATCH (lo)<-[:has_learning_outcome]-(m:Module)
+        WITH lo, collect(m{.module_title, .module_type}) AS modules
+        RETURN collect({learning_outcome: lo.learning_outcome, embedding: lo.embeddingLearningOutcome,
+                        modules: modules}) AS learning_outcomes
+    }
+    RETURN skills, occupations, learning_outcomes
+""")
+
+register("skill_embedding_texts", """
+    MATCH (n:Skill)
+    RETURN elementId(n) AS id, n.description AS text, n.embeddingHash AS hash
+""")
+
+register("set_skill_embeddings", """
+    UNWIND $rows AS row
+    MATCH (n:Skill)
+    WHERE elementId(n) = row.id
+    SET n.embeddingDescription = row.embedding, n.embeddingHash = row.hash
+""", {"rows": []})
+
+register("learning_outcome_embedding_texts", """
+    MATCH (n:LearningOutcome)
+    RETURN elementId(n) AS id, n.learning_outcome AS text, n.embeddingHash AS hash
+""")
+
+register("set_learning_outcome_embeddings", """
+    UNWIND $rows AS row
+    MATCH (n:LearningOutcome)
+    WHERE elementId(n) = row.id
+    SET n.embeddingLearningOutcome = row.embedding, n.embeddingHash = row.hash
+""", {"rows": []})
+
+register("skills_with_stale_matches", """
+    MATCH (s:Skill)
+    WHERE s.embeddingDescription IS NOT NULL
+      AND ($full OR s.matched_embedding_hash IS NULL
+           OR s.matched_embedding_hash <> apoc.util.md5([s.embeddingDescription]))
+    RETURN s.uri AS uri
+""", {"full": False})
+
+register("learning_outcomes_with_stale_matches", """
+    MATCH (lo:LearningOutcome)
+    WHERE lo.embeddingLearningOutcome IS NOT NULL
+      AND (lo.matched_embedding_hash IS NULL
+           OR lo.matched_embedding_hash <> apoc.util.md5([lo.embeddingLearningOutcome]))
+    RETURN elementId(lo) AS id
+""")
+
+# A changed learning outcome can only alter the matches of skills it is
+# now close enough to, or of skills it was matched to before.
+register("skills_affected_by_learning_outcomes", """
+    UNWIND $ids AS id
+    MATCH (lo:LearningOutcome)
+    WHERE elementId(lo) = id
+    CALL {
+        WITH lo
+        CALL db.index.vector.queryNodes('skillDescription', $candidates, lo.embeddingLearningOutcome)
+        YIELD node, score
+        WHERE score > $threshold
+        RETURN node.uri AS uri
+        UNION
+        WITH lo
+        MATCH (node:Skill)-[:matches_learning_outcome]->(lo)
+        RETURN node.uri AS uri
+    }
+    RETURN collect(DISTINCT uri) AS uris
+""", {"ids": [], "candidates": 1, "threshold": 1.0})
+
+register("rematch_skills", """
+    UNWIND $uris AS uri
+    MATCH (s:Skill {uri: uri})
+    WHERE s.embeddingDescription IS NOT NULL
+    OPTIONAL MATCH (s)-[old:matches_learning_outcome]->()
+    DELETE old
+    WITH DISTINCT s
+    CALL {
+        WITH s
+        CALL db.index.vector.queryNodes('learningOutcomeIndex', $top_k, s.embeddingDescription)
+        YIELD node AS lo, score
+        WHERE score > $threshold
+        MERGE (s)-[r:matches_learning_outcome]->(lo)
+        SET r.score = score
+        RETURN count(r) AS matches
+    }
+    SET s.matched_embedding_hash = apoc.util.md5([s.embeddingDescription])
+    RETURN count(s) AS skills, sum(matches) AS matches
+""", {"uris": [], "top_k": 1, "threshold": 1.0})
+
+register("mark_learning_outcomes_matched", """
+    UNWIND $ids AS id
+    MATCH (lo:LearningOutcome)
+    WHERE elementId(lo) = id
+    SET lo.matched_embedding_hash = apoc.util.md5([lo.embeddingLearningOutcome])
+""", {"ids": []})
+
+register("extra_modules", """
+    MATCH (m:Module)
+    WHERE m.individual_name IN [
+        'Course_Research_Methods_in_Information_Systems',
+        'Course_Master_Thesis',
+        'Course_Master_Thesis_Proposal'
+    ]
+    OPTIONAL MATCH (m)-[:has_schedule]->(ts:TeachingSession)
+    RETURN m.individual_name AS module,
+           m.module_title AS module_title,
+           m.module_type AS module_type,
+           m.module_description AS module_description,
+           collect(DISTINCT ts{.ay, .day, .group_name, .location, .periodicity, .semester, .time}) AS teaching_session
+""")
+
+register("preference_features", """
+    UNWIND $names AS name
+    MATCH (module:Module)
+    WHERE module.individual_name = name OR module.module_title = name
+    OPTIONAL MATCH (module)-[:has_schedule]->(session:TeachingSession)
+    OPTIONAL MATCH (session)-[:taught_by]->(professor:Professor)
+    WITH name, module,
+         collect(DISTINCT session.day) AS days,
+         collect(DISTINCT professor.professor_surname) AS surnames
+    RETURN name,
+           ANY(day IN days WHERE day IN $available_days) AS day_match,
+           ANY(surname IN surnames WHERE ANY(desired IN $desired_lecturers WHERE desired CONTAINS surname)) AS lecturer_match,
+           coalesce(toLower(module.assessment_type) IN $accepted_types, false) AS assessment_match,
+           coalesce(module.project_work = true, false) AS project_work,
+           coalesce(module.oral_assessment = true, false) AS oral_assessment
+""", {"names": [], "available_days": [], "desired_lecturers": [], "accepted_types": []})
+
+register("modules_by_preferences", """
+    MATCH (module:Module)
+    OPTIONAL MATCH (module)-[:has_schedule]->(session:TeachingSession)
+    OPTIONAL MATCH (session)-[:taught_by]->(professor:Professor)
+    WITH module, collect(DISTINCT session.day) AS days,
+         collect(DISTINCT professor.professor_surname) AS surnames
+
+    WHERE NOT module.individual_name IN $taken_modules
+
+    WITH module,
+         apoc.coll.intersection(days, $available_days) AS day_match,
+         ANY(surname IN surnames WHERE ANY(desired IN $desired_lecturers WHERE desired CONTAINS surname)) AS lecturer_match,
+         CASE
+             WHEN $assessment_type = 'individual_and_group' THEN
+                 module.assessment_type IN ['individual', 'group', 'individual_and_group']
+             ELSE
+                 module.assessment_type = $assessment_type
+         END AS assessment_match,
+         module.project_work = $project_work AS project_work_match,
+         module.oral_assessment = $oral_assessment AS oral_assessment_match
+
+    WITH module.module_title AS name,
+         module.module_type AS module_type,
+         (CASE WHEN size(day_match) > 0 THEN 1 ELSE 0 END) +
+         (CASE WHEN lecturer_match THEN 1 ELSE 0 END) +
+         (CASE WHEN assessment_match THEN 1 ELSE 0 END) +
+         (CASE WHEN project_work_match THEN 1 ELSE 0 END) +
+         (CASE WHEN oral_assessment_match THEN 1 ELSE 0 END) AS preference_score
+
+    RETURN name, module_type, preference_score
+    ORDER BY preference_score DESC
+""", {"taken_modules": [], "available_days": [], "desired_lecturers": [], "assessment_type": "",
+      "project_work": False, "oral_assessment": False})
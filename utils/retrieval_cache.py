@@ -0,0 +1,139 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import streamlit as st
+
+from utils.disk_cache import DiskCache
+
+DEFAULT_MAX_ENTRIES = 256
+
+
+def retrieval_key(user_id, profile, work_experience, strategy, graph_version, settings=None):
+    """
+    Stable key for one retrieval: the user id as prefix, so a user's entries
+    can be dropped together, and a hash of everything the result depends on.
+    ``settings`` holds the configuration and summary format the result was
+    computed with, so changing either never serves entries from the disk tier
+    computed before.
+    """
+    payload = json.dumps(
+        {"profile": profile, "work_experience": work_experience, "strategy": strategy, "graph": graph_version,
+         "settings": settings},
+        sort_keys=True,
+        default=str,
+    )
+    return f"{user_id}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+class RetrievalCache:
+    """
+    Results of dispatch_module_suggestion, kept in an in-memory LRU and
+    optionally in a DiskCache so they survive restarts.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, disk=None):
+        self.max_entries = max_entries
+        self.disk = disk
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        value = self.disk.get(key) if self.disk is not None else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._store(key, value)
+        return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._store(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def _store(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value or compute it. Concurrent callers for the same
+        key share one computation: the first one runs it, the others wait for it.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key]
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+        if not owner:
+            return future.result()
+        try:
+            value = compute()
+            self.set(key, value)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def invalidate_user(self, user_id):
+        prefix = f"{user_id}:"
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+        if self.disk is not None:
+            self.disk.delete_prefix(prefix)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_retrieval_cache():
+    """Process-wide cache; set RETRIEVAL_CACHE_PATH to add the disk tier."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                path = st.secrets.get("RETRIEVAL_CACHE_PATH")
+                max_bytes = st.secrets.get("RETRIEVAL_CACHE_MAX_BYTES")
+                disk = DiskCache(path, max_bytes=int(max_bytes) if max_bytes else None) if path else None
+                _cache = RetrievalCache(int(st.secrets.get("RETRIEVAL_CACHE_SIZE", DEFAULT_MAX_ENTRIES)), disk)
+    return _cache
+
+
+def invalidate_user(user_id):
+    """Drop a user's cached retrievals after their profile or work experience changed."""
+    get_retrieval_cache().invalidate_user(user_id)
@@ -0,0 +1,323 @@
+import itertools
+import math
+from datetime import date
+
+MODULE_CREDITS = 6
+GRADUATION_CREDITS = 90
+MAIN_STUDY_PLAN_CREDITS = 60
+# Thesis-related modules, in the order they must be taken.
+THESIS_MODULES = ("Research Methods in Information Systems", "Master Thesis Proposal", "Master Thesis")
+THESIS_CREDITS = {"Research Methods in Information Systems": 6, "Master Thesis Proposal": 6, "Master Thesis": 18}
+SEASONS = ("Spring", "Autumn")
+# Search nodes allowed per layout before it is given up as infeasible.
+MAX_NODES = 50_000
+
+
+def module_credits(title):
+    return THESIS_CREDITS.get(title, MODULE_CREDITS)
+
+
+def first_semester(today=None):
+    """The upcoming semester: Spring starts in February, Autumn in September."""
+    today = today or date.today()
+    if today.month <= 1:
+        return "Spring", today.year
+    if today.month <= 8:
+        return "Autumn", today.year
+    return "Spring", today.year + 1
+
+
+def semester_calendar(count, start):
+    season, year = start
+    calendar = []
+    for _ in range(count):
+        calendar.append((season, year))
+        if season == "Autumn":
+            season, year = "Spring", year + 1
+        else:
+            season = "Autumn"
+    return calendar
+
+
+def module_seasons(module):
+    """
+    Seasons a catalog module is offered in, from its teaching sessions.
+
+    Thesis modules without teaching sessions can be taken in any semester.
+    """
+    seasons = frozenset(
+        session["semester"].strip() for session in module.get("teaching_sessions") or () if session.get("semester")
+    )
+    if not seasons and module["module_title"] in THESIS_MODULES:
+        return frozenset(SEASONS)
+    return seasons
+
+
+class StudyPlan:
+    """A semester-by-semester assignment of modules, plus the credit breakdown."""
+
+    def __init__(self, semesters, taken_credits, main_credits, missing_credits, unscheduled):
+        self.semesters = semesters
+        self.taken_credits = taken_credits
+        self.main_credits = main_credits
+        self.missing_credits = missing_credits
+        self.unscheduled = unscheduled
+
+    @property
+    def remaining_credits(self):
+        return GRADUATION_CREDITS - self.taken_credits
+
+    def to_dict(self):
+        return {
+            "semesters": self.semesters,
+            "taken_credits": self.taken_credits,
+            "remaining_credits": self.remaining_credits,
+            "main_credits": self.main_credits,
+            "missing_credits": self.missing_credits,
+            "unscheduled": self.unscheduled,
+        }
+
+    def to_markdown(self):
+        lines = [f"### Semester-Wise Study Plan for {len(self.semesters)} Semesters:"]
+        for semester in self.semesters:
+            credits = sum(module["credits"] for module in semester["modules"])
+            lines.append(f"- **{semester['season']} {semester['year']}** (Total Credits: {credits}):")
+            if not semester["modules"]:
+                lines.append("    - No modules assigned this semester.")
+            for module in semester["modules"]:
+                kind = "Mandatory" if module["mandatory"] else "Elective"
+                lines.append(f"    - {module['module_title']} ({kind}, {semester['season']})")
+
+        lines += [
+            "",
+            "### Additional Notes:",
+            f"- Total graduation requirement: **{GRADUATION_CREDITS} credits**.",
+            f"- Credits already completed: **{self.taken_credits}**.",
+            f"- Credits remaining: **{self.remaining_credits}**.",
+            "- Breakdown:",
+            f"    - **{self.main_credits} credits** from the Main Study Plan,",
+        ]
+        lines += [f"    - **{credits} credits** from {title}," for title, credits in THESIS_CREDITS.items()
+                  if any(m["module_title"] == title for s in self.semesters for m in s["modules"])]
+        if self.missing_credits:
+            lines.append(f"- Not enough schedulable modules: **{self.missing_credits} credits** are still missing.")
+        if self.unscheduled:
+            lines.append(f"- Not offered in any semester: {', '.join(self.unscheduled)}.")
+        return "\n".join(lines)
+
+
+class _Search:
+    """Depth-first assignment of main study plan modules to the first semesters of a layout."""
+
+    def __init__(self, candidates, required, availability, seasons, count, low, high):
+        self.candidates = candidates
+        self.required = required
+        self.availability = availability
+        self.seasons = seasons
+        self.count = count
+        self.low = low
+        self.high = high
+        self.loads = [0] * len(seasons)
+        self.assignment = []
+        self.nodes = 0
+        # required_after[i]: mandatory modules among candidates[i:]
+        self.required_after = [0] * (len(candidates) + 1)
+        for i in range(len(candidates) - 1, -1, -1):
+            self.required_after[i] = self.required_after[i + 1] + (candidates[i] in required)
+
+    def run(self):
+        return self._visit(0, 0)
+
+    def _visit(self, index, placed):
+        self.nodes += 1
+        if self.nodes > MAX_NODES:
+            return False
+        needed = self.count - placed
+        deficit = sum(max(0, self.low - load) for load in self.loads)
+        if deficit > needed or self.required_after[index] > needed:
+            return False
+        if needed == 0:
+            return True
+        if len(self.candidates) - index < needed:
+            return False
+
+        title = self.candidates[index]
+        # Earliest semester first: higher-ranked modules end up as early as possible.
+        for semester, season in enumerate(self.seasons):
+            if self.loads[semester] < self.high and season in self.availability[title]:
+                self.loads[semester] += 1
+                self.assignment.append((title, semester))
+                if self._visit(index + 1, placed + 1):
+                    return True
+                self.loads[semester] -= 1
+                self.assignment.pop()
+        if title not in self.required:
+            return self._visit(index + 1, placed)
+        return False
+
+
+def _thesis_groupings(thesis):
+    """Every split of the ordered thesis modules into consecutive semesters, most semesters first."""
+    if not thesis:
+        return [[]]
+    groupings = []
+    for cuts in itertools.product((True, False), repeat=len(thesis) - 1):
+        groups = [[thesis[0]]]
+        for cut, title in zip(cuts, thesis[1:]):
+            if cut:
+                groups.append([title])
+            else:
+                groups[-1].append(title)
+        groupings.append(groups)
+    return sorted(groupings, key=len, reverse=True)
+
+
+def _layouts(main_count, thesis, semesters):
+    """
+    Candidate plan shapes as (cost, main semesters, high, low, thesis groups), cheapest first.
+
+    Main modules fill the first semesters, each holding between low and high
+    of them, and the thesis groups follow in the next ones. Cost prefers the
+    lowest peak semester load, then an even spread, then fewer empty semesters
+    and thesis modules in separate semesters.
+    """
+    layouts = []
+    for groups in _thesis_groupings(thesis):
+        thesis_peak = max((sum(module_credits(t) for t in group) for group in groups), default=0)
+        main_options = [0] if main_count == 0 else range(1, min(main_count, semesters - len(groups)) + 1)
+        for main_semesters in main_options:
+            if main_semesters == 0:
+                if len(groups) <= semesters:
+                    layouts.append(((thesis_peak, False, 0, -len(groups), -len(groups)), 0, 0, 0, groups))
+                continue
+            balanced_high = math.ceil(main_count / main_semesters)
+            balanced_low = main_count // main_semesters
+            used = main_semesters + len(groups)
+            for high in range(balanced_high, main_count + 1):
+                peak = max(high * MODULE_CREDITS, thesis_peak)
+                for low in dict.fromkeys((balanced_low, 1)):
+                    uneven = low != balanced_low
+                    layouts.append(((peak, uneven, high, -used, -len(groups)), main_semesters, high, low, groups))
+    return sorted(layouts, key=lambda layout: layout[0])
+
+
+def plan_semesters(modules_retrieved, taken_modules, expected_semesters, catalog_modules, start=None):
+    """
+    Assign modules to semesters following the study regulations.
+
+    The Main Study Plan needs 60 credits of 6-credit modules: every mandatory
+    module not yet taken, then electives in the order of modules_retrieved.
+    Modules only go in semesters of a season they are taught in. Research
+    Methods, the Master Thesis Proposal and the Master Thesis follow the main
+    modules in that order, in the last used semesters; unused semesters are
+    left empty at the end. Among valid plans the one with the lowest peak
+    semester load is chosen, and within it higher-ranked modules are placed
+    as early as possible.
+
+    Args:
+        modules_retrieved (list): Ranked records with a "module" mapping holding "module_title".
+        taken_modules (list): Titles of completed modules.
+        expected_semesters (int): Number of semesters left.
+        catalog_modules (iterable): Catalog modules with module_title, module_type and teaching_sessions.
+        start (tuple): (season, year) of the first semester, the upcoming one by default.
+
+    Returns:
+        StudyPlan: The plan; missing_credits is non-zero when no full plan fits.
+    """
+    catalog = {module["module_title"]: module for module in catalog_modules}
+    taken = set(taken_modules or [])
+    taken_credits = sum(module_credits(title) for title in taken)
+    availability = {title: module_seasons(module) for title, module in catalog.items()}
+    for title in THESIS_MODULES:
+        availability.setdefault(title, frozenset(SEASONS))
+
+    mandatory = [title for title, module in catalog.items()
+                 if module.get("module_type") == "mandatory" and title not in THESIS_MODULES and title not in taken]
+    ranked = [record["module"]["module_title"] for record in modules_retrieved]
+    ordered = [title for title in mandatory if title not in ranked] + ranked
+    candidates = []
+    unscheduled = []
+    for title in dict.fromkeys(ordered):
+        if title in taken or title in THESIS_MODULES:
+            continue
+        if availability.get(title):
+            candidates.append(title)
+        else:
+            unscheduled.append(title)
+    required = set(mandatory) & set(candidates)
+
+    taken_main = sum(1 for title in taken if title not in THESIS_MODULES)
+    needed = max(0, MAIN_STUDY_PLAN_CREDITS // MODULE_CREDITS - taken_main)
+    thesis = [title for title in THESIS_MODULES if title not in taken]
+    calendar = semester_calendar(expected_semesters, start or first_semester())
+
+    # Fewer main modules only when not enough of them can be scheduled at all.
+    for count in range(min(needed, len(candidates)), len(required) - 1, -1):
+        for _, main_semesters, high, low, groups in _layouts(count, thesis, expected_semesters):
+            thesis_start = main_semesters
+            if any(calendar[thesis_start + i][0] not in availability[title]
+                   for i, group in enumerate(groups) for title in group):
+                continue
+            main_seasons = [season for season, _ in calendar[:main_semesters]]
+            if any(not availability[title] & set(main_seasons) for title in required):
+                continue
+            search = _Search(candidates, required, availability, main_seasons, count, low, high)
+            if not search.run():
+                continue
+
+            semesters = [{"season": season, "year": year, "modules": []} for season, year in calendar]
+            for title, semester in sorted(search.assignment, key=lambda item: item[1]):
+                semesters[semester]["modules"].append(_planned_module(title, title in required))
+            for i, group in enumerate(groups):
+                for title in group:
+                    semesters[thesis_start + i]["modules"].append(_planned_module(title, True))
+            return StudyPlan(
+                semesters,
+                taken_credits,
+                count * MODULE_CREDITS,
+                (needed - count) * MODULE_CREDITS,
+                unscheduled,
+            )
+
+    semesters = [{"season": season, "year": year, "modules": []} for season, year in calendar]
+    return StudyPlan(semesters, taken_credits, 0, needed * MODULE_CREDITS + sum(map(module_credits, thesis)),
+                     unscheduled)
+
+
+def _planned_module(title, mandatory):
+    return {"module_title": title, "mandatory": mandatory, "credits": module_credits(title)}
+
+
+def validate_plan(plan, catalog_modules, taken_modules=()):
+    """Return the regulation rules a plan breaks, as readable messages."""
+    availability = {module["module_title"]: module_seasons(module) for module in catalog_modules}
+    problems = []
+    positions = {}
+    last_used = -1
+    for index, semester in enumerate(plan.semesters):
+        if semester["modules"]:
+            if index > last_used + 1:
+                problems.append(f"empty semester before {semester['season']} {semester['year']}")
+            last_used = index
+        for module in semester["modules"]:
+            title = module["module_title"]
+            positions[title] = index
+            seasons = availability.get(title) or (SEASONS if title in THESIS_MODULES else ())
+            if semester["season"] not in seasons:
+                problems.append(f"{title} is not taught in {semester['season']}")
+
+    thesis_positions = [positions[title] for title in THESIS_MODULES if title in positions]
+    if thesis_positions != sorted(thesis_positions):
+        problems.append("thesis modules are out of order")
+    main_positions = [index for title, index in positions.items() if title not in THESIS_MODULES]
+    if thesis_positions and main_positions and max(main_positions) >= min(thesis_positions):
+        problems.append("a main study plan module is scheduled with or after a thesis module")
+
+    taken = set(taken_modules)
+    for title in THESIS_MODULES:
+        if title not in taken and title not in positions:
+            problems.append(f"{title} is missing")
+    planned = sum(module["credits"] for semester in plan.semesters for module in semester["modules"])
+    if plan.taken_credits + planned + plan.missing_credits != GRADUATION_CREDITS:
+        problems.append(f"plan totals {plan.taken_credits + planned} credits instead of {GRADUATION_CREDITS}")
+    return problems
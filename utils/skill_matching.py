@@ -0,0 +1,68 @@
+import argparse
+import time
+
+from utils.queries import run_query
+
+# Same parameters the live vector query used: the 3 closest learning
+# outcomes per skill, kept if their score is above 0.92.
+TOP_K = 3
+SCORE_THRESHOLD = 0.92
+# How many skills the skill index returns per changed learning outcome
+# when looking for skills whose matches it could affect.
+AFFECTED_SKILL_CANDIDATES = 100
+BATCH_SIZE = 100
+
+
+def _batches(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def refresh_skill_matches(full=False, batch_size=BATCH_SIZE):
+    """
+    Materialize skill -> learning outcome matches as
+    (:Skill)-[:matches_learning_outcome {score}]->(:LearningOutcome).
+
+    Only skills whose embedding changed since they were last matched, and
+    skills that a changed learning outcome could enter or leave the top
+    matches of, are recomputed. Pass full=True to rebuild every skill.
+    """
+    start = time.perf_counter()
+    skill_uris = {record["uri"] for record in run_query("skills_with_stale_matches", full=full).records}
+
+    changed_outcomes = [record["id"] for record in run_query("learning_outcomes_with_stale_matches").records]
+    if changed_outcomes and not full:
+        affected = run_query(
+            "skills_affected_by_learning_outcomes",
+            ids=changed_outcomes,
+            candidates=AFFECTED_SKILL_CANDIDATES,
+            threshold=SCORE_THRESHOLD,
+        ).records[0]["uris"]
+        skill_uris.update(affected)
+
+    skills = 0
+    matches = 0
+    for batch in _batches(sorted(skill_uris), batch_size):
+        record = run_query("rematch_skills", uris=batch, top_k=TOP_K, threshold=SCORE_THRESHOLD).records[0]
+        skills += record["skills"]
+        matches += record["matches"] or 0
+
+    for batch in _batches(changed_outcomes, batch_size):
+        run_query("mark_learning_outcomes_matched", ids=batch)
+
+    # Retrievals and Neo4jBackend's fallback check are keyed by the graph version.
+    if skills or changed_outcomes:
+        run_query("bump_graph_version")
+
+    elapsed = time.perf_counter() - start
+    print(f"Rematched {skills} skills ({matches} matches, {len(changed_outcomes)} changed learning outcomes) "
+          f"in {elapsed:.1f}s")
+    return {"skills": skills, "matches": matches, "learning_outcomes": len(changed_outcomes)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Materialize skill to learning outcome matches.")
+    parser.add_argument("--full", action="store_true", help="recompute every skill instead of only changed ones")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+    refresh_skill_matches(full=args.full, batch_size=args.batch_size)
@@ -0,0 +1,47 @@
+from supabase import Client, create_client
+
+from utils.tracing import traced
+
+WORK_EXPERIENCE_COLUMNS = 'user_id, company_name, occupation, start_date, end_date, current_work, id, part_time'
+
+
+def get_service_client() -> Client:
+    """
+    Client for batch jobs, authenticated with the SUPABASE_SERVICE_ROLE_KEY
+    secret so row level security lets it read every student's rows. Only use
+    it in trusted processes such as the nightly CLIs, never in the app.
+    """
+    import streamlit as st
+
+    return create_client(st.secrets['SUPABASE_URL'], st.secrets['SUPABASE_SERVICE_ROLE_KEY'])
+
+
+@traced("supabase.get_work_experience_for_users")
+def get_work_experience_for_users(client: Client, user_ids=None, page_size=1000, ids_per_request=100):
+    """
+    Fetch the work_experience rows of many students at once, for batch jobs.
+
+    Rows are read page by page, ordered by user_id and then start_date like
+    get_work_experience. Each page starts after the rows actually returned
+    and reading stops at the first empty page, so a server max-rows limit
+    below page_size only means more pages. With user_ids=None every
+    student's rows are returned; otherwise the ids are sent in groups of
+    ids_per_request to keep URLs short.
+    """
+    id_groups = [None] if user_ids is None else [
+        user_ids[i:i + ids_per_request] for i in range(0, len(user_ids), ids_per_request)
+    ]
+    rows = []
+    for ids in id_groups:
+        offset = 0
+        while True:
+            query = client.from_('work_experience').select(WORK_EXPERIENCE_COLUMNS)
+            if ids is not None:
+                query = query.in_('user_id', ids)
+            response = (query.order('user_id').order('start_date', desc=True).order('id')
+                        .range(offset, offset + page_size - 1).execute())
+            if not response.data:
+                break
+            rows.extend(response.data)
+            offset += len(response.data)
+    return rows
@@ -1,25 +1,106 @@
+import copy
+import threading
 import time
+from concurrent.futures import Future
 from datetime import date
 
 import streamlit as st
 from supabase import Client
 from utils.auth import get_supabase
 from utils.models import Student
+from utils.retrieval_cache import invalidate_user
+from utils.tracing import traced
 
 supabase: Client = get_supabase()
 user = supabase.auth.get_user().user
 
+DEFAULT_READ_TTL_SECONDS = 30.0
+
+
+class ReadCache:
+    """
+    Results of the current user's reads, kept for a few seconds so the page,
+    the prefetch and the agent workflow of one run share a single round trip.
+    Concurrent identical reads wait for the one already in flight. The write
+    functions drop the user's entries.
+    """
+
+    def __init__(self, ttl_seconds):
+        self.ttl_seconds = ttl_seconds
+        self.reads = 0
+        self.round_trips = 0
+        self.coalesced = 0
+        self._entries = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def get_or_fetch(self, key, fetch):
+        with self._lock:
+            self.reads += 1
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return copy.deepcopy(entry[1])
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+                self.round_trips += 1
+            else:
+                self.coalesced += 1
+        if not owner:
+            return copy.deepcopy(future.result())
+        try:
+            value = fetch()
+            with self._lock:
+                self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            future.set_result(value)
+            return copy.deepcopy(value)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "reads": self.reads,
+                "round_trips": self.round_trips,
+                "saved_round_trips": self.reads - self.round_trips,
+                "coalesced": self.coalesced,
+            }
+
+
+read_cache = ReadCache(float(st.secrets.get("SUPABASE_READ_TTL_SECONDS", DEFAULT_READ_TTL_SECONDS)))
+
+
+def _user_changed(user_id):
+    read_cache.invalidate(user_id)
+    invalidate_user(user_id)
+
+
+@traced("supabase.get_student")
 def get_student():
-    response = supabase.table('student').select('*').eq('id', user.id).execute()
-    if len(response.data) == 0:
-        return None
-    student = Student.from_dict(response.data[0])
-    return student
+    def fetch():
+        response = supabase.table('student').select('*').eq('id', user.id).execute()
+        if len(response.data) == 0:
+            return None
+        student = Student.from_dict(response.data[0])
+        return student
+    return read_cache.get_or_fetch((user.id, "student"), fetch)
 
+@traced("supabase.create_student")
 def create_student(student: Student):
     try:
         student.id = user.id
         supabase.table("student").insert(student.to_dict()).execute()
+        _user_changed(user.id)
         success = st.success("Student created successfully!")
         time.sleep(3)
         success.empty()
@@ -27,9 +108,11 @@ def create_student(student: Student):
         print(e)
         st.error("Creation failed: " + str(e))
 
+@traced("supabase.update_student")
 def update_student(student: Student):
     try:
         supabase.table("student").update(student.to_dict()).eq("id", student.id).execute()
+        _user_changed(student.id)
         success = st.success("Student updated successfully!")
         time.sleep(3)
         success.empty()
@@ -37,14 +120,19 @@ def update_student(student: Student):
         print(e)
         st.error("Update failed: " + str(e))
 
+@traced("supabase.get_work_experience")
 def get_work_experience():
-    response = supabase.from_('work_experience').select('company_name, occupation, start_date, end_date, current_work, id, part_time').eq('user_id', user.id).order("start_date", desc=True).execute()
-    return response.data
+    def fetch():
+        response = supabase.from_('work_experience').select('company_name, occupation, start_date, end_date, current_work, id, part_time').eq('user_id', user.id).order("start_date", desc=True).execute()
+        return response.data
+    return read_cache.get_or_fetch((user.id, "work_experience"), fetch)
 
+@traced("supabase.has_work_experience")
 def has_work_experience():
     experiences = get_work_experience()
     return experiences is not None and len(experiences) > 0
 
+@traced("supabase.add_work_experience")
 def add_work_experience(company_name: str, occupation: str, start_date: date, end_date: date, current_work: bool, part_time: bool):
     try:
         we = {
@@ -57,11 +145,13 @@ def add_work_experience(company_name: str, occupation: str, start_date: date, en
             'part_time': part_time
         }
         supabase.from_('work_experience').insert(we).execute()
+        _user_changed(user.id)
         st.rerun()
     except Exception as e:
         print(e)
         st.error("Insertion failed: " + str(e))
 
+@traced("supabase.update_work_experience")
 def update_work_experience(company_name: str, occupation: str, start_date: date, end_date: date, current_work: bool, we_id: str):
     try:
         we = {
@@ -72,14 +162,17 @@ def update_work_experience(company_name: str, occupation: str, start_date: date,
             'current_work': current_work,
         }
         supabase.from_('work_experience').update(we).eq('id', we_id).execute()
+        _user_changed(user.id)
         st.rerun()
     except Exception as e:
         print(e)
         st.error("Update failed: " + str(e))
 
+@traced("supabase.delete_work_experience")
 def delete_work_experience(we_id: str):
     try:
         supabase.from_('work_experience').delete().eq('id', we_id).execute()
+        _user_changed(user.id)
         st.rerun()
     except Exception as e:
         print(e)
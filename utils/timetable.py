@@ -0,0 +1,105 @@
+import itertools
+import re
+
+DAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+DEFAULT_LIMIT = 20
+_TIME_RANGE = re.compile(r"^\s*(\d{1,2})[:.](\d{2})\s*-\s*(\d{1,2})[:.](\d{2})\s*$")
+
+
+def parse_time_range(value):
+    """Turn "13:15-17:00" into minutes since midnight, (795, 1020); None if it cannot be parsed."""
+    match = _TIME_RANGE.match(value or "")
+    if not match:
+        return None
+    start_hour, start_minute, end_hour, end_minute = map(int, match.groups())
+    return start_hour * 60 + start_minute, end_hour * 60 + end_minute
+
+
+def _day(value):
+    return (value or "").strip().capitalize()
+
+
+class SessionGroup:
+    """One teaching group of a module: the sessions a student attends when choosing it."""
+
+    def __init__(self, module_title, group_name, sessions):
+        self.module_title = module_title
+        self.group_name = group_name
+        self.sessions = sessions
+        # (day, start, end) slots; sessions with an unreadable day or time cannot clash.
+        self.slots = []
+        for session in sessions:
+            interval = parse_time_range(session.get("time"))
+            if interval and _day(session.get("day")):
+                self.slots.append((_day(session.get("day")), *interval))
+
+    def clashes_with(self, occupied):
+        return any(day == other_day and start < other_end and other_start < end
+                   for day, start, end in self.slots
+                   for other_day, other_start, other_end in occupied)
+
+
+def session_groups(module_title, teaching_sessions, season=None):
+    """Group a module's teaching sessions by group name, keeping only those of the given season."""
+    groups = {}
+    for session in teaching_sessions:
+        if season and (session.get("semester") or "").strip() != season:
+            continue
+        groups.setdefault((session.get("group_name") or "").strip(), []).append(session)
+    return [SessionGroup(module_title, name, sessions) for name, sessions in groups.items()]
+
+
+def conflict_free_timetables(modules, season=None, limit=DEFAULT_LIMIT):
+    """
+    Yield every choice of one group per module without overlapping sessions.
+
+    Args:
+        modules (dict): Teaching sessions keyed by module title.
+        season (str): Only use sessions of this semester ("Spring" or "Autumn").
+        limit (int): Stop after this many timetables; None for all of them.
+
+    Yields:
+        list: The chosen SessionGroup of each module, in the order of ``modules``.
+    """
+    options = [session_groups(title, sessions, season) for title, sessions in modules.items()]
+    options = [groups for groups in options if groups]
+    # Modules with the fewest groups first, so dead ends are found early.
+    order = sorted(range(len(options)), key=lambda i: len(options[i]))
+
+    def extend(depth, chosen, occupied):
+        if depth == len(order):
+            yield [chosen[i] for i in range(len(options))]
+            return
+        index = order[depth]
+        for group in options[index]:
+            if group.clashes_with(occupied):
+                continue
+            chosen[index] = group
+            yield from extend(depth + 1, chosen, occupied + group.slots)
+        chosen.pop(index, None)
+
+    if not options:
+        return iter(())
+    return itertools.islice(extend(0, {}, []), limit)
+
+
+def _session_sort_key(session):
+    day = _day(session.get("day"))
+    interval = parse_time_range(session.get("time")) or (0, 0)
+    return DAYS.index(day) if day in DAYS else len(DAYS), interval
+
+
+def render_timetables(timetables, heading="Week Semester 1"):
+    """Render timetables as the "📌 Module: Day at Time in Location (Group)" markdown schedule."""
+    timetables = list(timetables)
+    lines = ["## 📆 Weekly Lecture Schedule"]
+    for number, timetable in enumerate(timetables, start=1):
+        entries = [(session, group) for group in timetable for session in group.sessions]
+        entries.sort(key=lambda entry: _session_sort_key(entry[0]))
+        lines += ["", f"### {heading}" + (f" (Option {number})" if len(timetables) > 1 else "")]
+        for session, group in entries:
+            lines.append(f"- 📌 {group.module_title}: {_day(session.get('day'))} at {(session.get('time') or '').strip()} "
+                         f"in {(session.get('location') or '').strip()} ({group.group_name})")
+    if not timetables:
+        lines += ["", "No combination of teaching sessions is free of time overlaps."]
+    return "\n".join(lines)
@@ -0,0 +1,228 @@
+import argparse
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+# Spans are only recorded when a trace file is configured with the TRACE_PATH
+# secret (or environment variable); otherwise every span is a cheap no-op.
+DEFAULT_TRACE_PATH = ".cache/traces.jsonl"
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class TraceWriter:
+    """Appends finished spans to a JSONL file, one object per line."""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, record):
+        line = json.dumps(record, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+_writer_checked = False
+
+
+def get_writer():
+    global _writer, _writer_checked
+    if not _writer_checked:
+        with _writer_lock:
+            if not _writer_checked:
+                path = os.environ.get("TRACE_PATH")
+                if path is None:
+                    try:
+                        import streamlit as st
+
+                        path = st.secrets.get("TRACE_PATH")
+                    except Exception:
+                        path = None
+                _writer = TraceWriter(path) if path else None
+                _writer_checked = True
+    return _writer
+
+
+class Span:
+    """
+    A timed operation. Spans opened while another one is active become its
+    children; attributes such as token counts or payload sizes go in set().
+    """
+
+    def __init__(self, name, **attributes):
+        self.name = name
+        self.attributes = attributes
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent = None
+        self.trace_id = None
+        self.start_time = None
+        self._start = None
+        self._token = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+        return self
+
+    def start(self, activate=True):
+        """Start timing; with activate=False the span gets a parent but does not become one."""
+        self.parent = _current_span.get()
+        self.trace_id = self.parent.trace_id if self.parent else uuid.uuid4().hex[:16]
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        if activate:
+            self._token = _current_span.set(self)
+        return self
+
+    def finish(self, error=None):
+        duration_ms = (time.perf_counter() - self._start) * 1000
+        if self._token is not None:
+            try:
+                _current_span.reset(self._token)
+            except ValueError:
+                # Finished from another context than it was started in.
+                _current_span.set(self.parent)
+            self._token = None
+        writer = get_writer()
+        if writer is not None:
+            writer.write({
+                "trace_id": self.trace_id,
+                "span_id": self.span_id,
+                "parent_id": self.parent.span_id if self.parent else None,
+                "name": self.name,
+                "start": self.start_time,
+                "duration_ms": round(duration_ms, 3),
+                "attributes": self.attributes,
+                "error": repr(error) if error is not None else None,
+            })
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish(exc)
+        return False
+
+
+def span(name, **attributes):
+    return Span(name, **attributes)
+
+
+def current_span():
+    return _current_span.get()
+
+
+def payload_size(value):
+    """Rough size of a result: characters for text, items for collections."""
+    if isinstance(value, (str, bytes)):
+        return {"result_chars": len(value)}
+    if isinstance(value, (list, tuple, dict, set)):
+        return {"result_items": len(value)}
+    return {}
+
+
+def traced(name=None):
+    """Run every call of the decorated function, sync or async, in a span."""
+    def decorator(function):
+        span_name = name or function.__qualname__
+
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name) as s:
+                    result = await function(*args, **kwargs)
+                    s.set(**payload_size(result))
+                    return result
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(span_name) as s:
+                result = function(*args, **kwargs)
+                s.set(**payload_size(result))
+                return result
+        return wrapper
+    return decorator
+
+
+def trace_methods(prefix):
+    """Class decorator wrapping every public method, static ones included, in a span."""
+    def decorator(cls):
+        for attribute, value in list(vars(cls).items()):
+            if attribute.startswith("_"):
+                continue
+            if isinstance(value, staticmethod):
+                setattr(cls, attribute, staticmethod(traced(f"{prefix}.{attribute}")(value.__func__)))
+            elif inspect.isfunction(value):
+                setattr(cls, attribute, traced(f"{prefix}.{attribute}")(value))
+        return cls
+    return decorator
+
+
+def in_current_trace(function):
+    """Bind a callable to the current span, for work handed to another thread."""
+    context = contextvars.copy_context()
+    return functools.partial(context.run, function)
+
+
+def load_spans(path):
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def critical_path(root, children):
+    """Follow, from the root, the child that finished last at every level."""
+    path = [root]
+    while children.get(path[-1]["span_id"]):
+        path.append(max(children[path[-1]["span_id"]], key=lambda s: s["start"] + s["duration_ms"] / 1000))
+    return path
+
+
+def summarize(path, runs=5):
+    spans = load_spans(path)
+    children = defaultdict(list)
+    for s in spans:
+        if s["parent_id"]:
+            children[s["parent_id"]].append(s)
+    roots = sorted((s for s in spans if not s["parent_id"]), key=lambda s: s["start"])
+
+    print(f"Critical paths of the last {min(runs, len(roots))} runs:")
+    for root in roots[-runs:]:
+        print(f"\n{root['name']} {root['duration_ms'] / 1000:.2f}s ({root['trace_id']})")
+        for depth, s in enumerate(critical_path(root, children)[1:], start=1):
+            share = s["duration_ms"] / root["duration_ms"] if root["duration_ms"] else 0
+            print(f"{'  ' * depth}{s['name']} {s['duration_ms']:.1f}ms ({share:.0%})")
+
+    durations = defaultdict(list)
+    for s in spans:
+        durations[s["name"]].append(s["duration_ms"])
+    print(f"\n{'span':<48} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'total s':>8}")
+    for name, values in sorted(durations.items(), key=lambda item: -sum(item[1])):
+        print(f"{name:<48} {len(values):>6} {percentile(values, 0.5):>9.1f} {percentile(values, 0.95):>9.1f} "
+              f"{sum(values) / 1000:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize a trace file: critical paths and p50/p95 per span.")
+    parser.add_argument("path", nargs="?", default=os.environ.get("TRACE_PATH", DEFAULT_TRACE_PATH))
+    parser.add_argument("--runs", type=int, default=5, help="number of most recent runs to show")
+    args = parser.parse_args()
+    summarize(args.path, args.runs)
@@ -0,0 +1,232 @@
+import heapq
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from itertools import chain
+
+from utils.catalog import get_catalog
+
+# Occupations offered for a search; the pickers keep the current selections on top.
+DEFAULT_LIMIT = 20
+
+# Dice coefficient of shared trigrams below which a word is not taken for a
+# misspelling of a query word, and how many such words each query word gets.
+MIN_SIMILARITY = 0.4
+SIMILAR_WORDS = 5
+
+# Streamlit reruns the page on every interaction, so the same queries come
+# back again and again; their results are kept until this many are stored.
+MAX_CACHED_QUERIES = 1024
+
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text):
+    """Lowercase ASCII words separated by single spaces: "Café-Manager" -> "cafe manager"."""
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode("ascii")
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+def trigrams(text):
+    """Trigrams of each word padded like pg_trgm, so word starts weigh more than their middles."""
+    return {f"  {word} "[i:i + 3] for word in text.split() for i in range(len(word) + 1)}
+
+
+class TypeaheadIndex:
+    """
+    Ranked search over titles and their synonyms, for search-as-you-type.
+
+    Every word of the query must start a word of a label ("soft dev" finds
+    "software developer"); exact matches come first, then labels starting
+    with the query, titles before synonyms and shorter labels before longer
+    ones. When that leaves room, labels with words sharing enough trigrams
+    with the query words fill it, so typos still find something. Each title
+    is returned once, however many of its labels match. Lookups only touch
+    sorted lists and dicts built up front, and repeated queries are answered
+    from a small result cache.
+    """
+
+    def __init__(self, entries, version=None):
+        """
+        Args:
+            entries (iterable): (title, synonyms) pairs.
+            version: Marker of the data the index was built from.
+        """
+        self.version = version
+        self.titles = []
+        self._labels = []  # (normalized label, title position, is the title itself)
+        words = []
+        for title, synonyms in entries:
+            position = len(self.titles)
+            self.titles.append(title)
+            labels = {normalize(title): True}
+            for synonym in synonyms or ():
+                labels.setdefault(normalize(synonym), False)
+            for label, is_title in labels.items():
+                if not label:
+                    continue
+                label_id = len(self._labels)
+                self._labels.append((label, position, is_title))
+                words.extend((word, label_id) for word in set(label.split()))
+        words.sort()
+        self._words = [word for word, _ in words]
+        self._word_labels = [label_id for _, label_id in words]
+        by_label = sorted(range(len(self._labels)), key=lambda i: self._labels[i][0])
+        self._sorted_labels = [self._labels[i][0] for i in by_label]
+        self._sorted_label_ids = by_label
+        self._exact = {}
+        for label_id, (label, _, _) in enumerate(self._labels):
+            self._exact.setdefault(label, []).append(label_id)
+        # Ranks order the matches of one kind without a key function per lookup.
+        self._by_rank = sorted(range(len(self._labels)),
+                               key=lambda i: (not self._labels[i][2], len(self._labels[i][0]), self._labels[i][0]))
+        self._rank = [0] * len(self._labels)
+        for rank, label_id in enumerate(self._by_rank):
+            self._rank[label_id] = rank
+        # Typos are matched word by word against the distinct words.
+        self._vocabulary = list(dict.fromkeys(self._words))
+        word_grams = {}
+        for word_id, word in enumerate(self._vocabulary):
+            for gram in trigrams(word):
+                word_grams.setdefault(gram, []).append(word_id)
+        self._word_grams = {gram: tuple(ids) for gram, ids in word_grams.items()}
+        self._word_gram_counts = [len(trigrams(word)) for word in self._vocabulary]
+        self._alphabetical = sorted(range(len(self.titles)), key=lambda i: self.titles[i].lower())
+        self._results = {}
+        self.lookups = 0
+        self.cache_hits = 0
+
+    def __len__(self):
+        return len(self.titles)
+
+    @staticmethod
+    def _range(values, prefix):
+        return bisect_left(values, prefix), bisect_left(values, prefix + "\x7f")
+
+    def _word_matches(self, tokens):
+        """Labels where every token starts a word."""
+        matches = None
+        for token in sorted(set(tokens), key=len, reverse=True):
+            low, high = self._range(self._words, token)
+            if matches is None:
+                matches = set(self._word_labels[low:high])
+            else:
+                matches.intersection_update(self._word_labels[low:high])
+            if not matches:
+                break
+        return matches
+
+    def _prefix_matches(self, query):
+        """Exact labels, then labels starting with the query, then the other word matches."""
+        low, high = self._range(self._sorted_labels, query)
+        starting = self._sorted_label_ids[low:high]
+        for group in (self._exact.get(query, ()), starting, self._word_matches(query.split()).difference(starting)):
+            for rank in sorted(map(self._rank.__getitem__, group)):
+                yield self._by_rank[rank]
+
+    def _similar_words(self, token):
+        """Up to SIMILAR_WORDS (similarity, word) pairs, most similar first."""
+        grams = trigrams(token)
+        counts = Counter(chain.from_iterable(self._word_grams.get(gram, ()) for gram in grams))
+        scored = []
+        for word_id, shared in counts.items():
+            similarity = 2 * shared / (len(grams) + self._word_gram_counts[word_id])
+            if similarity >= MIN_SIMILARITY:
+                scored.append((similarity, self._vocabulary[word_id]))
+        return heapq.nlargest(SIMILAR_WORDS, scored)
+
+    def _fuzzy_matches(self, query):
+        """
+        Labels containing a word similar to the query word with the fewest
+        matches, scored by the summed similarity of the best word matching
+        each query word.
+        """
+        tokens = []
+        for token in dict.fromkeys(query.split()):
+            words = [(similarity, self._word_labels[bisect_left(self._words, word):bisect_right(self._words, word)])
+                     for similarity, word in self._similar_words(token)]
+            if words:
+                tokens.append(words)
+        if not tokens:
+            return []
+        tokens.sort(key=lambda words: sum(len(labels) for _, labels in words))
+        scores = {}
+        for similarity, labels in reversed(tokens[0]):
+            scores.update(dict.fromkeys(labels, similarity))
+        for words in tokens[1:]:
+            words = [(similarity, set(labels)) for similarity, labels in words]
+            for label_id in scores:
+                for similarity, labels in words:
+                    if label_id in labels:
+                        scores[label_id] += similarity
+                        break
+        # Two stable sorts with C-level keys: by rank, then by score.
+        ranked = sorted(scores, key=self._rank.__getitem__)
+        ranked.sort(key=scores.__getitem__, reverse=True)
+        return ranked
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """Titles matching the query, best first; the first titles alphabetically for an empty query."""
+        self.lookups += 1
+        query = normalize(query)
+        if not query:
+            return [self.titles[i] for i in self._alphabetical[:limit]]
+        key = (query, limit)
+        cached = self._results.get(key)
+        if cached is not None:
+            self.cache_hits += 1
+            return list(cached)
+
+        found = {}
+        for label_id in self._prefix_matches(query):
+            found.setdefault(self._labels[label_id][1], None)
+            if len(found) == limit:
+                break
+        if len(found) < limit:
+            for label_id in self._fuzzy_matches(query):
+                found.setdefault(self._labels[label_id][1], None)
+                if len(found) == limit:
+                    break
+
+        result = tuple(self.titles[position] for position in found)
+        if len(self._results) >= MAX_CACHED_QUERIES:
+            self._results.clear()
+        self._results[key] = result
+        return list(result)
+
+    def stats(self):
+        return {"titles": len(self.titles), "labels": len(self._labels), "lookups": self.lookups,
+                "cache_hits": self.cache_hits}
+
+
+def occupation_entries(occupations):
+    """(title, synonyms) pairs of catalog occupations; synonyms are their ESCO alternative labels, if loaded."""
+    return [(o["occupation"], o.get("alternative_labels") or ()) for o in occupations]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_occupation_index():
+    """Return the process-wide occupation index, rebuilding it when the catalog changes."""
+    global _index
+    catalog = get_catalog()
+    if _index is None or _index.version != catalog.version:
+        with _index_lock:
+            if _index is None or _index.version != catalog.version:
+                _index = TypeaheadIndex(occupation_entries(catalog.occupations), catalog.version)
+    return _index
+
+
+def occupation_options(query, selected=(), limit=DEFAULT_LIMIT):
+    """
+    Options for an occupation picker fed by a search box: the current
+    selections, so a new search never drops them, then the best matches.
+    """
+    options = dict.fromkeys(selected)
+    for title in get_occupation_index().search(query, limit):
+        options.setdefault(title, None)
+    return list(options)
@@ -0,0 +1,118 @@
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+from utils.catalog import get_catalog
+from utils.queries import run_query
+from utils.skill_matching import SCORE_THRESHOLD, TOP_K
+
+
+def _normalized_matrix(vectors):
+    if not vectors:
+        return np.zeros((0, 0), dtype=np.float32)
+    matrix = np.ascontiguousarray(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class NumpyVectorIndex:
+    """
+    Skill and learning-outcome embeddings held in memory as normalized matrices.
+
+    Answers get_modules_by_occupation for all skills of the requested
+    occupations with a single matrix multiply instead of one vector-index
+    call per skill.
+    """
+
+    def __init__(self, version, skills, occupations, learning_outcomes):
+        self.version = version
+        self.skills = [{"title": s["title"], "description": s["description"]} for s in skills]
+        self.skill_positions = {s["uri"]: i for i, s in enumerate(skills)}
+        self.skill_matrix = _normalized_matrix([s["embedding"] for s in skills])
+
+        self.occupations = {o["occupation"]: o for o in occupations}
+
+        self.learning_outcomes = [lo["learning_outcome"] for lo in learning_outcomes]
+        self.learning_outcome_modules = [lo["modules"] for lo in learning_outcomes]
+        self.learning_outcome_matrix = _normalized_matrix([lo["embedding"] for lo in learning_outcomes])
+
+    @classmethod
+    def load(cls, version=None):
+        record = run_query("load_vector_index").records[0]
+        return cls(version, record["skills"], record["occupations"], record["learning_outcomes"])
+
+    def top_matches(self, skill_positions, top_k=TOP_K, threshold=SCORE_THRESHOLD):
+        """
+        Return (skill_row, learning_outcome, score) arrays for every match above the threshold.
+
+        Scores use the same scale as Neo4j's cosine vector index, (1 + cos) / 2.
+        """
+        k = min(top_k, self.learning_outcome_matrix.shape[0])
+        if k == 0 or len(skill_positions) == 0 or self.skill_matrix.shape[0] == 0:
+            empty = np.empty(0, dtype=np.intp)
+            return empty, empty, np.empty(0, dtype=np.float32)
+        scores = (1.0 + self.skill_matrix[skill_positions] @ self.learning_outcome_matrix.T) / 2.0
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        rows, cols = np.nonzero(top_scores > threshold)
+        return rows, top[rows, cols], top_scores[rows, cols]
+
+    def modules_by_occupation(self, occupations, taken_modules):
+        taken_modules = set(taken_modules)
+        occupation_skills = [
+            (self.occupations[title], [self.skill_positions[uri] for uri in self.occupations[title]["skills"]
+                                       if uri in self.skill_positions])
+            for title in dict.fromkeys(occupations)
+            if title in self.occupations
+        ]
+        unique_skills = sorted({pos for _, positions in occupation_skills for pos in positions})
+        rows, outcomes, _ = self.top_matches(np.asarray(unique_skills, dtype=np.intp))
+
+        matches_by_skill = defaultdict(list)
+        for row, outcome in zip(rows.tolist(), outcomes.tolist()):
+            matches_by_skill[unique_skills[row]].append(outcome)
+
+        grouped = {}
+        for occupation, positions in occupation_skills:
+            for skill in positions:
+                for outcome in matches_by_skill.get(skill, ()):
+                    for module in self.learning_outcome_modules[outcome]:
+                        if module["module_title"] in taken_modules:
+                            continue
+                        key = (module["module_title"], module["module_type"], occupation["occupation"])
+                        entry = grouped.get(key)
+                        if entry is None:
+                            entry = grouped[key] = {
+                                "module": {"module_title": module["module_title"],
+                                           "module_type": module["module_type"]},
+                                "supporting_learning_outcomes": {},
+                                "supported_skills": {},
+                                "occupation": {"occupation": occupation["occupation"],
+                                               "description": occupation["description"]},
+                            }
+                        entry["supporting_learning_outcomes"][self.learning_outcomes[outcome]] = None
+                        entry["supported_skills"][skill] = None
+
+        result = []
+        for entry in grouped.values():
+            entry["supporting_learning_outcomes"] = list(entry["supporting_learning_outcomes"])
+            entry["supported_skills"] = [dict(self.skills[skill]) for skill in entry["supported_skills"]]
+            result.append(entry)
+        return sorted(result, key=lambda entry: len(entry["supported_skills"]), reverse=True)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_vector_index():
+    """Return the process-wide index, reloading it when the graph version changes."""
+    global _index
+    version = get_catalog().version
+    if _index is None or _index.version != version:
+        with _index_lock:
+            if _index is None or _index.version != version:
+                _index = NumpyVectorIndex.load(version)
+    return _index